@@ -1,10 +1,15 @@
 import os
 import secrets
 import string
+import time
 
+import click
 import pymysql
 from flask import (
     Flask,
+    Response,
+    g,
+    has_request_context,
     redirect,
     render_template,
     request,
@@ -12,9 +17,45 @@ from flask import (
     url_for,
     jsonify,
 )
-from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.exceptions import BadRequest
 
+import booking_events
+import migrations
+import sqlite_backend
+from booking_events import BookingChange
+from availability import (
+    SEARCH_SLOTS_SQL,
+    build_availability_payload,
+    build_window_search_payload,
+    fetch_availability,
+    fetch_busy_intervals,
+    filter_search_slots,
+    mark_busy,
+    parse_window_search,
+)
+from availability_cache import AvailabilityCache
+from booking_archive import fetch_user_history
+from booking_batch import commit_batch, expand_recurrence, parse_intervals
+from booking_commit import BookingConflict, SlotLockStripes, commit_booking
+from booking_scheduler import BookingScheduler
+from compression import compress_response
+from bookings_version import SlotsValidator, encode_json, fetch_bookings_version
+from dashboard_summary import DashboardSummaryCache, fetch_dashboard_data
+from booking_index import ACTIVE_INTERVALS_SQL, SlotIntervalIndex, to_datetime
+from db_pool import ConnectionPool, release_request_connection, request_connection
+from metrics import MetricsRegistry
+from password_hasher import HashingBusy, PasswordHasher
+from query_stats import InstrumentedCursor, QueryStats, server_timing
+from slot_changes import SlotChangeLog
+from slot_state import (
+    COMPACT_SLOTS_MEDIA_TYPE,
+    build_compact_slot_payload,
+    build_slot_payload,
+    fetch_slot_states,
+)
+from slot_stream import SlotStateBroadcaster, next_transition
+from user_directory import UserCountCache, fetch_users_page
+
 # Initialize Flask app with custom template and static folder paths
 app = Flask(__name__, template_folder="templates", static_folder="templates/static")
 
@@ -22,7 +63,7 @@ app = Flask(__name__, template_folder="templates", static_folder="templates/stat
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
 
 # Set permanent session lifetime (30 days for remember me)
-from datetime import timedelta
+from datetime import datetime, timedelta
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
 
 # this is the database configuration
@@ -35,182 +76,309 @@ MYSQL_CONFIG = {
     "cursorclass": pymysql.cursors.DictCursor,  
     "autocommit": False, 
 }
+# Connect over a local unix socket instead of TCP when set (e.g. /var/run/mysqld/mysqld.sock)
+if os.getenv("MYSQL_UNIX_SOCKET"):
+    MYSQL_CONFIG["unix_socket"] = os.getenv("MYSQL_UNIX_SOCKET")
+
+# this is the storage backend: "mysql" (default) or "sqlite" (embedded, single node)
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "parking.sqlite3")
+
+
+def open_db_connection():
+    """Open a new raw connection to the configured backend (the pool's connect function)."""
+    if DB_BACKEND == "sqlite":
+        return sqlite_backend.connect(
+            SQLITE_PATH, mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+        )
+    return pymysql.connect(**MYSQL_CONFIG)
+
+
+def _request_query_store():
+    """Per-request query tally (lives on Flask `g`); None outside a request."""
+    if not has_request_context():
+        return None
+    return g.setdefault("_query_stats", {})
+
+
+# this is the in-process query timing (per fingerprint) and slow-query log
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "1") == "1"
+query_stats = QueryStats(_request_query_store, slow_ms=float(os.getenv("SLOW_QUERY_MS", 200)))
+# Server-Timing names the heaviest statements only for admins unless this is set
+SERVER_TIMING_STATEMENTS = os.getenv("SERVER_TIMING_STATEMENTS", "0") == "1"
+
+
+# this is the shared connection pool (sized per worker process)
+db_pool = ConnectionPool(
+    open_db_connection,
+    max_size=int(os.getenv("MYSQL_POOL_SIZE", 10)),
+    timeout=float(os.getenv("MYSQL_POOL_TIMEOUT", 5)),
+    max_lifetime=float(os.getenv("MYSQL_POOL_RECYCLE", 1800)),
+    ping_interval=float(os.getenv("MYSQL_POOL_PING_INTERVAL", 5)),
+    cursor_wrapper=(lambda cursor: InstrumentedCursor(cursor, query_stats)) if QUERY_STATS_ENABLED else None,
+)
 
 
 # this is used to get the database connection
 def get_db_connection():
-    """Create and return a MySQL database connection using MYSQL_CONFIG."""
-    return pymysql.connect(**MYSQL_CONFIG)
+    """
+    Check out a pooled MySQL connection.
+    Inside a request the connection is pinned to Flask `g` and shared by nested callers;
+    conn.close() hands it back to the pool instead of closing the socket.
+    """
+    return request_connection(db_pool, g, has_request_context)
 
 
-# this is used to initialize the database
-def init_db():
+@app.after_request
+def _add_server_timing(response):
     """
-    Initialize database schema and seed initial data.
-    Creates tables (users, parking_slots, bookings) if they don't exist,
-    seeds parking slots A1-A10 if table is empty,
-    and creates default admin user (12345/admin123) if missing.
+    Expose this request's DB time via Server-Timing; the heaviest statements (SQL
+    fingerprints, i.e. schema and query shapes) only to admins or when opted in.
     """
+    show_statements = SERVER_TIMING_STATEMENTS or session.get("role") == "admin"
+    header = server_timing(g.get("_query_stats"), top=3 if show_statements else 0)
+    if header:
+        response.headers["Server-Timing"] = header
+    return response
+
+
+@app.teardown_request
+def _release_db_connection(exc):
+    """Return the request's pooled connection if a route did not close it."""
+    release_request_connection(db_pool, g)
+
+
+# this is the in-memory interval index of active bookings (per worker process)
+BOOKING_INDEX_ENABLED = os.getenv("BOOKING_INDEX_ENABLED", "1") == "1"
+booking_index = SlotIntervalIndex(
+    max_age=float(os.getenv("BOOKING_INDEX_MAX_AGE", 30)),
+    min_reload=float(os.getenv("BOOKING_INDEX_MIN_RELOAD", 1)),
+)
+booking_events.subscribe(booking_index.apply)
+
+
+# this is the short-TTL cache of availability answers for popular windows
+availability_cache = AvailabilityCache(
+    max_entries=int(os.getenv("AVAILABILITY_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("AVAILABILITY_CACHE_TTL", 5)),
+)
+booking_events.subscribe(availability_cache.apply)
+
+
+def load_slot_states():
+    """Fetch one state row per slot on a pooled connection (used by background producers)."""
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Create users table - stores student authentication information
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
-                    username VARCHAR(50) NOT NULL,
-                    full_name VARCHAR(150) NOT NULL,
-                    email VARCHAR(255) NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    role ENUM('user', 'admin') DEFAULT 'user',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (user_id),
-                    UNIQUE KEY uniq_username (username)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
+            return fetch_slot_states(cursor)
+    finally:
+        conn.close()
 
-            # Check and add full_name column if missing
-            cursor.execute(
-                """
-                SELECT COUNT(*) AS col_exists
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = %s
-                  AND TABLE_NAME = 'users'
-                  AND COLUMN_NAME = 'full_name';
-                """,
-                (MYSQL_CONFIG["database"],),
-            )
-            if cursor.fetchone()["col_exists"] == 0:
-                cursor.execute(
-                    "ALTER TABLE users ADD COLUMN full_name VARCHAR(150) NOT NULL DEFAULT 'Unnamed User';"
-                )
 
-            # Check and add role column if missing
-            cursor.execute(
-                """
-                SELECT COUNT(*) AS col_exists
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = %s
-                  AND TABLE_NAME = 'users'
-                  AND COLUMN_NAME = 'role';
-                """,
-                (MYSQL_CONFIG["database"],),
-            )
-            if cursor.fetchone()["col_exists"] == 0:
-                cursor.execute(
-                    "ALTER TABLE users ADD COLUMN role ENUM('user', 'admin') DEFAULT 'user' AFTER password_hash;"
-                )
+# this is the single producer behind /api/dashboard/stream
+slot_broadcaster = SlotStateBroadcaster(
+    load_slot_states,
+    refresh_interval=float(os.getenv("SLOT_STREAM_REFRESH", 30)),
+)
+booking_events.subscribe(slot_broadcaster.notify)
 
-            # Create parking_slots table - stores available parking spaces
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS parking_slots (
-                    slot_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
-                    slot_name VARCHAR(10) NOT NULL,
-                    is_available TINYINT(1) DEFAULT 1,
-                    location VARCHAR(150) DEFAULT 'Nwssu Calbayog City, Samar, Philippines',
-                    PRIMARY KEY (slot_id),
-                    UNIQUE KEY uniq_slot_name (slot_name)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
 
-            # Create bookings table - links users to parking slots with time information
-            # Foreign keys ensure referential integrity (cascade on delete/update)
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS bookings (
-                    booking_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
-                    user_id INT UNSIGNED NOT NULL,
-                    slot_id INT UNSIGNED NOT NULL,
-                    entry_date DATE NOT NULL,
-                    entry_time TIME NOT NULL,
-                    exit_date DATE NOT NULL,
-                    exit_time TIME NOT NULL,
-                    status ENUM('active', 'completed', 'cancelled') DEFAULT 'active',
-                    booked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (booking_id),
-                    UNIQUE KEY uniq_slot_datetime (slot_id, entry_date, entry_time),
-                    CONSTRAINT fk_bookings_user FOREIGN KEY (user_id)
-                        REFERENCES users (user_id) ON DELETE CASCADE ON UPDATE CASCADE,
-                    CONSTRAINT fk_bookings_slot FOREIGN KEY (slot_id)
-                        REFERENCES parking_slots (slot_id) ON DELETE CASCADE ON UPDATE CASCADE
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
+# this is the last /api/dashboard/slots ETag, answered with 304 while it stays current
+slots_validator = SlotsValidator()
 
-            # Seed initial parking slots (P01 through P10) if table is empty
-            cursor.execute("SELECT COUNT(1) AS total FROM parking_slots;")
-            existing_slots = cursor.fetchone()["total"]
-            if existing_slots == 0:
-                # Create slots with specific locations
-                slots_with_locations = [
-                    ("P01", "CCIS Building - Front Row, Left Side"),
-                    ("P02", "CCIS Building - Front Row, Left Center"),
-                    ("P03", "CCIS Building - Front Row, Center"),
-                    ("P04", "CCIS Building - Front Row, Right Center"),
-                    ("P05", "CCIS Building - Front Row, Right Side"),
-                    ("P06", "CCIS Building - Back Row, Left Side"),
-                    ("P07", "CCIS Building - Back Row, Left Center"),
-                    ("P08", "CCIS Building - Back Row, Center"),
-                    ("P09", "CCIS Building - Back Row, Right Center"),
-                    ("P10", "CCIS Building - Back Row, Right Side"),
-                ]
-                cursor.executemany(
-                    "INSERT INTO parking_slots (slot_name, location) VALUES (%s, %s);",
-                    slots_with_locations
-                )
-            else:
-                # Update existing slots with specific locations
-                locations = {
-                    "P01": "CCIS Building - Front Row, Left Side",
-                    "P02": "CCIS Building - Front Row, Left Center",
-                    "P03": "CCIS Building - Front Row, Center",
-                    "P04": "CCIS Building - Front Row, Right Center",
-                    "P05": "CCIS Building - Front Row, Right Side",
-                    "P06": "CCIS Building - Back Row, Left Side",
-                    "P07": "CCIS Building - Back Row, Left Center",
-                    "P08": "CCIS Building - Back Row, Center",
-                    "P09": "CCIS Building - Back Row, Right Center",
-                    "P10": "CCIS Building - Back Row, Right Side",
-                }
-                for slot_name, location in locations.items():
-                    cursor.execute(
-                        "UPDATE parking_slots SET location = %s WHERE slot_name = %s",
-                        (location, slot_name)
-                    )
-                    # Also handle old format P1-P10
-                    old_name = slot_name.lstrip("0").replace("P0", "P")
-                    if old_name != slot_name:
-                        cursor.execute(
-                            "UPDATE parking_slots SET slot_name = %s, location = %s WHERE slot_name = %s",
-                            (slot_name, location, old_name)
-                        )
+# this is the ring buffer behind /api/dashboard/slots?since=<version> (one entry per version seen)
+slot_changes = SlotChangeLog(capacity=int(os.getenv("SLOT_CHANGE_LOG_SIZE", 256)))
 
-            # Create default admin user if it doesn't exist
-            # Default credentials: username=admin, password=admin123
-            cursor.execute(
-                "SELECT 1 FROM users WHERE username = %s;", ("admin",)
-            )
-            if cursor.fetchone() is None:
-                cursor.execute(
-                    """
-                    INSERT INTO users (username, full_name, password_hash, role)
-                    VALUES (%s, %s, %s, %s);
-                    """,
-                    (
-                        "admin",
-                        "System Administrator",
-                        generate_password_hash("admin123"),
-                        "admin",
-                    ),
-                )
 
-        conn.commit()
-    finally:
-        conn.close()
+def json_with_etag(body, etag, mimetype="application/json"):
+    """An encoded JSON body with a strong ETag, or an empty 304 if the client sent that ETag."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    # Browsers may keep the body but must revalidate before reusing it
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def wants_compact_slots():
+    """?format=compact, or an Accept header preferring the compact slot media type."""
+    if request.args.get("format"):
+        return request.args.get("format") == "compact"
+    best = request.accept_mimetypes.best_match(["application/json", COMPACT_SLOTS_MEDIA_TYPE])
+    return best == COMPACT_SLOTS_MEDIA_TYPE
+
+
+# this is the gzip/brotli compression of JSON and page responses (turn off when the proxy does it)
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", 5))
+
+
+@app.after_request
+def _compress_response(response):
+    if RESPONSE_COMPRESSION:
+        compress_response(response, request.accept_encodings, COMPRESSION_MIN_SIZE, COMPRESSION_LEVEL)
+    return response
+
+
+# this is the background thread completing bookings and announcing 15-minute boundaries
+BOOKING_SCHEDULER_ENABLED = os.getenv("BOOKING_SCHEDULER_ENABLED", "1") == "1"
+booking_scheduler = BookingScheduler(
+    get_db_connection,
+    batch_size=int(os.getenv("BOOKING_SCHEDULER_BATCH", 500)),
+    horizon=float(os.getenv("BOOKING_SCHEDULER_HORIZON", 300)),
+)
+booking_events.subscribe(booking_scheduler.schedule)
+
+
+# this is the cached total behind the admin user list
+user_count_cache = UserCountCache(ttl=float(os.getenv("USER_COUNT_CACHE_TTL", 30)))
+
+
+# this is the few-seconds cache of the admin dashboard summary
+dashboard_cache = DashboardSummaryCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", 5)))
+
+
+# this is the bounded process pool doing password hashing off the request threads
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 2))
+password_hasher = PasswordHasher(
+    workers=int(os.environ["PASSWORD_HASH_WORKERS"]) if os.getenv("PASSWORD_HASH_WORKERS") else None,
+    max_pending=int(os.getenv("PASSWORD_HASH_QUEUE", 0)) or None,
+    method=os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+)
+
+
+@app.errorhandler(HashingBusy)
+def _hashing_busy(exc):
+    """Shed password hashing load with a fast 429 instead of queueing behind it."""
+    message = "Too many sign-in requests right now, please try again in a moment."
+    if request.is_json:
+        response = jsonify({"error": message})
+    else:
+        response = Response(message, mimetype="text/plain")
+    response.status_code = 429
+    response.headers["Retry-After"] = str(PASSWORD_HASH_RETRY_AFTER)
+    return response
+
+
+# this is the Prometheus-style metrics registry served at /metrics
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    "parking_http_requests_total", "HTTP requests by endpoint, method and status.",
+    ("endpoint", "method", "status"),
+)
+http_latency = metrics.histogram(
+    "parking_http_request_duration_seconds", "Request handling time by endpoint.", ("endpoint",),
+)
+booking_changes = metrics.counter(
+    "parking_booking_events_total", "Committed booking changes by kind.", ("kind",),
+)
+booking_conflicts = metrics.counter(
+    "parking_booking_conflicts_total", "Booking attempts rejected as conflicting, by route and check.",
+    ("route", "check"),
+)
+booking_events.subscribe(lambda change: booking_changes.inc(change.kind))
+
+# Without METRICS_TOKEN, /metrics only answers scrapes from this host
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_LOCAL_ADDRS = ("127.0.0.1", "::1")
+METRICS_OCCUPANCY_TTL = float(os.getenv("METRICS_OCCUPANCY_TTL", 10))
+_occupancy = {"at": 0.0, "kpis": None}
+
+
+def _occupancy_kpis():
+    """Slot KPIs for the occupancy gauges, re-queried at most every METRICS_OCCUPANCY_TTL seconds."""
+    now = time.monotonic()
+    if _occupancy["kpis"] is None or now - _occupancy["at"] > METRICS_OCCUPANCY_TTL:
+        _occupancy["kpis"] = build_slot_payload(load_slot_states())["kpis"]
+        _occupancy["at"] = now
+    return _occupancy["kpis"]
+
+
+metrics.gauge(
+    "parking_slots", "Parking slots by current state.",
+    lambda: [((state,), _occupancy_kpis()[state]) for state in ("occupied", "reserved", "available")],
+    ("state",),
+)
+metrics.gauge(
+    "parking_db_pool_connections", "Pooled database connections by state.",
+    lambda: [((state,), db_pool.stats()[state]) for state in ("in_use", "idle")],
+    ("state",),
+)
+metrics.gauge(
+    "parking_db_pool_timeouts_total", "Connection checkouts that timed out.",
+    lambda: db_pool.stats()["timeouts"], kind="counter",
+)
+metrics.gauge(
+    "parking_db_pool_wait_seconds_total", "Total time spent waiting for a pooled connection.",
+    lambda: db_pool.stats()["wait_ms_total"] / 1000, kind="counter",
+)
+metrics.gauge(
+    "parking_availability_cache_lookups_total", "Availability cache lookups by result.",
+    lambda: [((result,), availability_cache.stats()[result]) for result in ("hits", "misses")],
+    ("result",), kind="counter",
+)
+metrics.gauge(
+    "parking_slot_stream_subscribers", "Open dashboard SSE streams.",
+    lambda: slot_broadcaster.stats()["subscribers"],
+)
+metrics.gauge(
+    "parking_password_hash_pending", "Password hashes queued or running.",
+    lambda: password_hasher.stats()["pending"],
+)
+metrics.gauge(
+    "parking_password_hash_rejected_total", "Password hash requests turned away with 429.",
+    lambda: password_hasher.stats()["rejected"], kind="counter",
+)
+
+
+@app.before_request
+def _start_request_timer():
+    g._request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get("_request_started")
+    if started is not None:
+        # Unmatched URLs share one label so scanners cannot blow up cardinality
+        endpoint = request.endpoint or "unmatched"
+        http_latency.observe(time.perf_counter() - started, endpoint)
+        http_requests.inc(endpoint, request.method, response.status_code)
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Prometheus text exposition. With METRICS_TOKEN set it requires `Authorization:
+    Bearer <token>`; without one, only requests from localhost are answered.
+    """
+    if METRICS_TOKEN:
+        if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+    elif request.remote_addr not in METRICS_LOCAL_ADDRS:
+        return Response("forbidden: set METRICS_TOKEN to scrape remotely\n", status=403, mimetype="text/plain")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+# this is the per-slot lock striping used by the booking commit path
+slot_locks = SlotLockStripes(int(os.getenv("BOOKING_LOCK_STRIPES", 64)))
+# this is the most windows one batch booking request may ask for
+BATCH_BOOKING_MAX = int(os.getenv("BATCH_BOOKING_MAX", 400))
+
+
+def get_booking_index(version=None):
+    """
+    Return the interval index refreshed if needed, or None when it is disabled.
+    With a bookings version, it is reloaded if it was loaded at another one.
+    """
+    if not BOOKING_INDEX_ENABLED:
+        return None
+    booking_index.ensure_fresh(get_db_connection, version)
+    return booking_index
 
 
 def convert_to_12hour(time_str):
@@ -250,8 +418,129 @@ def generate_secure_password(length: int = 12) -> str:
             return password
 
 
-# Initialize database on application startup
-init_db()
+def schema_version():
+    """Applied migration version of the configured database (one query)."""
+    conn = get_db_connection()
+    try:
+        return migrations.current_version(conn)
+    finally:
+        conn.close()
+
+
+def run_migrations(target=migrations.LATEST_VERSION):
+    """Apply pending schema migrations; returns the versions applied."""
+    conn = get_db_connection()
+    try:
+        return migrations.migrate(conn, DB_BACKEND, MYSQL_CONFIG["database"], target)
+    finally:
+        conn.close()
+
+
+# this is used to start the per-worker background work once the schema is current
+_schema = {"ready": False}
+
+
+def _on_schema_ready():
+    _schema["ready"] = True
+    if BOOKING_INDEX_ENABLED:
+        booking_index.ensure_fresh(get_db_connection)
+    if BOOKING_SCHEDULER_ENABLED:
+        booking_scheduler.start()
+
+
+@app.before_request
+def _require_current_schema():
+    """Answer 503 until `flask migrate` has brought the database up to date."""
+    if _schema["ready"]:
+        return None
+    if schema_version() < migrations.LATEST_VERSION:
+        return Response(
+            "Database schema is out of date; run `flask --app app migrate`.\n",
+            status=503, mimetype="text/plain",
+        )
+    _on_schema_ready()
+    return None
+
+
+@app.cli.command("migrate")
+@click.option("--to", "target", type=int, default=migrations.LATEST_VERSION, help="stop at this version")
+def migrate_command(target):
+    """Apply pending schema migrations."""
+    applied = run_migrations(target)
+    if applied:
+        click.echo(f"Applied migrations {', '.join(map(str, applied))}; schema is at version {schema_version()}.")
+    else:
+        click.echo(f"Nothing to apply; schema is at version {schema_version()}.")
+
+
+@app.cli.command("schema-version")
+def schema_version_command():
+    """Print the applied and the latest schema version."""
+    click.echo(f"applied: {schema_version()}, latest: {migrations.LATEST_VERSION}")
+
+
+def before_fork():
+    """
+    Release what must not be shared with forked server workers (gunicorn preload):
+    idle DB connections, the hashing processes and the scheduler thread.
+    """
+    db_pool.close_all()
+    password_hasher.shutdown()
+    booking_scheduler.stop()
+
+
+def init_worker():
+    """Forget the DB connections a freshly forked server worker inherited (see gunicorn.conf.py)."""
+    db_pool.reset_after_fork()
+
+
+def start_worker():
+    """
+    Start this process' background work before it serves requests (gunicorn
+    post_worker_init, or __main__): the hashing pool, then the booking index and
+    scheduler if the schema is current. Otherwise the first request starts them.
+    """
+    # Fork the hashing processes before the scheduler thread exists
+    password_hasher.start()
+    if schema_version() >= migrations.LATEST_VERSION:
+        _on_schema_ready()
+
+
+# Import only checks the schema version: migrations run via `flask --app app migrate`,
+# background work starts in start_worker(), so helper scripts importing app stay cheap
+if os.getenv("AUTO_MIGRATE", "0") == "1":
+    run_migrations()
+_startup_schema_version = schema_version()
+if _startup_schema_version < migrations.LATEST_VERSION:
+    app.logger.warning(
+        "database schema is behind (version %s of %s); run `flask --app app migrate`",
+        _startup_schema_version, migrations.LATEST_VERSION,
+    )
+
+
+def rehash_password(user_id, old_hash, password):
+    """
+    Upgrade a stored hash made with an outdated method or cost after a successful login.
+    Best effort: skipped when the hashing pool is busy, and never overwrites a hash that
+    changed in the meantime.
+    """
+    if not password_hasher.needs_rehash(old_hash):
+        return
+    try:
+        new_hash = password_hasher.hash(password)
+    except HashingBusy:
+        return
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET password_hash = %s WHERE user_id = %s AND password_hash = %s",
+                (new_hash, user_id, old_hash),
+            )
+        conn.commit()
+        password_hasher.note_rehashed()
+    finally:
+        conn.close()
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -282,8 +571,9 @@ def login():
         finally:
             conn.close()
 
-        # Verify password using secure hash comparison
-        if user and check_password_hash(user["password_hash"], password):
+        # Verify password using secure hash comparison (on the hashing pool)
+        if user and password_hasher.verify(user["password_hash"], password):
+            rehash_password(user["user_id"], user["password_hash"], password)
             # Create session to track logged-in user
             session["user_id"] = user["user_id"]
             session["username"] = username
@@ -332,7 +622,7 @@ def signup():
         provided_password = request.form.get("password", "").strip()
         # Use provided password or generate a secure one automatically
         plain_password = provided_password or generate_secure_password()
-        password_hash = generate_password_hash(plain_password)
+        password_hash = password_hasher.hash(plain_password)
 
         conn = get_db_connection()
         try:
@@ -371,6 +661,8 @@ def signup():
                         (username, full_name, email, password_hash, "user"),
                     )
                     conn.commit()
+                    user_count_cache.invalidate()
+                    dashboard_cache.invalidate()
                     message = (
                         "Account created successfully!"
                     )
@@ -429,11 +721,13 @@ def admin_signup():
                         message_type = "error"
                     else:
                         # Insert new admin user
+                        password_hash = password_hasher.hash(password)
                         cursor.execute(
                             "INSERT INTO users (username, full_name, password_hash, role) VALUES (%s, %s, %s, %s)",
-                            (admin_username, full_name, generate_password_hash(password), "admin"),
+                            (admin_username, full_name, password_hash, "admin"),
                         )
                         conn.commit()
+                        dashboard_cache.invalidate()
                         message = "Admin account created successfully!"
                         message_type = "success"
             finally:
@@ -446,40 +740,98 @@ def admin_signup():
     )
 
 
+@app.route("/api/admin/stats")
+def api_admin_stats():
+    """Admin endpoint exposing in-process runtime stats (connection pool usage and wait times)."""
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized - Admin access required"}), 401
+
+    return jsonify(
+        {
+            "db_pool": db_pool.stats(),
+            "availability_cache": availability_cache.stats(),
+            "slot_stream": slot_broadcaster.stats(),
+            "slots_validator": slots_validator.stats(),
+            "slot_changes": slot_changes.stats(),
+            "dashboard_cache": dashboard_cache.stats(),
+            "password_hasher": password_hasher.stats(),
+            "booking_scheduler": booking_scheduler.stats(),
+        }
+    )
+
+
+@app.route("/api/admin/query-stats", methods=["GET", "POST"])
+def api_admin_query_stats():
+    """
+    Admin endpoint exposing per-fingerprint query counts, timings and latency histograms.
+    GET returns the top statements by total time (?top=N, default 50); POST resets them.
+    """
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized - Admin access required"}), 401
+
+    if request.method == "POST":
+        query_stats.reset()
+        return jsonify({"status": "ok"})
+    top = min(max(request.args.get("top", 50, type=int) or 50, 1), 500)
+    return jsonify(query_stats.snapshot(top))
+
+
+@app.route("/api/admin/booking-index", methods=["GET", "POST"])
+def api_admin_booking_index():
+    """
+    Admin endpoint for the in-memory booking interval index.
+    GET: verify the index against the bookings table
+    POST: rebuild the index from the bookings table
+    """
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized - Admin access required"}), 401
+
+    conn = get_db_connection()
+    try:
+        if request.method == "POST":
+            booking_index.load(conn)
+            return jsonify({"status": "ok", "message": "Booking index rebuilt"})
+        with conn.cursor() as cursor:
+            cursor.execute(ACTIVE_INTERVALS_SQL)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return jsonify(booking_index.verify(rows))
+
+
 @app.route("/api/dashboard/users")
 def api_dashboard_users():
     """
     Admin endpoint to get list of all users.
     Returns user information for admin dashboard.
+
+    Query params:
+        q: username / full name prefix filter
+        cursor: next_cursor from the previous page (keyset pagination)
+        limit: page size (default 50, max 200)
     """
     if "user_id" not in session or session.get("role") != "admin":
         return jsonify({"error": "Unauthorized - Admin access required"}), 401
 
+    search = (request.args.get("q") or "").strip() or None
+    after = request.args.get("cursor") or None
+    limit = min(max(request.args.get("limit", 50, type=int) or 50, 1), 200)
+
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT 
-                    user_id,
-                    username,
-                    full_name,
-                    role,
-                    created_at
-                FROM users
-                WHERE role = 'user'
-                ORDER BY created_at DESC
-                LIMIT 50
-                """
-            )
-            users = cursor.fetchall()
+            try:
+                users, next_cursor = fetch_users_page(cursor, search=search, after=after, limit=limit)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            total = user_count_cache.get(cursor, search)
             
             # Convert datetime to string for JSON serialization
             for user in users:
                 if user.get('created_at'):
                     user['created_at'] = user['created_at'].strftime('%Y-%m-%d %H:%M')
             
-            return jsonify({"users": users})
+            return jsonify({"users": users, "next_cursor": next_cursor, "total": total})
     finally:
         conn.close()
 
@@ -509,11 +861,26 @@ def api_delete_user(username):
             if user['role'] == 'admin':
                 return jsonify({"error": "Cannot delete admin users"}), 403
             
+            # Remember the active bookings so caches/indexes can drop them after commit
+            cursor.execute(
+                """
+                SELECT booking_id, slot_id, entry_ts, exit_ts
+                FROM bookings
+                WHERE user_id = %s AND status = 'active'
+                """,
+                (user['user_id'],)
+            )
+            removed = cursor.fetchall()
+            
             # Delete user's bookings first (foreign key constraint)
             cursor.execute(
                 "DELETE FROM bookings WHERE user_id = %s",
                 (user['user_id'],)
             )
+            cursor.execute(
+                "DELETE FROM bookings_archive WHERE user_id = %s",
+                (user['user_id'],)
+            )
             
             # Delete the user
             cursor.execute(
@@ -522,6 +889,12 @@ def api_delete_user(username):
             )
             
             conn.commit()
+            user_count_cache.invalidate()
+            dashboard_cache.invalidate()
+            for b in removed:
+                booking_events.publish(
+                    BookingChange("deleted", b["booking_id"], b["slot_id"], b["entry_ts"], b["exit_ts"])
+                )
             return jsonify({"message": "User deleted successfully"}), 200
             
     except Exception as e:
@@ -554,11 +927,11 @@ def change_password():
             )
             user = cursor.fetchone()
             
-            if not user or not check_password_hash(user["password_hash"], current_password):
+            if not user or not password_hasher.verify(user["password_hash"], current_password):
                 return jsonify({"error": "Current password is incorrect"}), 401
             
             # Update password
-            new_password_hash = generate_password_hash(new_password)
+            new_password_hash = password_hasher.hash(new_password)
             cursor.execute(
                 "UPDATE users SET password_hash = %s WHERE user_id = %s",
                 (new_password_hash, session["user_id"])
@@ -566,6 +939,8 @@ def change_password():
             conn.commit()
             
             return jsonify({"message": "Password changed successfully"}), 200
+    except HashingBusy:
+        raise
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -613,11 +988,11 @@ def forgot_password():
                     )
                     user = cursor.fetchone()
                     
-                    if user and check_password_hash(user["password_hash"], old_password):
+                    if user and password_hasher.verify(user["password_hash"], old_password):
                         # Update password
                         cursor.execute(
                             "UPDATE users SET password_hash = %s WHERE username = %s",
-                            (generate_password_hash(new_password), username),
+                            (password_hasher.hash(new_password), username),
                         )
                         conn.commit()
                         message = "Password reset successfully! You can now login with your new password."
@@ -636,6 +1011,7 @@ def forgot_password():
 def user_dashboard():
     """
     User dashboard showing their bookings and statistics.
+    Query params: page (20 bookings per page), archive=1 to include archived history.
     """
     if "user_id" not in session:
         return redirect(url_for("login"))
@@ -644,31 +1020,16 @@ def user_dashboard():
     if session.get("role") == "admin":
         return redirect(url_for("dashboard"))
     
+    page = request.args.get("page", 1, type=int) or 1
+    include_archive = request.args.get("archive") == "1"
+
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Get user's bookings
-            cursor.execute(
-                """
-                SELECT 
-                    b.booking_id,
-                    ps.slot_name,
-                    ps.location,
-                    b.entry_date,
-                    b.entry_time,
-                    b.exit_date,
-                    b.exit_time,
-                    b.status,
-                    b.booked_at
-                FROM bookings b
-                JOIN parking_slots ps ON b.slot_id = ps.slot_id
-                WHERE b.user_id = %s
-                ORDER BY b.booked_at DESC
-                LIMIT 20
-                """,
-                (session["user_id"],),
+            # Get one page of the user's bookings (archived history only when asked)
+            bookings, has_more = fetch_user_history(
+                cursor, session["user_id"], page=page, include_archive=include_archive
             )
-            bookings = cursor.fetchall()
             
             # Calculate statistics (exclude cancelled bookings from total)
             cursor.execute(
@@ -676,11 +1037,11 @@ def user_dashboard():
                 SELECT 
                     COUNT(CASE WHEN status = 'active' THEN 1 END) as total,
                     SUM(CASE WHEN status = 'active' 
-                             AND TIMESTAMP(entry_date, entry_time) <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
-                             AND NOW() <= TIMESTAMP(exit_date, exit_time)
+                             AND entry_ts <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
+                             AND NOW() <= exit_ts
                         THEN 1 ELSE 0 END) as active,
                     SUM(CASE WHEN status = 'active' 
-                             AND TIMESTAMP(entry_date, entry_time) > DATE_ADD(NOW(), INTERVAL 15 MINUTE)
+                             AND entry_ts > DATE_ADD(NOW(), INTERVAL 15 MINUTE)
                         THEN 1 ELSE 0 END) as upcoming
                 FROM bookings
                 WHERE user_id = %s
@@ -695,7 +1056,10 @@ def user_dashboard():
     return render_template(
         "user_dashboard.html",
         bookings=bookings,
-        stats=stats
+        stats=stats,
+        page=page,
+        has_more=has_more,
+        include_archive=include_archive,
     )
 
 
@@ -727,86 +1091,61 @@ def booking():
             # Verify selected slot exists
             with conn.cursor() as cursor:
                 cursor.execute(
-                    "SELECT slot_id FROM parking_slots WHERE slot_name = %s",
+                    "SELECT slot_id, location FROM parking_slots WHERE slot_name = %s",
                     (selected_space,),
                 )
                 slot = cursor.fetchone()
+                version = fetch_bookings_version(cursor)
 
+            try:
+                entry_ts = to_datetime(entry_date, entry_time)
+                exit_ts = to_datetime(exit_date, exit_time)
+            except ValueError:
+                entry_ts = exit_ts = None
+
+            index = get_booking_index(version)
             if slot is None:
                 error = "Selected slot does not exist. Please choose another."
+            elif entry_ts is None:
+                error = "Invalid date or time. Please check your entry and exit details."
+            elif exit_ts <= entry_ts:
+                error = "Exit time must be after entry time."
+            elif (
+                index is not None
+                and index.version == version
+                and not index.is_free(slot["slot_id"], entry_ts, exit_ts)
+            ):
+                # Fast reject from the in-memory index, only while it has every write up
+                # to the current version (other workers' cancellations included)
+                booking_conflicts.inc("booking", "index")
+                error = "This slot is already booked for the selected time period. Please choose a different time or slot."
             else:
-                # Check for time-based conflicts with existing bookings
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        """
-                        SELECT COUNT(*) as conflict_count
-                        FROM bookings
-                        WHERE slot_id = %s
-                          AND status = 'active'
-                          AND (
-                            -- New booking overlaps with existing booking
-                            (TIMESTAMP(%s, %s) < TIMESTAMP(exit_date, exit_time) 
-                             AND TIMESTAMP(%s, %s) > TIMESTAMP(entry_date, entry_time))
-                          )
-                        """,
-                        (
-                            slot["slot_id"],
-                            entry_date,
-                            entry_time,
-                            exit_date,
-                            exit_time,
-                        ),
+                try:
+                    # Check + insert under the slot's lock; the database stays the source of truth
+                    booking_id = commit_booking(
+                        conn, slot_locks, session["user_id"], slot["slot_id"], entry_ts, exit_ts,
                     )
-                    conflict = cursor.fetchone()
-
-                if conflict and conflict["conflict_count"] > 0:
+                except BookingConflict as conflict:
+                    booking_conflicts.inc("booking", "database" if conflict.reason == "overlap" else "constraint")
                     error = "This slot is already booked for the selected time period. Please choose a different time or slot."
                 else:
-                    try:
-                        # Create booking (no need to update is_available - we use time-based checking)
-                        with conn.cursor() as cursor:
-                            cursor.execute(
-                                """
-                                INSERT INTO bookings (
-                                    user_id, slot_id, entry_date, entry_time, exit_date, exit_time
-                                ) VALUES (%s, %s, %s, %s, %s, %s)
-                                """,
-                                (
-                                    session["user_id"],
-                                    slot["slot_id"],
-                                    entry_date,
-                                    entry_time,
-                                    exit_date,
-                                    exit_time,
-                                ),
-                            )
-                            booking_id = cursor.lastrowid
-                            
-                            # Get slot location
-                            cursor.execute(
-                                "SELECT location FROM parking_slots WHERE slot_name = %s",
-                                (selected_space,)
-                            )
-                            slot_info = cursor.fetchone()
-                            slot_location = slot_info['location'] if slot_info else "CCIS Building"
-                            
-                            conn.commit()
-                        
-                        # Show appropriate confirmation page based on booking type
-                        template = "reserved.html" if booking_type == "reserve" else "confirm.html"
-                        return render_template(
-                            template,
-                            booking_id=booking_id,
-                            entry_date=entry_date,
-                            entry_time=convert_to_12hour(entry_time),
-                            exit_date=exit_date,
-                            exit_time=convert_to_12hour(exit_time),
-                            selected_space=selected_space,
-                            slot_location=slot_location,
-                        )
-                    except pymysql.err.IntegrityError:
-                        # Handle duplicate booking attempts (unique constraint violation)
-                        error = "Unable to save booking. Please try different details."
+                    booking_events.publish(
+                        BookingChange("created", booking_id, slot["slot_id"], entry_ts, exit_ts)
+                    )
+                    slot_location = slot["location"] or "CCIS Building"
+
+                    # Show appropriate confirmation page based on booking type
+                    template = "reserved.html" if booking_type == "reserve" else "confirm.html"
+                    return render_template(
+                        template,
+                        booking_id=booking_id,
+                        entry_date=entry_date,
+                        entry_time=convert_to_12hour(entry_time),
+                        exit_date=exit_date,
+                        exit_time=convert_to_12hour(exit_time),
+                        selected_space=selected_space,
+                        slot_location=slot_location,
+                    )
 
         # Fetch all parking slots for display (GET request or after error)
         with conn.cursor() as cursor:
@@ -824,80 +1163,16 @@ def booking():
 # Admin dashboard + helpers
 # ---------------------------
 def get_dashboard_data():
-    """Collect aggregated dashboard data (slot stats + active bookings + users)."""
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cursor:
-            # Get slot statistics
-            cursor.execute("SELECT COUNT(*) AS total FROM parking_slots")
-            total_slots = cursor.fetchone()["total"]
-
-            cursor.execute(
-                "SELECT COUNT(*) AS occupied FROM parking_slots WHERE is_available = 0"
-            )
-            occupied_slots = cursor.fetchone()["occupied"]
-
-            cursor.execute(
-                "SELECT slot_id, slot_name, is_available FROM parking_slots ORDER BY slot_name"
-            )
-            slots = cursor.fetchall()
-
-            # Get active bookings with user details
-            cursor.execute(
-                """
-                SELECT
-                    ps.slot_name,
-                    ps.slot_id,
-                    u.username AS occupant,
-                    u.full_name AS occupant_name,
-                    b.booking_id,
-                    b.entry_date,
-                    b.entry_time,
-                    b.exit_date,
-                    b.exit_time,
-                    b.status,
-                    b.booked_at
-                FROM bookings b
-                JOIN parking_slots ps ON b.slot_id = ps.slot_id
-                JOIN users u ON b.user_id = u.user_id
-                WHERE b.status = 'active'
-                ORDER BY b.booked_at DESC
-                """
-            )
-            bookings = cursor.fetchall()
-            
-            # Convert date/time objects to strings for JSON serialization
-            for booking in bookings:
-                if booking.get('entry_date'):
-                    booking['entry_date'] = str(booking['entry_date'])
-                if booking.get('exit_date'):
-                    booking['exit_date'] = str(booking['exit_date'])
-                if booking.get('entry_time'):
-                    booking['entry_time'] = str(booking['entry_time'])
-                if booking.get('exit_time'):
-                    booking['exit_time'] = str(booking['exit_time'])
-                if booking.get('booked_at'):
-                    booking['booked_at'] = booking['booked_at'].strftime('%Y-%m-%d %H:%M:%S')
-
-            # Get user statistics
-            cursor.execute("SELECT COUNT(*) AS total FROM users WHERE role = 'user'")
-            total_users = cursor.fetchone()["total"]
-            
-            cursor.execute("SELECT COUNT(*) AS total FROM users WHERE role = 'admin'")
-            total_admins = cursor.fetchone()["total"]
-    finally:
-        conn.close()
+    """Dashboard KPIs rendered into the page (slot and user counts)."""
+    def load():
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                return fetch_dashboard_data(cursor)
+        finally:
+            conn.close()
 
-    available_slots = total_slots - occupied_slots
-    return {
-        "total_slots": total_slots,
-        "occupied_slots": occupied_slots,
-        "available_slots": available_slots,
-        "slots": slots,
-        "bookings": bookings,
-        "total_users": total_users,
-        "total_admins": total_admins,
-    }
+    return dashboard_cache.get(load)
 
 
 @app.route("/dashboard")
@@ -919,114 +1194,79 @@ def dashboard():
 # ---------------------------
 @app.route("/api/dashboard/slots")
 def api_dashboard_slots():
+    """
+    Slot states for the admin dashboard (?format=compact for the columnar form).
+    ?since=<version> returns only the slots changed since that version (see slot_changes.py).
+    """
     if "user_id" not in session or session.get("role") != "admin":
         return jsonify({"error": "Unauthorized"}), 401
 
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"error": "since must be a version number"}), 400
+
+    fmt = "compact" if wants_compact_slots() else "full"
+    rows = None
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Get current/active bookings (entry time within 15 minutes or already started, and not yet ended)
-            cursor.execute(
-                """
-                SELECT 
-                    ps.slot_id,
-                    ps.slot_name,
-                    u.username AS occupant,
-                    u.full_name AS occupant_name,
-                    b.booking_id,
-                    b.entry_date,
-                    b.entry_time,
-                    b.exit_date,
-                    b.exit_time,
-                    b.status
-                FROM bookings b
-                JOIN parking_slots ps ON b.slot_id = ps.slot_id
-                JOIN users u ON b.user_id = u.user_id
-                WHERE b.status = 'active'
-                  AND TIMESTAMP(b.entry_date, b.entry_time) <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
-                  AND NOW() <= TIMESTAMP(b.exit_date, b.exit_time)
-                """
-            )
-            current = cursor.fetchall()
-            current_map = {c["slot_name"]: c for c in current}
-
-            # Get upcoming/reserved bookings (entry time more than 15 minutes in the future)
-            cursor.execute(
-                """
-                SELECT 
-                    ps.slot_id,
-                    ps.slot_name,
-                    u.username AS occupant,
-                    u.full_name AS occupant_name,
-                    b.booking_id,
-                    b.entry_date,
-                    b.entry_time,
-                    b.exit_date,
-                    b.exit_time,
-                    b.status
-                FROM bookings b
-                JOIN parking_slots ps ON b.slot_id = ps.slot_id
-                JOIN users u ON b.user_id = u.user_id
-                WHERE b.status = 'active'
-                  AND TIMESTAMP(b.entry_date, b.entry_time) > DATE_ADD(NOW(), INTERVAL 15 MINUTE)
-                ORDER BY b.entry_date, b.entry_time
-                """
-            )
-            upcoming = cursor.fetchall()
-            # Group by slot_name, keep only the earliest booking per slot
-            upcoming_map = {}
-            for u in upcoming:
-                slot_name = u["slot_name"]
-                if slot_name not in upcoming_map:
-                    upcoming_map[slot_name] = u
-
-            cursor.execute(
-                "SELECT slot_id, slot_name, is_available FROM parking_slots ORDER BY slot_name"
-            )
-            all_slots = cursor.fetchall()
+            version = fetch_bookings_version(cursor)
+            now = datetime.now()
+            if since is not None:
+                if not slot_changes.fresh(version, now):
+                    rows = fetch_slot_states(cursor)
+            else:
+                etag = slots_validator.current(version, now, fmt)
+                if etag is not None and request.if_none_match.contains_weak(etag):
+                    # Nothing booked, cancelled or due to change state since that ETag
+                    response = json_with_etag(None, etag)
+                    response.vary.add("Accept")
+                    return response
+                # One row per slot: occupied / reserved / available plus the deciding booking
+                rows = fetch_slot_states(cursor)
     finally:
         conn.close()
 
-    def _s(v):
-        return (None if v is None else str(v))
-
-    slots = []
-    for s in all_slots:
-        cur = current_map.get(s["slot_name"]) or {}
-        upc = upcoming_map.get(s["slot_name"]) or {}
-        state = "available"
-        src = None
-        if cur:
-            state = "occupied"
-            src = cur
-        elif upc:
-            state = "reserved"
-            src = upc
-        # If no time-based booking found, slot is truly available
-        slots.append(
-            {
-                "slot_name": s["slot_name"],
-                "slot_id": s.get("slot_id"),
-                "occupied": state == "occupied",
-                "state": state,
-                "username": (src or {}).get("occupant", ""),
-                "occupant_name": (src or {}).get("occupant_name"),
-                "entry_date": _s((src or {}).get("entry_date")),
-                "entry_time": _s((src or {}).get("entry_time")),
-                "exit_date": _s((src or {}).get("exit_date")),
-                "exit_time": _s((src or {}).get("exit_time")),
-                "status": (src or {}).get("status"),
-                "booking_id": (src or {}).get("booking_id"),
-                "is_available": s.get("is_available", 1),
-            }
-        )
+    payload = None
+    valid_until = next_transition(rows, datetime.now()) if rows is not None else None
+    if rows is not None and not slot_changes.fresh(version, datetime.now()):
+        payload = build_slot_payload(rows)
+        slot_changes.record(version, payload, valid_until)
+
+    if since is not None:
+        response = Response(encode_json(slot_changes.delta(since)), mimetype="application/json")
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    if fmt == "compact":
+        body = encode_json(build_compact_slot_payload(rows))
+    else:
+        body = encode_json(payload or build_slot_payload(rows))
+    etag = slots_validator.store(version, body, valid_until, fmt)
+    response = json_with_etag(body, etag, COMPACT_SLOTS_MEDIA_TYPE if fmt == "compact" else "application/json")
+    response.vary.add("Accept")
+    return response
+
+
+@app.route("/api/dashboard/stream")
+def api_dashboard_stream():
+    """
+    Server-Sent Events stream of slot state changes for the admin dashboard.
+    Sends a `snapshot` event (same shape as /api/dashboard/slots) on connect, then
+    `slots` events carrying only the changed slots plus fresh KPIs.
+    """
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 401
 
-    total = len(all_slots)
-    occupied = sum(1 for s in slots if s["state"] == "occupied")
-    reserved = sum(1 for s in slots if s["state"] == "reserved")
-    available = total - occupied - reserved
-    payload = {"kpis": {"total": total, "occupied": occupied, "reserved": reserved, "available": available}, "slots": slots}
-    return jsonify(payload)
+    q = slot_broadcaster.subscribe()
+    return Response(
+        slot_broadcaster.stream(q),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/dashboard/bookings", methods=["POST"])
@@ -1065,6 +1305,13 @@ def api_dashboard_add_booking():
 
     username = payload["username"].strip()
     slot_name = payload["slot_name"].strip()
+    try:
+        entry_ts = to_datetime(payload["entry_date"], payload["entry_time"])
+        exit_ts = to_datetime(payload["exit_date"], payload["exit_time"])
+    except ValueError:
+        raise BadRequest("Invalid date or time format.")
+    if exit_ts <= entry_ts:
+        raise BadRequest("Exit time must be after entry time.")
 
     conn = get_db_connection()
     try:
@@ -1078,67 +1325,161 @@ def api_dashboard_add_booking():
             if not user:
                 raise BadRequest("Username not found.")
 
-            # Check slot availability using real-time logic
             cursor.execute(
-                """
-                SELECT ps.slot_id, ps.slot_name,
-                    CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM bookings b
-                            WHERE b.slot_id = ps.slot_id
-                            AND b.status = 'active'
-                            AND (
-                                (b.entry_date < %s OR (b.entry_date = %s AND b.entry_time < %s))
-                                AND (b.exit_date > %s OR (b.exit_date = %s AND b.exit_time > %s))
-                            )
-                        ) THEN 0
-                        ELSE 1
-                    END AS is_available
-                FROM parking_slots ps
-                WHERE ps.slot_name = %s
-                """,
-                (
-                    payload["exit_date"],
-                    payload["exit_date"],
-                    payload["exit_time"],
-                    payload["entry_date"],
-                    payload["entry_date"],
-                    payload["entry_time"],
-                    slot_name,
-                ),
+                "SELECT slot_id, slot_name FROM parking_slots WHERE slot_name = %s",
+                (slot_name,),
+            )
+            slot = cursor.fetchone()
+            version = fetch_bookings_version(cursor)
+
+        if slot is None:
+            raise BadRequest("Slot does not exist.")
+        index = get_booking_index(version)
+        # A stale index (e.g. missing another worker's cancellation) leaves it to the database
+        if index is not None and index.version == version and not index.is_free(slot["slot_id"], entry_ts, exit_ts):
+            booking_conflicts.inc("api_dashboard_add_booking", "index")
+            raise BadRequest("Slot already occupied for this time period.")
+
+        try:
+            # Check + insert under the slot's lock
+            booking_id = commit_booking(
+                conn, slot_locks, user["user_id"], slot["slot_id"], entry_ts, exit_ts,
+            )
+        except BookingConflict as conflict:
+            booking_conflicts.inc(
+                "api_dashboard_add_booking", "database" if conflict.reason == "overlap" else "constraint"
+            )
+            raise BadRequest("Slot already occupied for this time period.")
+    finally:
+        conn.close()
+
+    booking_events.publish(BookingChange("created", booking_id, slot["slot_id"], entry_ts, exit_ts))
+    return jsonify({"status": "ok", "message": "Booking created successfully"})
+
+
+@app.route("/api/dashboard/bookings/batch", methods=["POST"])
+def api_dashboard_batch_booking():
+    """
+    Admin endpoint to book one slot for one user over many windows in a single request.
+
+    Expected JSON payload, with either an explicit "intervals" list:
+        {
+            "username": "12345",
+            "slot_name": "P1",
+            "intervals": [
+                {"entry_date": "2025-01-06", "entry_time": "08:00",
+                 "exit_date": "2025-01-06", "exit_time": "17:00"}
+            ],
+            "all_or_nothing": false
+        }
+    or a weekly "recurrence" rule instead of "intervals":
+        {"start_date": "2025-01-06", "end_date": "2025-05-30",
+         "weekdays": ["mon", "tue", "wed", "thu", "fri"],
+         "entry_time": "08:00", "exit_time": "17:00"}
+
+    Returns:
+        JSON with one result per window (accepted with its booking_id, or rejected
+        with a reason: invalid, occupied, overlaps_batch, constraint (a booking on the
+        slot, even a cancelled one, already starts at that time), batch_rejected)
+    """
+    if "user_id" not in session or session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized - Admin access required"}), 401
+
+    payload = request.get_json(silent=True) or {}
+    missing = [field for field in ("username", "slot_name") if not payload.get(field)]
+    if not payload.get("intervals") and not payload.get("recurrence"):
+        missing.append("intervals or recurrence")
+    if missing:
+        raise BadRequest(f"Missing required fields: {', '.join(missing)}")
+
+    if payload.get("recurrence"):
+        try:
+            intervals = expand_recurrence(payload["recurrence"], BATCH_BOOKING_MAX)
+        except (TypeError, ValueError) as e:
+            raise BadRequest(f"Invalid recurrence: {e}")
+    else:
+        if not isinstance(payload["intervals"], list):
+            raise BadRequest("intervals must be a list.")
+        if len(payload["intervals"]) > BATCH_BOOKING_MAX:
+            raise BadRequest(f"At most {BATCH_BOOKING_MAX} intervals per request.")
+        intervals = parse_intervals(payload["intervals"])
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            # User and slot are resolved once for the whole batch
+            cursor.execute(
+                "SELECT user_id FROM users WHERE username = %s",
+                (payload["username"].strip(),),
+            )
+            user = cursor.fetchone()
+            if not user:
+                raise BadRequest("Username not found.")
+
+            cursor.execute(
+                "SELECT slot_id, slot_name FROM parking_slots WHERE slot_name = %s",
+                (payload["slot_name"].strip(),),
             )
             slot = cursor.fetchone()
-            
             if slot is None:
                 raise BadRequest("Slot does not exist.")
-            if not slot["is_available"]:
-                raise BadRequest("Slot already occupied for this time period.")
 
-            try:
-                # Create booking
-                cursor.execute(
-                    """
-                    INSERT INTO bookings (
-                        user_id, slot_id, entry_date, entry_time, exit_date, exit_time
-                    ) VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        user["user_id"],
-                        slot["slot_id"],
-                        payload["entry_date"],
-                        payload["entry_time"],
-                        payload["exit_date"],
-                        payload["exit_time"],
-                    ),
-                )
-                conn.commit()
-            except pymysql.err.IntegrityError:
-                conn.rollback()
-                raise BadRequest("Booking conflicts with an existing reservation.")
+        try:
+            accepted = commit_batch(
+                conn, slot_locks, user["user_id"], slot["slot_id"], intervals,
+                all_or_nothing=bool(payload.get("all_or_nothing")),
+            )
+        except BookingConflict as conflict:
+            booking_conflicts.inc("api_dashboard_batch_booking", conflict.reason)
+            raise BadRequest("A booking for one of these start times was made concurrently. Please retry.")
     finally:
         conn.close()
 
-    return jsonify({"status": "ok", "message": "Booking created successfully"})
+    rejected = sum(1 for interval in intervals if interval.reason in ("occupied", "overlaps_batch"))
+    if rejected:
+        booking_conflicts.inc("api_dashboard_batch_booking", "database", amount=rejected)
+    duplicates = sum(1 for interval in intervals if interval.reason == "constraint")
+    if duplicates:
+        booking_conflicts.inc("api_dashboard_batch_booking", "constraint", amount=duplicates)
+    for interval in accepted:
+        booking_events.publish(
+            BookingChange("created", interval.booking_id, slot["slot_id"], interval.entry_ts, interval.exit_ts)
+        )
+    return jsonify({
+        "status": "ok",
+        "slot_name": slot["slot_name"],
+        "accepted": len(accepted),
+        "rejected": len(intervals) - len(accepted),
+        "results": [interval.as_dict() for interval in intervals],
+    })
+
+
+# this is used by the cancel routes to load a booking together with its window
+BOOKING_WINDOW_SQL = """
+    SELECT
+        booking_id,
+        user_id,
+        slot_id,
+        status,
+        entry_ts,
+        exit_ts
+    FROM bookings
+    WHERE booking_id = %s
+"""
+
+
+def publish_cancelled(booking):
+    """Announce a committed cancellation of a booking that was still active."""
+    if booking["status"] == "active":
+        booking_events.publish(
+            BookingChange(
+                "cancelled",
+                booking["booking_id"],
+                booking["slot_id"],
+                booking["entry_ts"],
+                booking["exit_ts"],
+            )
+        )
 
 
 @app.route("/api/dashboard/bookings/<int:booking_id>", methods=["DELETE"])
@@ -1158,10 +1499,7 @@ def api_dashboard_delete_booking(booking_id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute(
-                "SELECT booking_id, slot_id FROM bookings WHERE booking_id = %s",
-                (booking_id,),
-            )
+            cursor.execute(BOOKING_WINDOW_SQL, (booking_id,))
             booking = cursor.fetchone()
             if not booking:
                 return jsonify({"error": "Booking not found"}), 404
@@ -1179,6 +1517,7 @@ def api_dashboard_delete_booking(booking_id):
     finally:
         conn.close()
 
+    publish_cancelled(booking)
     return jsonify({"status": "ok", "message": "Booking cancelled successfully"})
 
 
@@ -1190,10 +1529,7 @@ def api_dashboard_cancel_booking(booking_id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute(
-                "SELECT booking_id, slot_id FROM bookings WHERE booking_id = %s",
-                (booking_id,),
-            )
+            cursor.execute(BOOKING_WINDOW_SQL, (booking_id,))
             booking = cursor.fetchone()
             if not booking:
                 return jsonify({"error": "Booking not found"}), 404
@@ -1211,6 +1547,7 @@ def api_dashboard_cancel_booking(booking_id):
     finally:
         conn.close()
 
+    publish_cancelled(booking)
     return jsonify({"status": "ok", "message": "Booking cancelled successfully"})
 
 
@@ -1227,10 +1564,7 @@ def cancel_user_booking(booking_id):
     try:
         with conn.cursor() as cursor:
             # Verify booking exists and belongs to the user
-            cursor.execute(
-                "SELECT booking_id, user_id, slot_id FROM bookings WHERE booking_id = %s",
-                (booking_id,),
-            )
+            cursor.execute(BOOKING_WINDOW_SQL, (booking_id,))
             booking = cursor.fetchone()
             
             if not booking:
@@ -1247,6 +1581,7 @@ def cancel_user_booking(booking_id):
             )
             conn.commit()
             
+            publish_cancelled(booking)
             return jsonify({"status": "ok", "message": "Booking cancelled successfully"})
     except Exception as e:
         try:
@@ -1275,104 +1610,66 @@ def api_check_availability():
 
     if not all([entry_date, entry_time, exit_date, exit_time]):
         return jsonify({"error": "Missing required fields"}), 400
+    try:
+        entry_ts = to_datetime(entry_date, entry_time)
+        exit_ts = to_datetime(exit_date, exit_time)
+    except ValueError:
+        return jsonify({"error": "Invalid date or time format"}), 400
 
+    token = availability_cache.token()
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Get all slots with their booking status for the requested time period
-            cursor.execute(
-                """
-                SELECT 
-                    ps.slot_id,
-                    ps.slot_name,
-                    ps.is_available,
-                    CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM bookings b
-                            WHERE b.slot_id = ps.slot_id
-                              AND b.status = 'active'
-                              AND (
-                                -- Check for time overlap
-                                (TIMESTAMP(%s, %s) < TIMESTAMP(b.exit_date, b.exit_time) 
-                                 AND TIMESTAMP(%s, %s) > TIMESTAMP(b.entry_date, b.entry_time))
-                              )
-                        ) THEN 0
-                        ELSE 1
-                    END as available_for_period,
-                    (
-                        SELECT CASE
-                            WHEN TIMESTAMP(b.entry_date, b.entry_time) <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
-                                 AND NOW() <= TIMESTAMP(b.exit_date, b.exit_time)
-                            THEN 'occupied'
-                            WHEN TIMESTAMP(b.entry_date, b.entry_time) > DATE_ADD(NOW(), INTERVAL 15 MINUTE)
-                            THEN 'reserved'
-                            ELSE NULL
-                        END
-                        FROM bookings b
-                        WHERE b.slot_id = ps.slot_id
-                          AND b.status = 'active'
-                          AND (
-                            (TIMESTAMP(b.entry_date, b.entry_time) <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
-                             AND NOW() <= TIMESTAMP(b.exit_date, b.exit_time))
-                            OR
-                            (TIMESTAMP(b.entry_date, b.entry_time) > DATE_ADD(NOW(), INTERVAL 15 MINUTE))
-                          )
-                        ORDER BY b.entry_date, b.entry_time
-                        LIMIT 1
-                    ) as current_state
-                FROM parking_slots ps
-                ORDER BY ps.slot_name
-                """,
-                (entry_date, entry_time, exit_date, exit_time),
-            )
-            slots = cursor.fetchall()
+            # Cached answers (and their ETags) are only reused at the same bookings version
+            version = fetch_bookings_version(cursor)
+            cached = availability_cache.get(entry_ts, exit_ts, version)
+            if cached is not None:
+                return json_with_etag(*cached)
+            index = get_booking_index(version)
+            if index is not None and index.version == version:
+                # Answer from the in-memory interval index; only the slot list comes from MySQL
+                cursor.execute("SELECT slot_id, slot_name FROM parking_slots ORDER BY slot_name")
+                rows = mark_busy(cursor.fetchall(), index.conflicting_slots(entry_ts, exit_ts))
+            else:
+                # Single range scan + anti-join over all slots (also while the index
+                # has not caught up with writes made since it was loaded)
+                rows = fetch_availability(cursor, entry_ts, exit_ts)
+    finally:
+        conn.close()
 
-            # Format response based on availability for the REQUESTED period
-            slot_list = []
-            for s in slots:
-                # The state should reflect availability for the requested time period
-                # NOT the current state
-                if s["available_for_period"]:
-                    state = "available"  # Available for the requested period
-                else:
-                    state = "occupied"  # Not available (conflict with requested period)
-
-                slot_list.append(
-                    {
-                        "slot_id": s["slot_id"],
-                        "slot_name": s["slot_name"],
-                        "is_available": s["available_for_period"],
-                        "state": state,
-                    }
-                )
+    body, etag = availability_cache.put(entry_ts, exit_ts, build_availability_payload(rows), token, version)
+    return json_with_etag(body, etag)
 
-            # Calculate KPIs
-            total = len(slot_list)
-            available = sum(1 for s in slot_list if s["state"] == "available")
-            occupied = sum(1 for s in slot_list if s["state"] == "occupied")
-            reserved = sum(1 for s in slot_list if s["state"] == "reserved")
-
-            return jsonify(
-                {
-                    "slots": slot_list,
-                    "kpis": {
-                        "total": total,
-                        "available": available,
-                        "occupied": occupied,
-                        "reserved": reserved,
-                    },
-                }
-            )
+
+@app.route("/api/search-availability", methods=["POST"])
+def api_search_availability():
+    """
+    Earliest free windows of `duration_minutes` per slot within a search range, so the
+    booking page can suggest a time instead of trying windows one by one.
+    """
+    if "user_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        search = parse_window_search(request.get_json() or {}, datetime.now())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            version = fetch_bookings_version(cursor)
+            cursor.execute(SEARCH_SLOTS_SQL)
+            slots = filter_search_slots(cursor.fetchall(), search["slot_names"], search["location"])
+            index = get_booking_index(version)
+            if index is not None and index.version == version:
+                busy = index.busy_intervals(search["start"], search["end"])
+            else:
+                busy = fetch_busy_intervals(cursor, search["start"], search["end"])
     finally:
         conn.close()
 
-
-# Run Flask development server when script is executed directly
-# debug=True enables auto-reload and detailed error pages (disable in production)
-if __name__ == "__main__":
-    import os
-    port = int(os.environ.get("PORT", 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    return jsonify(build_window_search_payload(slots, busy, search))
 
 
 # Utility admin endpoint to rename slots from A1-A10 to P1-P10
@@ -1399,6 +1696,9 @@ def api_admin_rename_slots_A_to_P():
                 cursor.execute("UPDATE parking_slots SET slot_name = %s WHERE slot_id = %s", (new, row["slot_id"]))
                 renamed.append({"from": old, "to": new})
             conn.commit()
+            if renamed:
+                availability_cache.invalidate_slots()
+                dashboard_cache.invalidate()
     except Exception as e:
         try:
             conn.rollback()
@@ -1411,4 +1711,12 @@ def api_admin_rename_slots_A_to_P():
     return jsonify({"status": "ok", "renamed": renamed})
 
 
-
+# Run Flask development server when script is executed directly
+# debug=True enables auto-reload and detailed error pages (disable in production)
+if __name__ == "__main__":
+    import os
+    # The single-process dev server applies pending migrations itself
+    run_migrations()
+    start_worker()
+    port = int(os.environ.get("PORT", 5000))
+    app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,415 @@
+"""
+asyncio serving path for the read-only availability and dashboard APIs.
+
+A plain ASGI application answering the same URLs, with the same JSON, as the Flask
+routes in app.py, and running the same SQL (availability.py, slot_state.py) through
+an async pool (async_db.py). A request waiting on the database holds a coroutine
+instead of a worker thread, so one process can keep thousands of availability
+checks and dashboard streams in flight:
+
+    POST /api/check-availability
+    POST /api/search-availability
+    GET  /api/dashboard/slots              (?format=compact, ?since=<version>)
+    GET  /api/dashboard/stream
+
+Sessions are the Flask app's signed cookies (same FLASK_SECRET_KEY), so a reverse
+proxy can route just these paths here and everything else to gunicorn:
+
+    uvicorn async_api:app --host 0.0.0.0 --port 5001 --workers 2
+
+This module does not import app.py: no migrations check, no scheduler, no hashing
+pool; it only reads. Identical concurrent queries are coalesced into one round trip,
+and responses carry the same ETags as the Flask routes (bookings_version.py).
+"""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pymysql
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+
+from async_db import AsyncMySQLPool, AsyncSQLitePool
+from availability import (
+    AVAILABILITY_SQL,
+    BUSY_INTERVALS_SQL,
+    SEARCH_SLOTS_SQL,
+    build_availability_payload,
+    build_window_search_payload,
+    filter_search_slots,
+    parse_window_search,
+)
+from availability_cache import AvailabilityCache
+from booking_index import to_datetime
+from bookings_version import BOOKINGS_VERSION_SQL, SlotsValidator, encode_json
+from compression import choose_encoding, compress
+from slot_changes import SlotChangeLog
+from slot_state import COMPACT_SLOTS_MEDIA_TYPE, SLOT_STATE_SQL, build_compact_slot_payload, build_slot_payload
+from slot_stream import AsyncSlotBroadcaster, next_transition
+
+# this is the same storage configuration app.py reads
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "parking.sqlite3")
+MYSQL_CONFIG = {
+    "host": os.getenv("MYSQL_HOST", "127.0.0.1"),
+    "port": int(os.getenv("MYSQL_PORT", 3306)),
+    "user": os.getenv("MYSQL_USER", "root"),
+    "password": os.getenv("MYSQL_PASSWORD", ""),
+    "database": os.getenv("MYSQL_DATABASE", "parking_slots"),
+}
+if os.getenv("MYSQL_UNIX_SOCKET"):
+    MYSQL_CONFIG["unix_socket"] = os.getenv("MYSQL_UNIX_SOCKET")
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", 10))
+# this is the same response compression app.py applies
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "1") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", 5))
+
+# this is used only to verify the Flask session cookie (same secret and lifetime as app.py)
+_session_app = Flask(__name__)
+_session_app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
+_session_app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=30)
+_session_serializer = SecureCookieSessionInterface().get_signing_serializer(_session_app)
+_session_max_age = int(_session_app.permanent_session_lifetime.total_seconds())
+SESSION_COOKIE = _session_app.config["SESSION_COOKIE_NAME"]
+
+availability_cache = AvailabilityCache(
+    max_entries=int(os.getenv("AVAILABILITY_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("AVAILABILITY_CACHE_TTL", 5)),
+)
+
+
+def load_session(headers: Dict[bytes, bytes]) -> Dict:
+    """Decode the Flask session from the request's Cookie header ({} if absent or forged)."""
+    cookie = SimpleCookie()
+    try:
+        cookie.load(headers.get(b"cookie", b"").decode("latin-1"))
+    except Exception:
+        return {}
+    morsel = cookie.get(SESSION_COOKIE)
+    if morsel is None:
+        return {}
+    try:
+        return _session_serializer.loads(morsel.value, max_age=_session_max_age)
+    except BadSignature:
+        return {}
+
+
+class SingleFlight:
+    """Coalesce concurrent identical loads: callers with the same key await one task."""
+
+    def __init__(self):
+        self._inflight: Dict[object, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key, load: Callable[[], Awaitable]):
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(load())
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+class AsyncReadAPI:
+    """The ASGI application (see module docstring)."""
+
+    def __init__(self):
+        self.pool = None
+        self.flights = SingleFlight()
+        self.slots_validator = SlotsValidator()
+        self.slot_changes = SlotChangeLog(capacity=int(os.getenv("SLOT_CHANGE_LOG_SIZE", 256)))
+        self.broadcaster = AsyncSlotBroadcaster(
+            self.load_slot_states,
+            refresh_interval=float(os.getenv("SLOT_STREAM_REFRESH", 5)),
+        )
+        self.routes = {
+            ("POST", "/api/check-availability"): self.check_availability,
+            ("POST", "/api/search-availability"): self.search_availability,
+            ("GET", "/api/dashboard/slots"): self.dashboard_slots,
+            ("GET", "/api/dashboard/stream"): self.dashboard_stream,
+            ("GET", "/api/async/stats"): self.async_stats,
+        }
+
+    async def startup(self):
+        if DB_BACKEND == "sqlite":
+            self.pool = AsyncSQLitePool(
+                SQLITE_PATH, size=ASYNC_POOL_SIZE,
+                mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+            )
+        else:
+            self.pool = AsyncMySQLPool(MYSQL_CONFIG, maxsize=ASYNC_POOL_SIZE)
+        await self.pool.open()
+
+    async def shutdown(self):
+        await self.broadcaster.stop()
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def load_slot_states(self) -> List[Dict]:
+        return await self.flights.do("slot_states", lambda: self.pool.fetchall(SLOT_STATE_SQL))
+
+    async def load_version(self) -> int:
+        # Never coalesced: a shared read could predate a commit this request must see
+        rows = await self.pool.fetchall(BOOKINGS_VERSION_SQL)
+        return rows[0]["version"] if rows else 0
+
+    async def _versioned_slot_states(self):
+        # Version first, so the rows are at least as new as the version they are stored under
+        version = await self.load_version()
+        return version, await self.pool.fetchall(SLOT_STATE_SQL)
+
+    # ---------------------------
+    # Routes
+    # ---------------------------
+    async def check_availability(self, session, body, send, headers, query):
+        if "user_id" not in session:
+            return await send_json(send, 401, {"error": "Unauthorized"})
+        try:
+            data = json.loads(body or b"{}") or {}
+        except ValueError:
+            data = {}
+        fields = [data.get(name) for name in ("entry_date", "entry_time", "exit_date", "exit_time")]
+        if not all(fields):
+            return await send_json(send, 400, {"error": "Missing required fields"})
+        try:
+            entry_ts = to_datetime(fields[0], fields[1])
+            exit_ts = to_datetime(fields[2], fields[3])
+        except ValueError:
+            return await send_json(send, 400, {"error": "Invalid date or time format"})
+
+        token = availability_cache.token()
+        version = await self.load_version()
+        cached = availability_cache.get(entry_ts, exit_ts, version)
+        if cached is not None:
+            return await send_json_with_etag(send, headers, *cached)
+        rows = await self.flights.do(
+            ("availability", entry_ts, exit_ts, version),
+            lambda: self.pool.fetchall(AVAILABILITY_SQL, (entry_ts, exit_ts)),
+        )
+        body, etag = availability_cache.put(entry_ts, exit_ts, build_availability_payload(rows), token, version)
+        await send_json_with_etag(send, headers, body, etag)
+
+    async def search_availability(self, session, body, send, headers, query):
+        if "user_id" not in session:
+            return await send_json(send, 401, {"error": "Unauthorized"})
+        try:
+            data = json.loads(body or b"{}") or {}
+        except ValueError:
+            data = {}
+        try:
+            search = parse_window_search(data, datetime.now())
+        except ValueError as e:
+            return await send_json(send, 400, {"error": str(e)})
+        slots, rows = await asyncio.gather(
+            self.pool.fetchall(SEARCH_SLOTS_SQL),
+            self.pool.fetchall(BUSY_INTERVALS_SQL, (search["start"], search["end"])),
+        )
+        busy = {}
+        for row in rows:
+            busy.setdefault(row["slot_id"], []).append((row["entry_ts"], row["exit_ts"]))
+        payload = build_window_search_payload(
+            filter_search_slots(slots, search["slot_names"], search["location"]), busy, search
+        )
+        await send_compressed(send, headers, 200, encode_json(payload), b"application/json", [])
+
+    async def dashboard_slots(self, session, body, send, headers, query):
+        if session.get("role") != "admin" or "user_id" not in session:
+            return await send_json(send, 401, {"error": "Unauthorized"})
+        if query.get("since"):
+            return await self.dashboard_slot_changes(headers, query["since"][0], send)
+        fmt = "compact" if wants_compact_slots(query, headers) else "full"
+        etag = self.slots_validator.current(await self.load_version(), datetime.now(), fmt)
+        if etag is not None and client_has_etag(headers, etag):
+            return await send_json_with_etag(send, headers, None, etag, vary=b"Accept")
+        version, rows = await self.flights.do("versioned_slot_states", self._versioned_slot_states)
+        valid_until = next_transition(rows, datetime.now())
+        payload = None
+        if not self.slot_changes.fresh(version, datetime.now()):
+            payload = build_slot_payload(rows)
+            self.slot_changes.record(version, payload, valid_until)
+        if fmt == "compact":
+            body = encode_json(build_compact_slot_payload(rows))
+        else:
+            body = encode_json(payload or build_slot_payload(rows))
+        etag = self.slots_validator.store(version, body, valid_until, fmt)
+        content_type = COMPACT_SLOTS_MEDIA_TYPE.encode() if fmt == "compact" else b"application/json"
+        await send_json_with_etag(send, headers, body, etag, content_type, vary=b"Accept")
+
+    async def dashboard_slot_changes(self, headers, since, send):
+        """Same as app.api_dashboard_slots with ?since=: the slots changed since that version."""
+        try:
+            since = int(since)
+        except ValueError:
+            return await send_json(send, 400, {"error": "since must be a version number"})
+        version = await self.load_version()
+        if not self.slot_changes.fresh(version, datetime.now()):
+            version, rows = await self.flights.do("versioned_slot_states", self._versioned_slot_states)
+            if not self.slot_changes.fresh(version, datetime.now()):
+                self.slot_changes.record(version, build_slot_payload(rows), next_transition(rows, datetime.now()))
+        body = encode_json(self.slot_changes.delta(since))
+        await send_compressed(send, headers, 200, body, b"application/json", [(b"cache-control", b"no-store")])
+
+    async def dashboard_stream(self, session, body, send, headers, query):
+        if session.get("role") != "admin" or "user_id" not in session:
+            return await send_json(send, 401, {"error": "Unauthorized"})
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        q = self.broadcaster.subscribe()
+        async for chunk in self.broadcaster.stream(q):
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def async_stats(self, session, body, send, headers, query):
+        if session.get("role") != "admin" or "user_id" not in session:
+            return await send_json(send, 401, {"error": "Unauthorized - Admin access required"})
+        await send_json(send, 200, {
+            "db_pool": self.pool.stats(),
+            "availability_cache": availability_cache.stats(),
+            "coalesced_queries": self.flights.coalesced,
+            "slot_stream": self.broadcaster.stats(),
+            "slots_validator": self.slots_validator.stats(),
+            "slot_changes": self.slot_changes.stats(),
+        })
+
+    # ---------------------------
+    # ASGI plumbing
+    # ---------------------------
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        handler = self.routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            return await send_json(send, 404, {"error": "Not found"})
+        body = await read_body(receive)
+        headers = dict(scope["headers"])
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        session = load_session(headers)
+        if scope["path"] == "/api/dashboard/stream":
+            # Returns when the client goes away or the broadcaster drops a slow consumer
+            stream = asyncio.ensure_future(handler(session, body, send, headers, query))
+            disconnect = asyncio.ensure_future(wait_disconnect(receive))
+            await asyncio.wait({stream, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            for task in (stream, disconnect):
+                task.cancel()
+            return
+        try:
+            await handler(session, body, send, headers, query)
+        except pymysql.err.Error:
+            await send_json(send, 503, {"error": "Database unavailable"})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def send_json(send, status: int, data, headers: Optional[List] = None):
+    await send_body(send, status, encode_json(data), b"application/json", headers)
+
+
+async def send_body(send, status: int, body: bytes, content_type: bytes, headers: Optional[List] = None):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]
+        + (headers or []),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def client_has_etag(headers: Dict[bytes, bytes], etag: str) -> bool:
+    return parse_etags(headers.get(b"if-none-match", b"").decode("latin-1") or None).contains_weak(etag)
+
+
+def wants_compact_slots(query: Dict[str, List[str]], headers: Dict[bytes, bytes]) -> bool:
+    """Same negotiation as app.wants_compact_slots (?format=compact or the Accept header)."""
+    if query.get("format"):
+        return query["format"][0] == "compact"
+    accept = parse_accept_header(headers.get(b"accept", b"").decode("latin-1") or None, MIMEAccept)
+    return accept.best_match(["application/json", COMPACT_SLOTS_MEDIA_TYPE]) == COMPACT_SLOTS_MEDIA_TYPE
+
+
+async def send_json_with_etag(send, headers: Dict[bytes, bytes], body: Optional[bytes], etag: str,
+                              content_type: bytes = b"application/json", vary: bytes = b""):
+    """
+    Same as app.json_with_etag (plus its compression hook): the encoded body with its
+    ETag, or 304 if the client holds it.
+    """
+    response_headers = [(b"etag", f'"{etag}"'.encode()), (b"cache-control", b"private, no-cache")]
+    if client_has_etag(headers, etag):
+        if vary:
+            response_headers.append((b"vary", vary))
+        await send({"type": "http.response.start", "status": 304, "headers": response_headers})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    await send_compressed(send, headers, 200, body, content_type, response_headers, vary)
+
+
+async def send_compressed(send, headers: Dict[bytes, bytes], status: int, body: bytes, content_type: bytes,
+                          response_headers: List, vary: bytes = b""):
+    """send_body behind app._compress_response's rules (ETags become weak when compressed)."""
+    if RESPONSE_COMPRESSION:
+        vary = vary + b", Accept-Encoding" if vary else b"Accept-Encoding"
+        encoding = choose_encoding(parse_accept_header(headers.get(b"accept-encoding", b"").decode("latin-1") or None))
+        if encoding is not None and len(body) >= COMPRESSION_MIN_SIZE:
+            body = compress(body, encoding, COMPRESSION_LEVEL)
+            response_headers = [
+                (name, b"W/" + value) if name == b"etag" else (name, value) for name, value in response_headers
+            ]
+            response_headers.append((b"content-encoding", encoding.encode()))
+    if vary:
+        response_headers.append((b"vary", vary))
+    await send_body(send, status, body, content_type, response_headers)
+
+
+# this is the ASGI entry point: uvicorn async_api:app
+app = AsyncReadAPI()
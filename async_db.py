@@ -0,0 +1,102 @@
+"""
+Async connection pools for the asyncio read API (async_api.py).
+
+Both pools expose the same small surface, `await pool.fetchall(sql, args)` returning
+dict rows, so the same SQL constants the Flask app runs (availability.py,
+slot_state.py) work unchanged:
+
+    AsyncMySQLPool   aiomysql pool (optional dependency: pip install aiomysql)
+    AsyncSQLitePool  sqlite_backend connections, each driven by its own thread, so
+                     `size` threads serve any number of waiting coroutines
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import sqlite_backend
+
+
+class AsyncSQLitePool:
+    """Fixed set of SQLite connections; a coroutine waits for a free one instead of a thread."""
+
+    def __init__(self, path: str, size: int = 4, mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self.size = max(1, int(size))
+        self.mmap_size = mmap_size
+        self._free: Optional[asyncio.Queue] = None
+        self._workers: List = []
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._free = asyncio.Queue()
+        for n in range(self.size):
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"async-sqlite-{n}")
+            conn = await loop.run_in_executor(
+                executor, lambda: sqlite_backend.connect(self.path, mmap_size=self.mmap_size)
+            )
+            self._workers.append((executor, conn))
+            self._free.put_nowait((executor, conn))
+
+    @staticmethod
+    def _query(conn, sql, args):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+        finally:
+            # End the implicit read transaction so the next query sees new commits
+            conn.rollback()
+
+    async def fetchall(self, sql: str, args=None) -> List[Dict]:
+        executor, conn = await self._free.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, self._query, conn, sql, args)
+        finally:
+            self._free.put_nowait((executor, conn))
+
+    async def close(self):
+        for executor, conn in self._workers:
+            executor.submit(conn.close).result()
+            executor.shutdown(wait=False)
+        self._workers = []
+
+    def stats(self) -> Dict:
+        return {"backend": "sqlite", "size": self.size, "idle": self._free.qsize() if self._free else 0}
+
+
+class AsyncMySQLPool:
+    """aiomysql pool with dict rows and autocommit (reads always see the latest commit)."""
+
+    def __init__(self, config: Dict, minsize: int = 1, maxsize: int = 10):
+        self.config = config
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self._pool = None
+
+    async def open(self):
+        try:
+            import aiomysql
+        except ImportError:
+            raise RuntimeError("the async API on MySQL needs aiomysql: pip install aiomysql")
+        config = {key: value for key, value in self.config.items() if key not in ("cursorclass", "autocommit")}
+        config["db"] = config.pop("database")
+        self._pool = await aiomysql.create_pool(
+            minsize=self.minsize, maxsize=self.maxsize, autocommit=True,
+            cursorclass=aiomysql.DictCursor, **config,
+        )
+
+    async def fetchall(self, sql: str, args=None) -> List[Dict]:
+        async with self._pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, args)
+                return list(await cursor.fetchall())
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+
+    def stats(self) -> Dict:
+        if self._pool is None:
+            return {"backend": "mysql", "size": 0, "idle": 0}
+        return {"backend": "mysql", "size": self._pool.size, "idle": self._pool.freesize}
@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from booking_index import to_datetime
+
+# this is used to answer "which slots are free for [entry, exit)" in one round trip.
+# The derived table range-scans idx_status_exit_window (status, exit_ts, entry_ts, slot_id)
+# once for the whole lot: only bookings ending after the requested entry are read, the
+# index covers every column used, and the anti-join marks the conflicting slots.
+AVAILABILITY_SQL = """
+    SELECT
+        ps.slot_id,
+        ps.slot_name,
+        CASE WHEN busy.slot_id IS NULL THEN 1 ELSE 0 END AS is_available
+    FROM parking_slots ps
+    LEFT JOIN (
+        SELECT DISTINCT b.slot_id
+        FROM bookings b
+        WHERE b.status = 'active'
+          AND b.exit_ts > %s
+          AND b.entry_ts < %s
+    ) busy ON busy.slot_id = ps.slot_id
+    ORDER BY ps.slot_name
+"""
+
+
+# this is used to load the active bookings overlapping a search range, sorted per slot
+# (the same idx_status_exit_window range scan as AVAILABILITY_SQL)
+BUSY_INTERVALS_SQL = """
+    SELECT slot_id, entry_ts, exit_ts
+    FROM bookings
+    WHERE status = 'active'
+      AND exit_ts > %s
+      AND entry_ts < %s
+    ORDER BY slot_id, entry_ts
+"""
+
+# this is used to list the slots a window search can return (filtered by name/location)
+SEARCH_SLOTS_SQL = "SELECT slot_id, slot_name, location FROM parking_slots ORDER BY slot_name"
+
+MAX_SEARCH_DAYS = 31
+MAX_WINDOWS_PER_SLOT = 10
+
+
+def fetch_availability(cursor, entry_ts: datetime, exit_ts: datetime) -> List[Dict]:
+    """Return (slot_id, slot_name, is_available) for every slot for the requested window."""
+    cursor.execute(AVAILABILITY_SQL, (entry_ts, exit_ts))
+    return cursor.fetchall()
+
+
+def mark_busy(slots: Iterable[Dict], busy: Set[int]) -> List[Dict]:
+    """Turn a plain slot list plus a set of conflicting slot_ids into availability rows."""
+    return [
+        {
+            "slot_id": s["slot_id"],
+            "slot_name": s["slot_name"],
+            "is_available": 0 if s["slot_id"] in busy else 1,
+        }
+        for s in slots
+    ]
+
+
+def build_availability_payload(rows: Iterable[Dict]) -> Dict:
+    """Shape availability rows into the /api/check-availability JSON payload."""
+    slot_list = [
+        {
+            "slot_id": row["slot_id"],
+            "slot_name": row["slot_name"],
+            "is_available": row["is_available"],
+            "state": "available" if row["is_available"] else "occupied",
+        }
+        for row in rows
+    ]
+    available = sum(1 for s in slot_list if s["is_available"])
+    return {
+        "slots": slot_list,
+        "kpis": {
+            "total": len(slot_list),
+            "available": available,
+            "occupied": len(slot_list) - available,
+            "reserved": 0,
+        },
+    }
+
+
+def fetch_busy_intervals(cursor, start: datetime, end: datetime) -> Dict[int, List[Tuple[datetime, datetime]]]:
+    """Active booking intervals overlapping [start, end), sorted by entry per slot_id."""
+    cursor.execute(BUSY_INTERVALS_SQL, (start, end))
+    busy: Dict[int, List[Tuple[datetime, datetime]]] = {}
+    for row in cursor.fetchall():
+        busy.setdefault(row["slot_id"], []).append((row["entry_ts"], row["exit_ts"]))
+    return busy
+
+
+def parse_window_search(data: Dict, now: datetime) -> Dict:
+    """
+    Validate a window search request body; raises ValueError with the message to return.
+
+    duration_minutes is required; the range defaults to [now, now + 1 day) and starts no
+    earlier than now. limit is the number of windows per slot; slot_names and location
+    optionally narrow the slots searched.
+    """
+    try:
+        duration = int(data.get("duration_minutes") or 0)
+        limit = int(data.get("limit") or 3)
+    except (TypeError, ValueError):
+        raise ValueError("duration_minutes and limit must be whole numbers")
+    if duration <= 0:
+        raise ValueError("duration_minutes is required")
+    if not 1 <= limit <= MAX_WINDOWS_PER_SLOT:
+        raise ValueError(f"limit must be between 1 and {MAX_WINDOWS_PER_SLOT}")
+    try:
+        start = now
+        if data.get("from_date") and data.get("from_time"):
+            start = max(now, to_datetime(data["from_date"], data["from_time"]))
+        end = start + timedelta(days=1)
+        if data.get("to_date") and data.get("to_time"):
+            end = to_datetime(data["to_date"], data["to_time"])
+    except ValueError:
+        raise ValueError("Invalid date or time format")
+    if end <= start:
+        raise ValueError("The search range must end after it starts")
+    if end - start > timedelta(days=MAX_SEARCH_DAYS):
+        raise ValueError(f"The search range cannot exceed {MAX_SEARCH_DAYS} days")
+
+    # Bookings are made to the minute, so windows start on a whole minute
+    if start.second or start.microsecond:
+        start = start.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    slot_names = data.get("slot_names") or None
+    return {
+        "start": start,
+        "end": end,
+        "duration": timedelta(minutes=duration),
+        "limit": limit,
+        "slot_names": set(slot_names) if slot_names else None,
+        "location": (data.get("location") or "").strip().lower() or None,
+    }
+
+
+def filter_search_slots(slots: Iterable[Dict], slot_names: Optional[Set[str]], location: Optional[str]) -> List[Dict]:
+    """The slots matching the optional name list and location (case-insensitive substring)."""
+    return [
+        s for s in slots
+        if (slot_names is None or s["slot_name"] in slot_names)
+        and (location is None or location in (s.get("location") or "").lower())
+    ]
+
+
+def free_windows(
+    busy: Sequence[Tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+    limit: int,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    The earliest `limit` gaps of at least `duration` in [start, end), as (from, until).
+
+    One pass over the slot's busy intervals sorted by entry: a cursor tracks the end of
+    the busy time seen so far, and every gap before the next entry that fits `duration`
+    is a window. Overlapping (legacy) intervals just push the cursor further.
+    """
+    windows = []
+    cursor = start
+    for entry, exit_ in busy:
+        if min(entry, end) - cursor >= duration:
+            windows.append((cursor, min(entry, end)))
+            if len(windows) == limit:
+                return windows
+        if exit_ > cursor:
+            # Windows start on a whole minute, like the bookings themselves
+            cursor = exit_ if not exit_.second else exit_.replace(second=0) + timedelta(minutes=1)
+        if cursor >= end:
+            return windows
+    if end - cursor >= duration:
+        windows.append((cursor, end))
+    return windows
+
+
+def build_window_search_payload(
+    slots: Iterable[Dict], busy: Dict[int, Sequence[Tuple[datetime, datetime]]], search: Dict
+) -> Dict:
+    """Shape /api/search-availability: per slot, its earliest free windows (earliest slot first)."""
+    found = []
+    for slot in slots:
+        windows = free_windows(
+            busy.get(slot["slot_id"], ()), search["start"], search["end"], search["duration"], search["limit"]
+        )
+        if windows:
+            found.append((windows[0][0], slot["slot_name"], slot, windows))
+    found.sort(key=lambda item: item[:2])
+
+    results = [
+        {
+            "slot_id": slot["slot_id"],
+            "slot_name": slot["slot_name"],
+            "location": slot.get("location"),
+            "windows": [
+                {
+                    "entry_date": begin.strftime("%Y-%m-%d"),
+                    "entry_time": begin.strftime("%H:%M"),
+                    "exit_date": (begin + search["duration"]).strftime("%Y-%m-%d"),
+                    "exit_time": (begin + search["duration"]).strftime("%H:%M"),
+                    "free_until": until.strftime("%Y-%m-%d %H:%M"),
+                }
+                for begin, until in windows
+            ],
+        }
+        for _, _, slot, windows in found
+    ]
+    return {
+        "from": search["start"].strftime("%Y-%m-%d %H:%M"),
+        "to": search["end"].strftime("%Y-%m-%d %H:%M"),
+        "duration_minutes": int(search["duration"].total_seconds() // 60),
+        "slots": results,
+        "earliest": results[0] if results else None,
+    }
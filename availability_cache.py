@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from booking_events import BookingChange
+from bookings_version import body_etag, encode_json
+
+
+class AvailabilityCache:
+    """
+    Short-TTL LRU cache of /api/check-availability payloads.
+
+    Entries are keyed by (entry_ts, exit_ts, slot_set_version, bookings version) so
+    "08:00" and "08:00:00" share one entry, a change to the slot list orphans every
+    entry and so does any booking change committed by another process (the shared
+    counter in bookings_version.py). A committed booking change in this process also
+    evicts the cached windows that overlap it. Entries hold the encoded JSON body and
+    its ETag, so a hit is sent without serializing the payload again.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 5.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._slot_set_version = 0
+        # Bumped on every invalidation so in-flight computations can't cache stale results
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, entry_ts: datetime, exit_ts: datetime, version: int = 0) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) for the window at the given bookings version, or None."""
+        key = (entry_ts, exit_ts, self._slot_set_version, version)
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return item[1], item[2]
+
+    def token(self) -> tuple:
+        """Take before computing a payload; put() refuses it if anything was invalidated since."""
+        with self._lock:
+            return (self._slot_set_version, self._generation)
+
+    def put(self, entry_ts: datetime, exit_ts: datetime, payload: Dict, token: tuple,
+            version: int = 0) -> Tuple[bytes, str]:
+        """
+        Encode a payload and store it unless a write invalidated the cache while it was
+        being computed. Returns (body, etag) either way.
+        """
+        body = encode_json(payload)
+        etag = body_etag(body)
+        with self._lock:
+            if token != (self._slot_set_version, self._generation):
+                return body, etag
+            key = (entry_ts, exit_ts, self._slot_set_version, version)
+            self._entries[key] = (time.monotonic() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return body, etag
+
+    def invalidate_window(self, entry_ts: Optional[datetime], exit_ts: Optional[datetime]):
+        """Drop every cached window overlapping [entry_ts, exit_ts) (all of them if unknown)."""
+        with self._lock:
+            if entry_ts is None or exit_ts is None:
+                dropped = list(self._entries)
+            else:
+                dropped = [
+                    key for key in self._entries if key[0] < exit_ts and key[1] > entry_ts
+                ]
+            for key in dropped:
+                del self._entries[key]
+            self._generation += 1
+            self._invalidations += len(dropped)
+
+    def invalidate_slots(self):
+        """Call when parking_slots rows are added, renamed or removed."""
+        with self._lock:
+            self._slot_set_version += 1
+            self._generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def apply(self, change: BookingChange):
+        """booking_events listener: evict windows overlapping the changed booking."""
+        if change.kind == "started":
+            # Crossing the pre-entry boundary does not change availability
+            return
+        self.invalidate_window(change.entry_ts, change.exit_ts)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "slot_set_version": self._slot_set_version,
+            }
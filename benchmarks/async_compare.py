@@ -0,0 +1,252 @@
+"""
+Sync Flask route (gunicorn) vs the asyncio read API (async_api.py under uvicorn).
+
+For each server: start it on --port, open --streams dashboard SSE streams and keep
+them open, then let --clients concurrent keep-alive clients fire availability checks
+(random windows) and dashboard slot reads. Reports throughput, p50/p95/p99 and the
+requests that failed or took longer than --timeout, as JSON.
+
+The client is plain asyncio sockets, so thousands of concurrent connections cost
+the load generator almost nothing.
+
+    python benchmarks/async_compare.py --backend sqlite --clients 500 --streams 100
+    GUNICORN_WORKERS=2 python benchmarks/async_compare.py --servers sync,async --clients 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import percentile  # noqa: E402
+from seed_data import BENCH_ADMIN, prepare_database, seed  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "sync": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+    "async": [sys.executable, "-m", "uvicorn", "async_api:app", "--host", "127.0.0.1",
+              "--no-access-log", "--log-level", "warning"],
+}
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response (Content-Length or chunked body); returns the status."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    length, chunked = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        elif name.lower() == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status
+
+
+def build_request(method, path, port, cookie, body=b""):
+    head = (
+        f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nCookie: session={cookie}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+async def hold_stream(port, cookie, opened, stop):
+    """Open one SSE stream, wait for its first event, then keep it open until `stop`."""
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(build_request("GET", "/api/dashboard/stream", port, cookie))
+        await writer.drain()
+        while b"event:" not in await reader.readline():
+            pass
+        opened.append(1)
+        await stop.wait()
+        writer.close()
+    except (OSError, ConnectionError, ValueError):
+        pass
+
+
+async def client(port, cookie, requests, make_request, timeout, latencies, failures):
+    reader = writer = None
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+            writer.write(make_request())
+            await writer.drain()
+            status = await asyncio.wait_for(read_response(reader), timeout)
+            if status != 200:
+                failures.append(status)
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+        except (asyncio.TimeoutError, OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+            failures.append("timeout/error")
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(args, cookie):
+    rng = random.Random(7)
+    base = datetime.now().replace(minute=0, second=0, microsecond=0)
+    windows = []
+    for _ in range(1000):
+        start = base + timedelta(days=rng.randint(0, 20), minutes=15 * rng.randint(0, 95))
+        end = start + timedelta(minutes=15 * rng.randint(2, 16))
+        windows.append(json.dumps({
+            "entry_date": start.strftime("%Y-%m-%d"), "entry_time": start.strftime("%H:%M"),
+            "exit_date": end.strftime("%Y-%m-%d"), "exit_time": end.strftime("%H:%M"),
+        }).encode())
+
+    stop = asyncio.Event()
+    opened = []
+    streams = [asyncio.ensure_future(hold_stream(args.port, cookie, opened, stop)) for _ in range(args.streams)]
+    # Give the streams time to connect (or to queue up behind busy threads)
+    deadline = time.monotonic() + args.timeout
+    while len(opened) < args.streams and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+    scenarios = {
+        "check_availability": lambda: build_request(
+            "POST", "/api/check-availability", args.port, cookie, rng.choice(windows)
+        ),
+        "dashboard_slots": lambda: build_request("GET", "/api/dashboard/slots", args.port, cookie),
+    }
+    report = {"streams_requested": args.streams, "streams_open": len(opened)}
+    for name, make_request in scenarios.items():
+        latencies, failures = [], []
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            client(args.port, cookie, args.requests_per_client, make_request, args.timeout, latencies, failures)
+            for _ in range(args.clients)
+        ])
+        wall = time.perf_counter() - started
+        report[name] = {
+            "ok": len(latencies),
+            "failed": len(failures),
+            "throughput_rps": round(len(latencies) / wall, 1),
+            "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        }
+    stop.set()
+    for task in streams:
+        task.cancel()
+    return report
+
+
+def wait_for_port(port, timeout=60.0):
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not listen on port {port} within {timeout:.0f}s")
+
+
+def wait_for_port_free(port, timeout=60.0):
+    # gunicorn's workers can outlive the arbiter for a moment after SIGTERM
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                time.sleep(0.2)
+        except OSError:
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_async")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--port", type=int, default=5088)
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=500, help="concurrent keep-alive clients")
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    parser.add_argument("--streams", type=int, default=100, help="SSE streams held open during the run")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds before a request counts as failed")
+    parser.add_argument("--servers", default=",".join(SERVERS))
+    parser.add_argument("--server-log", default=os.devnull, help="append the servers' output here")
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    import app  # noqa: E402  (migrates the scratch database)
+
+    conn = app.open_db_connection()
+    try:
+        seed(conn, args.slots, args.users, args.bookings, random.Random(42))
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT user_id, username, full_name FROM users WHERE username = %s", (BENCH_ADMIN,))
+            admin = cursor.fetchone()
+    finally:
+        conn.close()
+    # A signed Flask session cookie, accepted by both servers (same FLASK_SECRET_KEY)
+    cookie = app.app.session_interface.get_signing_serializer(app.app).dumps(
+        dict(admin, role="admin")
+    )
+
+    env = dict(
+        os.environ, PORT=str(args.port), BOOKING_SCHEDULER_ENABLED="0", AUTO_MIGRATE="0",
+        GUNICORN_ACCESS_LOG="",
+    )
+    results = {}
+    for name in [s.strip() for s in args.servers.split(",") if s.strip()]:
+        command = SERVERS[name] + (["--port", str(args.port)] if name == "async" else [])
+        log = open(args.server_log, "a")
+        server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=log)
+        try:
+            wait_for_port(args.port)
+            results[name] = asyncio.run(run_load(args, cookie))
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+            log.close()
+            wait_for_port_free(args.port)
+
+    print(json.dumps({
+        "backend": args.backend,
+        "clients": args.clients,
+        "requests_per_client": args.requests_per_client,
+        "streams": args.streams,
+        "gunicorn": {
+            "workers": os.getenv("GUNICORN_WORKERS", "cpu*2+1"),
+            "threads": os.getenv("GUNICORN_THREADS", "8"),
+        },
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Compare the old and new /api/check-availability query plans on a seeded dataset.
+
+Seeds a scratch MySQL database (default: parking_bench) with 500 slots and 100k
+non-overlapping bookings (see seed_data.py), then times both queries over the
+same random windows and prints a JSON report (timings, EXPLAIN, result agreement).
+
+    python benchmarks/bench_availability.py --slots 500 --bookings 100000 --runs 50
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import prepare_database, seed  # noqa: E402
+
+# Query shipped before the availability engine: two correlated subqueries per slot,
+# TIMESTAMP() over every booking row (no index use), second column thrown away.
+OLD_AVAILABILITY_SQL = """
+    SELECT
+        ps.slot_id,
+        ps.slot_name,
+        ps.is_available,
+        CASE
+            WHEN EXISTS (
+                SELECT 1 FROM bookings b
+                WHERE b.slot_id = ps.slot_id
+                  AND b.status = 'active'
+                  AND (
+                    (TIMESTAMP(%s, %s) < TIMESTAMP(b.exit_date, b.exit_time)
+                     AND TIMESTAMP(%s, %s) > TIMESTAMP(b.entry_date, b.entry_time))
+                  )
+            ) THEN 0
+            ELSE 1
+        END as available_for_period,
+        (
+            SELECT CASE
+                WHEN TIMESTAMP(b.entry_date, b.entry_time) <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
+                     AND NOW() <= TIMESTAMP(b.exit_date, b.exit_time)
+                THEN 'occupied'
+                WHEN TIMESTAMP(b.entry_date, b.entry_time) > DATE_ADD(NOW(), INTERVAL 15 MINUTE)
+                THEN 'reserved'
+                ELSE NULL
+            END
+            FROM bookings b
+            WHERE b.slot_id = ps.slot_id
+              AND b.status = 'active'
+              AND (
+                (TIMESTAMP(b.entry_date, b.entry_time) <= DATE_ADD(NOW(), INTERVAL 15 MINUTE)
+                 AND NOW() <= TIMESTAMP(b.exit_date, b.exit_time))
+                OR
+                (TIMESTAMP(b.entry_date, b.entry_time) > DATE_ADD(NOW(), INTERVAL 15 MINUTE))
+              )
+            ORDER BY b.entry_date, b.entry_time
+            LIMIT 1
+        ) as current_state
+    FROM parking_slots ps
+    ORDER BY ps.slot_name
+"""
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def time_query(cursor, sql, params):
+    started = time.perf_counter()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    return (time.perf_counter() - started) * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_bench")
+    parser.add_argument("--slots", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    prepare_database(args.database)
+    import app  # noqa: E402  (migrates the scratch database)
+    from availability import AVAILABILITY_SQL
+
+    rng = random.Random(args.seed)
+    conn = pymysql.connect(**app.MYSQL_CONFIG)
+    try:
+        if not args.skip_seed:
+            seed(conn, args.slots, 1000, args.bookings, rng)
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE TABLE bookings")
+            cursor.fetchall()
+
+            today = datetime.now().replace(minute=0, second=0, microsecond=0)
+            windows = []
+            for _ in range(args.runs):
+                entry = today + timedelta(days=rng.randint(-30, 30), minutes=15 * rng.randint(0, 48))
+                windows.append((entry, entry + timedelta(minutes=15 * rng.randint(4, 36))))
+
+            old_ms, new_ms, mismatches = [], [], 0
+            for entry, exit_ in windows:
+                old_params = (entry.date(), entry.time(), exit_.date(), exit_.time())
+                elapsed, old_rows = time_query(cursor, OLD_AVAILABILITY_SQL, old_params)
+                old_ms.append(elapsed)
+                elapsed, new_rows = time_query(cursor, AVAILABILITY_SQL, (entry, exit_))
+                new_ms.append(elapsed)
+                old_map = {r["slot_id"]: r["available_for_period"] for r in old_rows}
+                new_map = {r["slot_id"]: r["is_available"] for r in new_rows}
+                mismatches += old_map != new_map
+
+            entry, exit_ = windows[0]
+            cursor.execute("EXPLAIN " + AVAILABILITY_SQL, (entry, exit_))
+            new_plan = cursor.fetchall()
+            cursor.execute(
+                "EXPLAIN " + OLD_AVAILABILITY_SQL,
+                (entry.date(), entry.time(), exit_.date(), exit_.time()),
+            )
+            old_plan = cursor.fetchall()
+    finally:
+        conn.close()
+
+    def summary(samples):
+        return {
+            "p50_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "max_ms": round(max(samples), 3),
+        }
+
+    report = {
+        "slots": args.slots,
+        "bookings": args.bookings,
+        "runs": args.runs,
+        "old": summary(old_ms),
+        "new": summary(new_ms),
+        "speedup_p50": round(statistics.median(old_ms) / max(statistics.median(new_ms), 1e-9), 2),
+        "result_mismatches": mismatches,
+        "explain": {
+            "old": [{k: r.get(k) for k in ("table", "type", "key", "rows")} for r in old_plan],
+            "new": [{k: r.get(k) for k in ("table", "type", "key", "rows")} for r in new_plan],
+        },
+    }
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Worker boot time: how long `import app` takes against an already-migrated database.
+
+Migrates a scratch database once, then imports app.py in --runs fresh interpreters
+(as a gunicorn worker would) with AUTO_MIGRATE=0, and reports the median/max import
+time next to the time a full migration run takes on an empty database. Exits non-zero
+when the median boot exceeds --max-ms, so it can gate a deploy.
+
+    python benchmarks/boot_time.py --backend sqlite --runs 10 --max-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import prepare_database  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child: time the import itself, not interpreter startup
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def import_ms(env):
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_boot")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=0, help="fail when the median boot exceeds this")
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    if args.backend == "sqlite" and os.path.exists(os.environ["SQLITE_PATH"]):
+        os.remove(os.environ["SQLITE_PATH"])
+    # Boots measured below must only check the version, never migrate
+    os.environ["AUTO_MIGRATE"] = "0"
+    env = dict(os.environ, BOOKING_SCHEDULER_ENABLED="0")
+    import app  # noqa: E402
+
+    started = time.perf_counter()
+    applied = app.run_migrations()
+    migrate_ms = (time.perf_counter() - started) * 1000
+
+    boots = [import_ms(env) for _ in range(args.runs)]
+    median = statistics.median(boots)
+    report = {
+        "backend": args.backend,
+        "migrations_applied": applied,
+        "full_migration_ms": round(migrate_ms, 1),
+        "runs": args.runs,
+        "boot_median_ms": round(median, 1),
+        "boot_max_ms": round(max(boots), 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.max_ms and median > args.max_ms:
+        sys.exit(f"median boot {median:.1f} ms exceeds --max-ms {args.max_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
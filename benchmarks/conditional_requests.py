@@ -0,0 +1,109 @@
+"""
+ETag revalidation: full responses vs 304 Not Modified on the slot and availability APIs.
+
+Seeds a scratch database, then for /api/dashboard/slots and /api/check-availability
+times --requests calls without a validator (full JSON) and --requests calls sending
+the ETag from the first response (304), through the Flask test client. Reports the
+median/p95 latency, bytes sent and how many slot-state queries ran, as JSON.
+
+    python benchmarks/conditional_requests.py --backend sqlite --slots 200 --bookings 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import percentile  # noqa: E402
+from seed_data import BENCH_ADMIN, prepare_database, seed  # noqa: E402
+
+
+def measure(call, requests):
+    latencies, sizes, statuses = [], [], set()
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = call()
+        latencies.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(response.data))
+        statuses.add(response.status_code)
+    return {
+        "status": sorted(statuses),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "bytes": round(statistics.mean(sizes)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_etag")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    os.environ["BOOKING_SCHEDULER_ENABLED"] = "0"
+    import app  # noqa: E402
+
+    conn = app.open_db_connection()
+    try:
+        seed(conn, args.slots, args.users, args.bookings, random.Random(42))
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT user_id, username, full_name FROM users WHERE username = %s", (BENCH_ADMIN,))
+            admin = cursor.fetchone()
+    finally:
+        conn.close()
+
+    slot_queries = {"count": 0}
+    fetch_slot_states = app.fetch_slot_states
+
+    def counting_fetch(cursor):
+        slot_queries["count"] += 1
+        return fetch_slot_states(cursor)
+
+    app.fetch_slot_states = counting_fetch
+
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(admin, role="admin")
+
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    window = {
+        "entry_date": start.strftime("%Y-%m-%d"), "entry_time": start.strftime("%H:%M"),
+        "exit_date": start.strftime("%Y-%m-%d"), "exit_time": (start + timedelta(hours=2)).strftime("%H:%M"),
+    }
+    endpoints = {
+        "dashboard_slots": lambda headers: client.get("/api/dashboard/slots", headers=headers),
+        "check_availability": lambda headers: client.post("/api/check-availability", json=window, headers=headers),
+    }
+
+    results = {}
+    for name, call in endpoints.items():
+        etag = call({}).headers["ETag"]
+        before = slot_queries["count"]
+        full = measure(lambda: call({}), args.requests)
+        full["slot_state_queries"] = slot_queries["count"] - before
+        before = slot_queries["count"]
+        revalidated = measure(lambda: call({"If-None-Match": etag}), args.requests)
+        revalidated["slot_state_queries"] = slot_queries["count"] - before
+        results[name] = {"full": full, "if_none_match": revalidated}
+
+    print(json.dumps({
+        "backend": args.backend,
+        "slots": args.slots,
+        "bookings": args.bookings,
+        "requests": args.requests,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Load test of the booking paths with throughput and p50/p95/p99 latency as JSON.
+
+Seeds a scratch database (see seed_data.py), then drives /booking,
+/api/check-availability, /api/dashboard/slots and the cancel routes from
+--concurrency threads, one scenario at a time. Two drivers:
+
+    testclient  in-process Flask test client (no network; default)
+    http        real HTTP against a running server (--url), e.g. gunicorn
+
+    python benchmarks/load_test.py --requests 2000 --concurrency 8 --output before.json
+    python benchmarks/load_test.py --driver http --url http://127.0.0.1:5000 --skip-seed
+
+Use --backend sqlite for an embedded database (no server, no network), or point
+MYSQL_UNIX_SOCKET at a local MySQL/MariaDB socket.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import BENCH_ADMIN, BENCH_PASSWORD, prepare_database, seed  # noqa: E402
+
+SCENARIOS = ("check_availability", "dashboard_slots", "booking", "cancel", "admin_cancel")
+
+
+class TestClientDriver:
+    """Flask test client with a session set directly (no password hashing per worker)."""
+
+    def __init__(self, app_module, user):
+        self._client = app_module.app.test_client()
+        with self._client.session_transaction() as sess:
+            sess["user_id"] = user["user_id"]
+            sess["username"] = user["username"]
+            sess["full_name"] = user["full_name"]
+            sess["role"] = user["role"]
+
+    def get(self, path):
+        return self._client.get(path).status_code
+
+    def post(self, path, form=None, json_body=None):
+        return self._client.post(path, data=form, json=json_body).status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpDriver:
+    """urllib client with its own cookie jar, logged in through POST /login."""
+
+    def __init__(self, base_url, user):
+        self._base = base_url.rstrip("/")
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+        status = self.post("/login", form={"username": user["username"], "password": BENCH_PASSWORD})
+        if status != 302:
+            raise RuntimeError(f"login as {user['username']} failed with HTTP {status}")
+
+    def _send(self, req):
+        try:
+            with self._opener.open(req, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def get(self, path):
+        return self._send(urllib.request.Request(self._base + path))
+
+    def post(self, path, form=None, json_body=None):
+        if json_body is not None:
+            body, ctype = json.dumps(json_body).encode(), "application/json"
+        else:
+            body, ctype = urllib.parse.urlencode(form or {}).encode(), "application/x-www-form-urlencoded"
+        return self._send(
+            urllib.request.Request(self._base + path, data=body, headers={"Content-Type": ctype})
+        )
+
+
+class Workload:
+    """Shared inputs for the scenarios: slot names, time windows and cancellable bookings."""
+
+    def __init__(self, conn, rng):
+        self.rng = rng
+        self._lock = threading.Lock()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT slot_name FROM parking_slots ORDER BY slot_name")
+            self.slot_names = [row["slot_name"] for row in cursor.fetchall()]
+            cursor.execute(
+                "SELECT user_id, username, full_name, role FROM users WHERE username LIKE 'bench%'"
+            )
+            users = cursor.fetchall()
+            cursor.execute(
+                "SELECT booking_id, user_id FROM bookings WHERE status = 'active' AND entry_ts > NOW()"
+            )
+            active = cursor.fetchall()
+        self.admin = next(u for u in users if u["username"] == BENCH_ADMIN)
+        by_user = {}
+        for row in active:
+            by_user.setdefault(row["user_id"], []).append(row["booking_id"])
+        # Workers log in as the users owning the most upcoming bookings, so "cancel" has work
+        self.users = sorted(
+            (u for u in users if u["role"] == "user"), key=lambda u: -len(by_user.get(u["user_id"], []))
+        )
+        self.own_bookings = by_user
+        self.admin_bookings = [row["booking_id"] for row in active]
+        rng.shuffle(self.admin_bookings)
+
+    def window(self):
+        with self._lock:
+            start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(
+                days=self.rng.randint(0, 20), minutes=15 * self.rng.randint(0, 95)
+            )
+            end = start + timedelta(minutes=15 * self.rng.randint(2, 16))
+            slot = self.rng.choice(self.slot_names)
+        return slot, start, end
+
+    def take_admin_booking(self):
+        with self._lock:
+            return self.admin_bookings.pop() if self.admin_bookings else None
+
+
+def _window_fields(start, end):
+    return {
+        "entry_date": start.strftime("%Y-%m-%d"),
+        "entry_time": start.strftime("%H:%M"),
+        "exit_date": end.strftime("%Y-%m-%d"),
+        "exit_time": end.strftime("%H:%M"),
+    }
+
+
+def run_request(scenario, worker, workload):
+    """Issue one request of `scenario`; returns the HTTP status (None = nothing to do)."""
+    if scenario == "check_availability":
+        _, start, end = workload.window()
+        return worker["user"].post("/api/check-availability", json_body=_window_fields(start, end))
+    if scenario == "dashboard_slots":
+        return worker["admin"].get("/api/dashboard/slots")
+    if scenario == "booking":
+        slot, start, end = workload.window()
+        form = dict(_window_fields(start, end), selected_space=slot, booking_type="reserve")
+        return worker["user"].post("/booking", form=form)
+    if scenario == "cancel":
+        if not worker["own_bookings"]:
+            return None
+        return worker["user"].post(f"/cancel-booking/{worker['own_bookings'].pop()}")
+    if scenario == "admin_cancel":
+        booking_id = workload.take_admin_booking()
+        if booking_id is None:
+            return None
+        return worker["admin"].post(f"/api/dashboard/bookings/{booking_id}/cancel")
+    raise ValueError(f"unknown scenario {scenario}")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_scenario(scenario, workers, workload, total_requests):
+    """Spread `total_requests` of one scenario over the workers; returns its summary."""
+    per_worker = [total_requests // len(workers) + (i < total_requests % len(workers))
+                  for i in range(len(workers))]
+
+    def drive(worker, count):
+        latencies, statuses = [], Counter()
+        for _ in range(count):
+            started = time.perf_counter()
+            status = run_request(scenario, worker, workload)
+            if status is None:
+                break
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+        return latencies, statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+        results = list(pool.map(drive, workers, per_worker))
+    wall = time.perf_counter() - started
+
+    latencies = [ms for result in results for ms in result[0]]
+    statuses = sum((result[1] for result in results), Counter())
+    if not latencies:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies),
+        "errors": sum(n for status, n in statuses.items() if status >= 500),
+        "status": {str(status): n for status, n in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_bench")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--driver", choices=("testclient", "http"), default="testclient")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="base URL for --driver http")
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    import app  # noqa: E402  (migrates the scratch database)
+
+    rng = random.Random(args.seed)
+    conn = app.open_db_connection()
+    try:
+        dataset = None
+        if not args.skip_seed:
+            dataset = seed(conn, args.slots, args.users, args.bookings, rng)
+            app.booking_index.load(conn)
+        workload = Workload(conn, rng)
+    finally:
+        conn.close()
+
+    def make_driver(user):
+        if args.driver == "http":
+            return HttpDriver(args.url, user)
+        return TestClientDriver(app, user)
+
+    workers = []
+    for i in range(max(1, args.concurrency)):
+        user = workload.users[i % len(workload.users)]
+        workers.append({
+            "user": make_driver(user),
+            "admin": make_driver(workload.admin),
+            "own_bookings": list(workload.own_bookings.get(user["user_id"], [])) if i < len(workload.users) else [],
+        })
+
+    report = {
+        "revision": git_revision(),
+        "driver": args.driver,
+        "backend": args.backend,
+        "concurrency": len(workers),
+        "requests_per_scenario": args.requests,
+        "dataset": dataset,
+        "scenarios": {},
+    }
+    for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        report["scenarios"][scenario] = run_scenario(scenario, workers, workload, args.requests)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
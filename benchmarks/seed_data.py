@@ -0,0 +1,152 @@
+"""
+Seeded data generator shared by the benchmarks.
+
+Creates a scratch database with the app's own schema (migrations are applied when app.py
+is imported, AUTO_MIGRATE=1) on a MySQL/MariaDB server or, with --backend sqlite, in an
+embedded SQLite file next to this script (no server, no network), and fills it with slots,
+users and non-overlapping bookings spread from `days_back` days ago to `days_ahead` days
+ahead. The same --seed gives the same data.
+
+    python benchmarks/seed_data.py --slots 200 --users 500 --bookings 20000
+    python benchmarks/seed_data.py --backend sqlite
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PASSWORD = "bench-password"
+BENCH_ADMIN = "benchadmin"
+
+
+def server_config():
+    """Connection settings for the MySQL/MariaDB server (TCP or local unix socket)."""
+    config = {
+        "host": os.getenv("MYSQL_HOST", "127.0.0.1"),
+        "port": int(os.getenv("MYSQL_PORT", 3306)),
+        "user": os.getenv("MYSQL_USER", "root"),
+        "password": os.getenv("MYSQL_PASSWORD", ""),
+    }
+    if os.getenv("MYSQL_UNIX_SOCKET"):
+        config["unix_socket"] = os.getenv("MYSQL_UNIX_SOCKET")
+    return config
+
+
+def prepare_database(name, backend="mysql"):
+    """Create the scratch database and point app.py's storage settings at it before import."""
+    if backend == "sqlite":
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.sqlite3")
+    else:
+        conn = pymysql.connect(**server_config())
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{name}`")
+        finally:
+            conn.close()
+        os.environ["MYSQL_DATABASE"] = name
+    # Scratch databases are migrated on import instead of via `flask migrate`
+    os.environ.setdefault("AUTO_MIGRATE", "1")
+    # Keep background completion from racing the benchmark's own writes
+    os.environ.setdefault("BOOKING_SCHEDULER_ENABLED", "0")
+
+
+def seed(conn, slots=500, users=1000, bookings=100000, rng=None, days_back=60, days_ahead=30):
+    """
+    Replace the benchmark rows with `slots` slots, `users` users (+ one admin) and about
+    `bookings` bookings. Bookings on a slot never overlap; past ones are 'completed',
+    ~5% are 'cancelled'. Returns a summary dict.
+    """
+    from werkzeug.security import generate_password_hash
+
+    rng = rng or random.Random(42)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    now = datetime.now()
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM bookings")
+        cursor.execute("DELETE FROM parking_slots")
+        cursor.execute("DELETE FROM users WHERE username LIKE 'bench%'")
+        cursor.executemany(
+            "INSERT INTO parking_slots (slot_name, location) VALUES (%s, %s)",
+            [(f"B{i:04d}", "Benchmark lot") for i in range(1, slots + 1)],
+        )
+        cursor.executemany(
+            "INSERT INTO users (username, full_name, password_hash, role) VALUES (%s, %s, %s, %s)",
+            [(f"bench{i}", f"Bench User {i}", password_hash, "user") for i in range(users)]
+            + [(BENCH_ADMIN, "Bench Admin", password_hash, "admin")],
+        )
+        cursor.execute("SELECT slot_id FROM parking_slots")
+        slot_ids = [row["slot_id"] for row in cursor.fetchall()]
+        cursor.execute("SELECT user_id FROM users WHERE username LIKE 'bench%' AND role = 'user'")
+        user_ids = [row["user_id"] for row in cursor.fetchall()]
+
+        per_slot = max(1, bookings // len(slot_ids))
+        origin = now.replace(minute=0, second=0, microsecond=0) - timedelta(days=days_back)
+        # Average step per booking so each slot's bookings span the whole range
+        step = (days_back + days_ahead) * 24 * 4 // per_slot
+        max_gap = max(0, 2 * (step - 9))
+        rows, total = [], 0
+        for slot_id in slot_ids:
+            cursor_ts = origin + timedelta(minutes=15 * rng.randint(0, 8))
+            for _ in range(per_slot):
+                start = cursor_ts + timedelta(minutes=15 * rng.randint(0, max_gap))
+                end = start + timedelta(minutes=15 * rng.randint(2, 16))
+                cursor_ts = end
+                if rng.random() < 0.05:
+                    status = "cancelled"
+                elif end < now:
+                    status = "completed"
+                else:
+                    status = "active"
+                rows.append((
+                    rng.choice(user_ids), slot_id,
+                    start.date(), start.time(), end.date(), end.time(), status,
+                ))
+                if len(rows) >= 5000:
+                    total += _insert_bookings(cursor, rows)
+                    rows = []
+        if rows:
+            total += _insert_bookings(cursor, rows)
+    conn.commit()
+    return {"slots": len(slot_ids), "users": len(user_ids), "bookings": total}
+
+
+def _insert_bookings(cursor, rows):
+    cursor.executemany(
+        """
+        INSERT INTO bookings (user_id, slot_id, entry_date, entry_time, exit_date, exit_time, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        rows,
+    )
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_bench")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--slots", type=int, default=500)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--days-back", type=int, default=60)
+    parser.add_argument("--days-ahead", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    import app  # noqa: E402  (migrates the scratch database)
+
+    conn = app.open_db_connection()
+    try:
+        summary = seed(conn, args.slots, args.users, args.bookings, random.Random(args.seed),
+                       args.days_back, args.days_ahead)
+    finally:
+        conn.close()
+    print(json.dumps(summary, indent=2))
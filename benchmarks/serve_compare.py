@@ -0,0 +1,124 @@
+"""
+Requests/sec on the booking path: Flask dev server vs gunicorn (gunicorn.conf.py).
+
+For each server: reseed the scratch database, start the server on --port, drive it
+with load_test.py's HTTP driver (real sockets, logged-in sessions) and stop it.
+Prints one JSON report with both runs side by side.
+
+    python benchmarks/serve_compare.py --backend sqlite --requests 2000 --concurrency 16
+    GUNICORN_WORKERS=4 GUNICORN_THREADS=8 python benchmarks/serve_compare.py
+
+Results from a run are recorded in DEPLOYMENT_GUIDE.md.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import prepare_database, seed  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SERVERS = {
+    "dev": [sys.executable, "app.py"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+}
+
+
+def wait_for_port(port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not listen on port {port} within {timeout:.0f}s")
+
+
+def run_server(name, args, env):
+    """Start one server, run the HTTP load test against it, stop it; returns load_test's report."""
+    log = open(args.server_log, "a")
+    server = subprocess.Popen(
+        SERVERS[name], cwd=ROOT, env=dict(env, PORT=str(args.port), GUNICORN_ACCESS_LOG=""),
+        stdout=log, stderr=log,
+    )
+    try:
+        wait_for_port(args.port)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+            report_path = out.name
+        subprocess.check_call(
+            [
+                sys.executable, os.path.join(HERE, "load_test.py"),
+                "--driver", "http", "--url", f"http://127.0.0.1:{args.port}", "--skip-seed",
+                "--database", args.database, "--backend", args.backend,
+                "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                "--scenarios", args.scenarios, "--output", report_path,
+            ],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        )
+        with open(report_path) as f:
+            report = json.load(f)
+        os.remove(report_path)
+        return report
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+        log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_serve")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default="check_availability,booking")
+    parser.add_argument("--servers", default=",".join(SERVERS))
+    parser.add_argument("--server-log", default=os.devnull, help="append the servers' output here")
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    import app  # noqa: E402  (migrates the scratch database)
+
+    env = dict(os.environ, BOOKING_SCHEDULER_ENABLED="0", AUTO_MIGRATE="0")
+    results = {}
+    for name in [s.strip() for s in args.servers.split(",") if s.strip()]:
+        # Same starting data for every server, since the booking scenario writes
+        conn = app.open_db_connection()
+        try:
+            seed(conn, args.slots, args.users, args.bookings, random.Random(42))
+        finally:
+            conn.close()
+        report = run_server(name, args, env)
+        results[name] = {
+            scenario: {key: summary.get(key) for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors")}
+            for scenario, summary in report["scenarios"].items()
+        }
+
+    print(json.dumps({
+        "backend": args.backend,
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "gunicorn": {
+            "workers": os.getenv("GUNICORN_WORKERS", "cpu*2+1"),
+            "threads": os.getenv("GUNICORN_THREADS", "8"),
+        },
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
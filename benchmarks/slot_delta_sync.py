@@ -0,0 +1,158 @@
+"""
+Polling /api/dashboard/slots: full payload every time vs ?since=<version> deltas.
+
+Seeds a scratch database with --slots slots, then runs --rounds polling rounds through
+the Flask test client. Each round books or cancels --changes slots (through a plain
+connection, like another worker would) and then has --pollers clients poll, once for
+the full list and once with the version from their last response. Reports bytes per
+poll, latency, how many slot-state queries ran, and whether every delta client ends
+up with exactly the full payload's slots, as JSON.
+
+    python benchmarks/slot_delta_sync.py --backend sqlite --slots 2000 --changes 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import percentile  # noqa: E402
+from seed_data import BENCH_ADMIN, prepare_database, seed  # noqa: E402
+
+
+def summarize(latencies, sizes):
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "bytes_per_poll": round(statistics.mean(sizes)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_delta")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--slots", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--pollers", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=5, help="slots booked/cancelled per round")
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    os.environ["BOOKING_SCHEDULER_ENABLED"] = "0"
+    import app  # noqa: E402
+
+    rng = random.Random(42)
+    conn = app.open_db_connection()
+    try:
+        seed(conn, args.slots, args.users, args.bookings, rng)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT user_id, username, full_name FROM users WHERE username = %s", (BENCH_ADMIN,))
+            admin = cursor.fetchone()
+            cursor.execute("SELECT slot_id FROM parking_slots")
+            slot_ids = [row["slot_id"] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    slot_queries = {"count": 0}
+    fetch_slot_states = app.fetch_slot_states
+
+    def counting_fetch(cursor):
+        slot_queries["count"] += 1
+        return fetch_slot_states(cursor)
+
+    app.fetch_slot_states = counting_fetch
+
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(admin, role="admin")
+
+    def toggle_slots():
+        """Book (entry an hour ago) or cancel that booking on --changes random slots."""
+        now = datetime.now()
+        conn = app.open_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                for slot_id in rng.sample(slot_ids, args.changes):
+                    cursor.execute(
+                        "UPDATE bookings SET status = 'cancelled' WHERE slot_id = %s AND status = 'active' "
+                        "AND user_id = %s AND entry_date = %s AND entry_time = %s",
+                        (slot_id, admin["user_id"], "2000-01-01", "00:00:00"),
+                    )
+                    if cursor.rowcount:
+                        continue
+                    end = now + timedelta(hours=rng.randint(1, 6))
+                    cursor.execute(
+                        "INSERT INTO bookings (user_id, slot_id, entry_date, entry_time, exit_date, exit_time) "
+                        "VALUES (%s, %s, %s, %s, %s, %s)",
+                        (admin["user_id"], slot_id, "2000-01-01", "00:00:00",
+                         end.strftime("%Y-%m-%d"), end.strftime("%H:%M:%S")),
+                    )
+            conn.commit()
+        finally:
+            conn.close()
+
+    # Every delta client starts from a full snapshot, as a freshly opened page would
+    views, versions = [], []
+    for _ in range(args.pollers):
+        data = client.get("/api/dashboard/slots?since=0").get_json()
+        views.append({slot["slot_id"]: slot for slot in data["slots"]})
+        versions.append(data["version"])
+
+    full = {"latencies": [], "sizes": [], "queries": 0}
+    delta = {"latencies": [], "sizes": [], "queries": 0, "full_fallbacks": 0}
+    for _ in range(args.rounds):
+        toggle_slots()
+
+        before = slot_queries["count"]
+        for _ in range(args.pollers):
+            started = time.perf_counter()
+            response = client.get("/api/dashboard/slots")
+            full["latencies"].append((time.perf_counter() - started) * 1000)
+            full["sizes"].append(len(response.data))
+        full["queries"] += slot_queries["count"] - before
+
+        toggle_slots()
+        before = slot_queries["count"]
+        for i in range(args.pollers):
+            started = time.perf_counter()
+            response = client.get(f"/api/dashboard/slots?since={versions[i]}")
+            delta["latencies"].append((time.perf_counter() - started) * 1000)
+            delta["sizes"].append(len(response.data))
+            data = response.get_json()
+            if data["full"]:
+                delta["full_fallbacks"] += 1
+                views[i] = {slot["slot_id"]: slot for slot in data["slots"]}
+            else:
+                views[i].update({slot["slot_id"]: slot for slot in data["changed"]})
+                for slot_id in data["removed"]:
+                    views[i].pop(slot_id, None)
+            versions[i] = data["version"]
+        delta["queries"] += slot_queries["count"] - before
+        expected = {slot["slot_id"]: slot for slot in client.get("/api/dashboard/slots").get_json()["slots"]}
+
+    print(json.dumps({
+        "backend": args.backend,
+        "slots": len(slot_ids),
+        "pollers": args.pollers,
+        "rounds": args.rounds,
+        "changes_per_round": args.changes,
+        "full": dict(summarize(full["latencies"], full["sizes"]), slot_state_queries=full["queries"]),
+        "since": dict(
+            summarize(delta["latencies"], delta["sizes"]),
+            slot_state_queries=delta["queries"],
+            full_fallbacks=delta["full_fallbacks"],
+        ),
+        "delta_clients_match_full": all(view == expected for view in views),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
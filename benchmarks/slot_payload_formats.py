@@ -0,0 +1,125 @@
+"""
+Size and encoding cost of the /api/dashboard/slots payload: default vs compact format,
+uncompressed vs gzip vs brotli.
+
+Seeds a scratch database with --slots slots, loads the slot state rows once, then
+times building + JSON-encoding each format and compressing it. It also checks that
+the compact payload expands back to exactly the default one, and fetches both formats
+through the Flask test client with Accept-Encoding. Reports JSON.
+
+    python benchmarks/slot_payload_formats.py --backend sqlite --slots 2000 --bookings 50000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import BENCH_ADMIN, prepare_database, seed  # noqa: E402
+
+
+def expand_compact(compact):
+    """The default payload rebuilt from the compact one (what the dashboard JS does)."""
+    cols = compact["slots"]
+    slots = []
+    for i, slot_id in enumerate(cols["slot_id"]):
+        state = compact["states"][cols["state"][i]]
+        occupant = None if cols["occupant"][i] is None else compact["occupants"][cols["occupant"][i]]
+        entry = cols["entry"][i].split(" ", 1) if cols["entry"][i] else [None, None]
+        exit_ = cols["exit"][i].split(" ", 1) if cols["exit"][i] else [None, None]
+        slots.append({
+            "slot_name": cols["slot_name"][i],
+            "slot_id": slot_id,
+            "occupied": state == "occupied",
+            "state": state,
+            "username": occupant[0] if occupant else "",
+            "occupant_name": occupant[1] if occupant else None,
+            "entry_date": entry[0],
+            "entry_time": entry[1],
+            "exit_date": exit_[0],
+            "exit_time": exit_[1],
+            "status": None if cols["booking_id"][i] is None else "active",
+            "booking_id": cols["booking_id"][i],
+            "is_available": cols["is_available"][i],
+        })
+    return {"kpis": compact["kpis"], "slots": slots}
+
+
+def timed_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_formats")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--slots", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    os.environ["BOOKING_SCHEDULER_ENABLED"] = "0"
+    import app  # noqa: E402
+    import compression
+    from slot_state import build_compact_slot_payload, build_slot_payload, fetch_slot_states
+
+    conn = app.open_db_connection()
+    try:
+        seed(conn, args.slots, args.users, args.bookings, random.Random(42))
+        with conn.cursor() as cursor:
+            rows = fetch_slot_states(cursor)
+            cursor.execute("SELECT user_id, username, full_name FROM users WHERE username = %s", (BENCH_ADMIN,))
+            admin = cursor.fetchone()
+    finally:
+        conn.close()
+
+    def encode(payload):
+        return json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str).encode()
+
+    builders = {"full": build_slot_payload, "compact": build_compact_slot_payload}
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    formats = {}
+    for name, build in builders.items():
+        body, encode_ms = timed_ms(lambda: encode(build(rows)), args.runs)
+        report = {"bytes": len(body), "build_and_encode_ms": encode_ms}
+        for encoding in encodings:
+            compressed, ms = timed_ms(lambda: compression.compress(body, encoding, app.COMPRESSION_LEVEL), args.runs)
+            report[encoding] = {"bytes": len(compressed), "compress_ms": ms}
+        formats[name] = report
+
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(admin, role="admin")
+    http = {}
+    for name, query in (("full", ""), ("compact", "?format=compact")):
+        response = client.get(f"/api/dashboard/slots{query}", headers={"Accept-Encoding": "br, gzip"})
+        http[name] = {
+            "status": response.status_code,
+            "content_type": response.content_type,
+            "content_encoding": response.headers.get("Content-Encoding"),
+            "bytes_on_wire": len(response.get_data()),
+            "etag": response.headers.get("ETag"),
+        }
+
+    print(json.dumps({
+        "backend": args.backend,
+        "slots": len(rows),
+        "compact_expands_to_full": expand_compact(build_compact_slot_payload(rows)) == build_slot_payload(rows),
+        "formats": formats,
+        "http": http,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
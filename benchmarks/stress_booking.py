@@ -0,0 +1,178 @@
+"""
+Concurrency stress test of the booking commit path: proves zero double-bookings.
+
+Several worker processes x threads fire overlapping booking requests (random
+windows on a handful of slots, rarely the same start time) at
+POST /api/dashboard/bookings through the Flask test client, then the database
+is checked for overlapping active bookings on the same slot. Exits non-zero if
+any are found. --unsafe replays the old unlocked check-then-insert instead, to
+show the check detects the race it guards against.
+
+    python benchmarks/stress_booking.py --backend sqlite --processes 4 --threads 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import BENCH_ADMIN, prepare_database, seed  # noqa: E402
+
+# this is used to find overlapping active bookings on the same slot
+DOUBLE_BOOKINGS_SQL = """
+    SELECT COUNT(*) AS overlaps
+    FROM bookings a
+    JOIN bookings b
+      ON b.slot_id = a.slot_id
+     AND b.booking_id > a.booking_id
+     AND b.status = 'active'
+     AND b.entry_ts < a.exit_ts
+     AND b.exit_ts > a.entry_ts
+    WHERE a.status = 'active'
+"""
+
+
+def unsafe_booking(app, user_id, slot_id, payload, entry_ts, exit_ts):
+    """The pre-lock commit path: conflict check and insert with nothing held in between."""
+    conn = app.get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) AS n FROM bookings WHERE slot_id = %s AND status = 'active' "
+                "AND entry_ts < %s AND exit_ts > %s",
+                (slot_id, exit_ts, entry_ts),
+            )
+            if cursor.fetchone()["n"]:
+                return 400
+            # Widen the race window the way a slow request would
+            time.sleep(0.001)
+            cursor.execute(
+                "INSERT INTO bookings (user_id, slot_id, entry_date, entry_time, exit_date, exit_time) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (user_id, slot_id, payload["entry_date"], payload["entry_time"],
+                 payload["exit_date"], payload["exit_time"]),
+            )
+        conn.commit()
+        return 200
+    except Exception:
+        conn.rollback()
+        return 409
+    finally:
+        conn.close()
+
+
+def worker_process(args, seed_value):
+    prepare_database(args.database, args.backend)
+    import app  # noqa: E402
+
+    conn = app.open_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT slot_id, slot_name FROM parking_slots ORDER BY slot_name LIMIT %s", (args.slots,))
+            slots = cursor.fetchall()
+            cursor.execute("SELECT user_id, username, full_name, role FROM users WHERE username = %s", (BENCH_ADMIN,))
+            admin = cursor.fetchone()
+            cursor.execute("SELECT username, user_id FROM users WHERE username LIKE 'bench%' AND role = 'user' LIMIT 50")
+            users = cursor.fetchall()
+    finally:
+        conn.close()
+    day = (datetime.now() + timedelta(days=args.day_offset)).replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def run_thread(thread_no):
+        rng = random.Random(seed_value * 1000 + thread_no)
+        client = app.app.test_client()
+        with client.session_transaction() as sess:
+            sess.update(user_id=admin["user_id"], username=admin["username"],
+                        full_name=admin["full_name"], role="admin")
+        statuses = Counter()
+        for _ in range(args.attempts):
+            slot = rng.choice(slots)
+            user = rng.choice(users)
+            start = day + timedelta(minutes=5 * rng.randint(0, 96))
+            end = start + timedelta(minutes=5 * rng.randint(6, 24))
+            payload = {
+                "username": user["username"],
+                "slot_name": slot["slot_name"],
+                "entry_date": start.strftime("%Y-%m-%d"),
+                "entry_time": start.strftime("%H:%M"),
+                "exit_date": end.strftime("%Y-%m-%d"),
+                "exit_time": end.strftime("%H:%M"),
+            }
+            if args.unsafe:
+                status = unsafe_booking(app, user["user_id"], slot["slot_id"], payload, start, end)
+            else:
+                status = client.post("/api/dashboard/bookings", json=payload).status_code
+            statuses[status] += 1
+        return statuses
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(run_thread, range(args.threads)))
+    return dict(sum(results, Counter()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_stress")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=200, help="booking attempts per thread")
+    parser.add_argument("--slots", type=int, default=3, help="slots under contention")
+    parser.add_argument("--day-offset", type=int, default=400, help="days ahead of the contended day")
+    parser.add_argument("--unsafe", action="store_true", help="use the old unlocked commit path")
+    parser.add_argument("--no-index", action="store_true",
+                        help="disable the in-memory index so every attempt reaches the database")
+    args = parser.parse_args()
+    if args.no_index:
+        # Inherited by the spawned workers
+        os.environ["BOOKING_INDEX_ENABLED"] = "0"
+
+    prepare_database(args.database, args.backend)
+    # Seed before the workers start
+    import app  # noqa: E402
+
+    conn = app.open_db_connection()
+    try:
+        seed(conn, slots=max(args.slots, 10), users=50, bookings=100, rng=random.Random(1))
+    finally:
+        conn.close()
+
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(args.processes) as pool:
+        results = pool.starmap(worker_process, [(args, i) for i in range(args.processes)])
+    elapsed = time.perf_counter() - started
+
+    statuses = sum((Counter(r) for r in results), Counter())
+    conn = app.open_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(DOUBLE_BOOKINGS_SQL)
+            overlaps = cursor.fetchone()["overlaps"]
+    finally:
+        conn.close()
+
+    report = {
+        "backend": args.backend,
+        "path": "unsafe" if args.unsafe else "locked",
+        "processes": args.processes,
+        "threads": args.threads,
+        "attempts": sum(statuses.values()),
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "booked": statuses.get(200, 0),
+        "attempts_per_second": round(sum(statuses.values()) / elapsed, 1),
+        "double_bookings": overlaps,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if overlaps else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Finding a free window: trial-and-error /api/check-availability calls vs one
+/api/search-availability request.
+
+Seeds a scratch database, then for --searches random (start, duration) demands finds
+the earliest window with a free slot twice through the Flask test client: by stepping
+the window forward --step minutes per check-availability call (what the booking page
+made users do), and with a single search request. Reports requests and wall time
+per demand, and whether both found the same start time, as JSON.
+
+    python benchmarks/window_search.py --backend sqlite --slots 30 --bookings 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import BENCH_ADMIN, prepare_database, seed  # noqa: E402
+
+
+def window(start, minutes):
+    end = start + timedelta(minutes=minutes)
+    return {
+        "entry_date": start.strftime("%Y-%m-%d"), "entry_time": start.strftime("%H:%M"),
+        "exit_date": end.strftime("%Y-%m-%d"), "exit_time": end.strftime("%H:%M"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="parking_search")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--slots", type=int, default=30)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--searches", type=int, default=50)
+    parser.add_argument("--step", type=int, default=15, help="minutes the trial window moves per attempt")
+    parser.add_argument("--max-attempts", type=int, default=96)
+    args = parser.parse_args()
+
+    prepare_database(args.database, args.backend)
+    os.environ["BOOKING_SCHEDULER_ENABLED"] = "0"
+    import app  # noqa: E402
+
+    conn = app.open_db_connection()
+    try:
+        seed(conn, args.slots, args.users, args.bookings, random.Random(42))
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT user_id, username, full_name FROM users WHERE username = %s", (BENCH_ADMIN,))
+            admin = cursor.fetchone()
+    finally:
+        conn.close()
+
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(admin, role="admin")
+
+    rng = random.Random(7)
+    base = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    trial = {"requests": [], "ms": [], "found": 0}
+    search = {"ms": [], "found": 0}
+    agree = 0
+    for _ in range(args.searches):
+        start = base + timedelta(days=rng.randint(0, 10), minutes=args.step * rng.randint(0, 40))
+        minutes = 30 * rng.randint(1, 8)
+
+        started = time.perf_counter()
+        trial_start = None
+        for attempt in range(args.max_attempts):
+            candidate = start + timedelta(minutes=args.step * attempt)
+            data = client.post("/api/check-availability", json=window(candidate, minutes)).get_json()
+            if data["kpis"]["available"]:
+                trial_start = candidate
+                break
+        trial["ms"].append((time.perf_counter() - started) * 1000)
+        trial["requests"].append(attempt + 1)
+        trial["found"] += trial_start is not None
+
+        started = time.perf_counter()
+        data = client.post("/api/search-availability", json={
+            "duration_minutes": minutes,
+            "from_date": start.strftime("%Y-%m-%d"), "from_time": start.strftime("%H:%M"),
+            "limit": 1,
+        }).get_json()
+        search["ms"].append((time.perf_counter() - started) * 1000)
+        earliest = data["earliest"]
+        search_start = None
+        if earliest:
+            first = earliest["windows"][0]
+            search_start = datetime.strptime(f"{first['entry_date']} {first['entry_time']}", "%Y-%m-%d %H:%M")
+            search["found"] += 1
+        # The search is exact to the minute; stepping can only land on or after it
+        agree += trial_start is None or (search_start is not None and search_start <= trial_start)
+
+    print(json.dumps({
+        "backend": args.backend,
+        "slots": args.slots,
+        "bookings": args.bookings,
+        "searches": args.searches,
+        "trial_and_error": {
+            "found": trial["found"],
+            "requests_per_search": round(statistics.mean(trial["requests"]), 1),
+            "p50_ms": round(statistics.median(trial["ms"]), 2),
+            "max_requests": max(trial["requests"]),
+        },
+        "search_endpoint": {
+            "found": search["found"],
+            "requests_per_search": 1,
+            "p50_ms": round(statistics.median(search["ms"]), 2),
+        },
+        "search_never_later": agree == args.searches,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
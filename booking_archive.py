@@ -0,0 +1,154 @@
+"""
+Booking history archival.
+
+Completed and cancelled bookings older than a configurable age are moved, in batches,
+from `bookings` into `bookings_archive`, keeping the hot table (and its indexes) small.
+MySQL RANGE partitioning was not used because InnoDB does not allow partitioned tables
+to have the foreign keys `bookings` relies on.
+
+    python booking_archive.py --days 180 --batch 1000
+"""
+import argparse
+import os
+from typing import Dict, List, Tuple
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("BOOKING_ARCHIVE_AFTER_DAYS", 180))
+ARCHIVE_BATCH_SIZE = int(os.getenv("BOOKING_ARCHIVE_BATCH", 1000))
+
+ARCHIVED_COLUMNS = (
+    "booking_id, user_id, slot_id, entry_date, entry_time, exit_date, exit_time, status, booked_at"
+)
+
+# No foreign keys: archived rows must outlive slot renames and stay cheap to insert
+CREATE_ARCHIVE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS bookings_archive (
+        booking_id INT UNSIGNED NOT NULL,
+        user_id INT UNSIGNED NOT NULL,
+        slot_id INT UNSIGNED NOT NULL,
+        entry_date DATE NOT NULL,
+        entry_time TIME NOT NULL,
+        exit_date DATE NOT NULL,
+        exit_time TIME NOT NULL,
+        status ENUM('active', 'completed', 'cancelled') NOT NULL,
+        booked_at TIMESTAMP NULL,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (booking_id),
+        KEY idx_archive_user_booked (user_id, booked_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+# this is used to pick one batch of archivable rows (range scan on idx_status_exit_window)
+ARCHIVABLE_BATCH_SQL = """
+    SELECT booking_id
+    FROM bookings
+    WHERE status IN ('completed', 'cancelled')
+      AND exit_ts < DATE_SUB(NOW(), INTERVAL %s DAY)
+    ORDER BY booking_id
+    LIMIT %s
+"""
+
+HISTORY_COLUMNS = """
+    b.booking_id,
+    ps.slot_name,
+    ps.location,
+    b.entry_date,
+    b.entry_time,
+    b.exit_date,
+    b.exit_time,
+    b.status,
+    b.booked_at
+"""
+
+
+def archive_bookings(conn, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move completed/cancelled bookings whose exit is older than `older_than_days` into
+    bookings_archive, one transaction per batch so locks stay short. Returns rows moved.
+    """
+    moved = 0
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(ARCHIVABLE_BATCH_SQL, (older_than_days, batch_size))
+            ids = [row["booking_id"] for row in cursor.fetchall()]
+            if not ids:
+                return moved
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(
+                f"INSERT IGNORE INTO bookings_archive ({ARCHIVED_COLUMNS}) "
+                f"SELECT {ARCHIVED_COLUMNS} FROM bookings WHERE booking_id IN ({placeholders})",
+                ids,
+            )
+            cursor.execute(f"DELETE FROM bookings WHERE booking_id IN ({placeholders})", ids)
+        conn.commit()
+        moved += len(ids)
+        if len(ids) < batch_size:
+            return moved
+
+
+def fetch_user_history(cursor, user_id: int, page: int = 1, per_page: int = 20,
+                       include_archive: bool = False) -> Tuple[List[Dict], bool]:
+    """
+    One page of a user's bookings, newest first, plus whether an older page exists.
+    The archive is only read when `include_archive` is set; each side of the UNION is
+    bounded so neither table is sorted beyond the requested page.
+    """
+    offset = (max(page, 1) - 1) * per_page
+    window = offset + per_page + 1
+    if include_archive:
+        cursor.execute(
+            f"""
+            SELECT * FROM (
+                SELECT * FROM (
+                    SELECT {HISTORY_COLUMNS}
+                    FROM bookings b
+                    JOIN parking_slots ps ON b.slot_id = ps.slot_id
+                    WHERE b.user_id = %s
+                    ORDER BY b.booked_at DESC
+                    LIMIT %s
+                ) live
+                UNION ALL
+                SELECT * FROM (
+                    SELECT {HISTORY_COLUMNS}
+                    FROM bookings_archive b
+                    JOIN parking_slots ps ON b.slot_id = ps.slot_id
+                    WHERE b.user_id = %s
+                    ORDER BY b.booked_at DESC
+                    LIMIT %s
+                ) archived
+            ) history
+            ORDER BY booked_at DESC
+            LIMIT %s OFFSET %s
+            """,
+            (user_id, window, user_id, window, per_page + 1, offset),
+        )
+    else:
+        cursor.execute(
+            f"""
+            SELECT {HISTORY_COLUMNS}
+            FROM bookings b
+            JOIN parking_slots ps ON b.slot_id = ps.slot_id
+            WHERE b.user_id = %s
+            ORDER BY b.booked_at DESC
+            LIMIT %s OFFSET %s
+            """,
+            (user_id, per_page + 1, offset),
+        )
+    rows = cursor.fetchall()
+    return rows[:per_page], len(rows) > per_page
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old completed/cancelled bookings to bookings_archive.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="archive bookings whose exit is older than this many days")
+    parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH_SIZE, help="rows moved per transaction")
+    args = parser.parse_args()
+
+    from app import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        total = archive_bookings(conn, args.days, args.batch)
+        print(f"Archived {total} booking(s) older than {args.days} day(s).")
+    finally:
+        conn.close()
@@ -0,0 +1,228 @@
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import pymysql
+
+from booking_commit import INSERT_BOOKING_SQL, LOCK_SLOT_SQL, BookingConflict, SlotLockStripes, booking_columns
+from booking_index import to_datetime
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# this is used to load every active booking on the slot that could overlap the batch
+# (one range scan on idx_slot_status_window instead of one check per interval)
+BATCH_CONFLICTS_SQL = """
+    SELECT entry_ts, exit_ts
+    FROM bookings
+    WHERE slot_id = %s
+      AND status = 'active'
+      AND entry_ts < %s
+      AND exit_ts > %s
+    ORDER BY entry_ts
+"""
+
+# this is used to find the starts already taken on the slot, by rows of any status (the
+# uniq_slot_datetime (slot_id, entry_date, entry_time) key also covers cancelled and
+# completed bookings), and to read back the ids of the rows the batch just inserted
+BATCH_STARTS_SQL = """
+    SELECT booking_id, entry_date, entry_time, status
+    FROM bookings
+    WHERE slot_id = %s
+      AND entry_date >= %s
+      AND entry_date <= %s
+"""
+
+
+class BatchInterval:
+    """One requested window of a batch, with its position in the request and its outcome."""
+
+    __slots__ = ("index", "entry_date", "entry_time", "exit_date", "exit_time",
+                 "entry_ts", "exit_ts", "booking_id", "reason")
+
+    def __init__(self, index, entry_date, entry_time, exit_date, exit_time):
+        self.index = index
+        self.entry_date = entry_date
+        self.entry_time = entry_time
+        self.exit_date = exit_date
+        self.exit_time = exit_time
+        self.entry_ts: Optional[datetime] = None
+        self.exit_ts: Optional[datetime] = None
+        self.booking_id: Optional[int] = None
+        self.reason: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        result = {
+            "index": self.index,
+            "entry_date": self.entry_date,
+            "entry_time": self.entry_time,
+            "exit_date": self.exit_date,
+            "exit_time": self.exit_time,
+            "status": "accepted" if self.booking_id is not None else "rejected",
+        }
+        if self.booking_id is not None:
+            result["booking_id"] = self.booking_id
+        else:
+            result["reason"] = self.reason
+        return result
+
+
+def parse_intervals(items) -> List[BatchInterval]:
+    """
+    Turn the request's "intervals" list into BatchIntervals. Entries with missing
+    fields, bad formats or exit <= entry are kept but marked rejected ("invalid").
+    """
+    intervals = []
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        interval = BatchInterval(
+            index,
+            str(item.get("entry_date") or ""),
+            str(item.get("entry_time") or ""),
+            str(item.get("exit_date") or item.get("entry_date") or ""),
+            str(item.get("exit_time") or ""),
+        )
+        try:
+            interval.entry_ts = to_datetime(interval.entry_date, interval.entry_time)
+            interval.exit_ts = to_datetime(interval.exit_date, interval.exit_time)
+        except ValueError:
+            interval.reason = "invalid"
+        else:
+            if interval.exit_ts <= interval.entry_ts:
+                interval.reason = "invalid"
+        intervals.append(interval)
+    return intervals
+
+
+def expand_recurrence(rule: Dict, max_occurrences: int) -> List[BatchInterval]:
+    """
+    Expand a weekly recurrence rule into BatchIntervals:
+
+        {"start_date": "2025-01-06", "end_date": "2025-05-30",
+         "weekdays": ["mon", "tue", "wed", "thu", "fri"],
+         "entry_time": "08:00", "exit_time": "17:00"}
+
+    end_date is inclusive; weekdays defaults to Monday-Friday. An exit_time at or
+    before entry_time ends the next day (overnight). Raises ValueError on a bad
+    rule or when it yields more than max_occurrences windows.
+    """
+    start = date.fromisoformat(str(rule.get("start_date")))
+    end = date.fromisoformat(str(rule.get("end_date")))
+    if end < start:
+        raise ValueError("end_date is before start_date")
+    weekdays = rule.get("weekdays") or list(WEEKDAYS[:5])
+    try:
+        wanted = {WEEKDAYS.index(str(day).lower()[:3]) for day in weekdays}
+    except ValueError:
+        raise ValueError(f"weekdays must be among {', '.join(WEEKDAYS)}")
+    entry_time, exit_time = str(rule.get("entry_time")), str(rule.get("exit_time"))
+    # Validates both times up front
+    overnight = to_datetime(start, exit_time) <= to_datetime(start, entry_time)
+
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    days = [day for day in days if day.weekday() in wanted]
+    if len(days) > max_occurrences:
+        raise ValueError(f"recurrence yields {len(days)} bookings (max {max_occurrences})")
+    return parse_intervals([
+        {
+            "entry_date": day.isoformat(),
+            "entry_time": entry_time,
+            "exit_date": (day + timedelta(days=1) if overnight else day).isoformat(),
+            "exit_time": exit_time,
+        }
+        for day in days
+    ])
+
+
+def _mark_conflicts(intervals: List[BatchInterval], existing: List[Dict]):
+    """
+    Reject intervals that overlap an existing booking ("occupied") or an earlier
+    accepted interval of the same batch ("overlaps_batch"). Both sides are walked in
+    entry order, so this is O(n log m) for n requested and m existing windows.
+    """
+    starts = [row["entry_ts"] for row in existing]
+    # max_ends[i] = latest exit among existing[0..i], so overlapping legacy rows still count
+    max_ends, latest = [], None
+    for row in existing:
+        latest = row["exit_ts"] if latest is None else max(latest, row["exit_ts"])
+        max_ends.append(latest)
+
+    accepted_until = None
+    for interval in sorted((i for i in intervals if i.reason is None), key=lambda i: i.entry_ts):
+        k = bisect_left(starts, interval.exit_ts)
+        if k and max_ends[k - 1] > interval.entry_ts:
+            interval.reason = "occupied"
+        elif accepted_until is not None and accepted_until > interval.entry_ts:
+            interval.reason = "overlaps_batch"
+        else:
+            accepted_until = interval.exit_ts if accepted_until is None else max(accepted_until, interval.exit_ts)
+
+
+def _fetch_starts(cursor, slot_id: int, intervals: List[BatchInterval]) -> Dict[datetime, Dict]:
+    """The slot's rows on the batch's days (booking_id, status) by start (entry date + time)."""
+    cursor.execute(
+        BATCH_STARTS_SQL,
+        (slot_id, min(i.entry_ts for i in intervals).date(), max(i.entry_ts for i in intervals).date()),
+    )
+    return {to_datetime(row["entry_date"], row["entry_time"]): row for row in cursor.fetchall()}
+
+
+def commit_batch(conn, stripes: SlotLockStripes, user_id: int, slot_id: int,
+                 intervals: List[BatchInterval], all_or_nothing: bool = False) -> List[BatchInterval]:
+    """
+    Book every free interval of `intervals` on one slot for one user; returns the accepted ones
+    (booking_id set) and leaves a reason on the rejected ones.
+
+    One transaction under the slot's lock (see booking_commit.commit_booking): one range
+    query for the existing bookings, one for the starts already taken (the unique key
+    also counts cancelled rows: reason "constraint"), the overlap check in memory, one
+    executemany insert. With all_or_nothing, a single rejection rolls back the whole batch.
+    Raises BookingConflict("constraint") if the insert still hits the unique key.
+    """
+    candidates = [i for i in intervals if i.reason is None]
+    if not candidates:
+        return []
+    accepted: List[BatchInterval] = []
+    with stripes.lock_for(slot_id):
+        conn.begin()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(LOCK_SLOT_SQL, (slot_id,))
+                if cursor.fetchone() is None:
+                    raise LookupError(f"slot {slot_id} does not exist")
+                taken = _fetch_starts(cursor, slot_id, candidates)
+                for interval in candidates:
+                    if interval.entry_ts in taken:
+                        # An active row there overlaps too; a cancelled/completed one only blocks the key
+                        interval.reason = "occupied" if taken[interval.entry_ts]["status"] == "active" else "constraint"
+                candidates = [i for i in candidates if i.reason is None]
+                if candidates:
+                    cursor.execute(
+                        BATCH_CONFLICTS_SQL,
+                        (slot_id, max(i.exit_ts for i in candidates), min(i.entry_ts for i in candidates)),
+                    )
+                    _mark_conflicts(candidates, cursor.fetchall())
+                accepted = [i for i in candidates if i.reason is None]
+                if not accepted or (all_or_nothing and len(accepted) < len(intervals)):
+                    for interval in accepted:
+                        interval.reason = "batch_rejected"
+                    conn.rollback()
+                    return []
+
+                cursor.executemany(
+                    INSERT_BOOKING_SQL,
+                    [(user_id, slot_id) + booking_columns(i.entry_ts, i.exit_ts) for i in accepted],
+                )
+                # Each start is unique on the slot and was free above, so it names our row
+                ids = _fetch_starts(cursor, slot_id, accepted)
+                for interval in accepted:
+                    interval.booking_id = ids[interval.entry_ts]["booking_id"]
+            conn.commit()
+        except pymysql.err.IntegrityError:
+            conn.rollback()
+            for interval in accepted:
+                interval.booking_id = None
+            raise BookingConflict("constraint")
+        except Exception:
+            conn.rollback()
+            raise
+    return accepted
@@ -0,0 +1,96 @@
+import threading
+from datetime import datetime
+from typing import Tuple
+
+import pymysql
+
+# this is used to take the per-slot write lock for the rest of the transaction
+LOCK_SLOT_SQL = "SELECT slot_id FROM parking_slots WHERE slot_id = %s FOR UPDATE"
+
+# this is used to check for an overlapping active booking on the locked slot
+# (range scan on idx_slot_status_window)
+SLOT_CONFLICT_SQL = """
+    SELECT booking_id
+    FROM bookings
+    WHERE slot_id = %s
+      AND status = 'active'
+      AND entry_ts < %s
+      AND exit_ts > %s
+    LIMIT 1
+"""
+
+INSERT_BOOKING_SQL = """
+    INSERT INTO bookings (
+        user_id, slot_id, entry_date, entry_time, exit_date, exit_time
+    ) VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def booking_columns(entry_ts: datetime, exit_ts: datetime) -> Tuple[str, str, str, str]:
+    """
+    entry_date, entry_time, exit_date, exit_time as stored: always YYYY-MM-DD and HH:MM:SS.
+    to_datetime() accepts e.g. "8:00", which SQLite's datetime() (behind the generated
+    entry_ts/exit_ts columns) does not, so the inserted values come from the parsed datetimes.
+    """
+    return (
+        entry_ts.strftime("%Y-%m-%d"),
+        entry_ts.strftime("%H:%M:%S"),
+        exit_ts.strftime("%Y-%m-%d"),
+        exit_ts.strftime("%H:%M:%S"),
+    )
+
+
+class BookingConflict(Exception):
+    """The requested window overlaps an active booking on the slot (reason: overlap/constraint)."""
+
+    def __init__(self, reason: str = "overlap"):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class SlotLockStripes:
+    """
+    Fixed set of in-process locks; a slot always maps to the same stripe.
+
+    Same-slot bookings in this worker queue here instead of piling up on the
+    database row lock, while bookings for different slots (almost always on
+    different stripes) proceed in parallel.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(max(1, int(stripes)))]
+
+    def lock_for(self, slot_id: int) -> threading.Lock:
+        return self._locks[hash(slot_id) % len(self._locks)]
+
+
+def commit_booking(conn, stripes: SlotLockStripes, user_id: int, slot_id: int,
+                   entry_ts: datetime, exit_ts: datetime) -> int:
+    """
+    Insert a booking if [entry_ts, exit_ts) is free on the slot; returns the booking_id.
+
+    The check and the insert run in one transaction holding the slot's row lock
+    (SELECT ... FOR UPDATE on parking_slots; BEGIN IMMEDIATE on SQLite), so two
+    overlapping requests for one slot, from any thread or worker process, are
+    serialized and the second sees the first. Raises BookingConflict otherwise.
+    """
+    with stripes.lock_for(slot_id):
+        conn.begin()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(LOCK_SLOT_SQL, (slot_id,))
+                if cursor.fetchone() is None:
+                    raise LookupError(f"slot {slot_id} does not exist")
+                cursor.execute(SLOT_CONFLICT_SQL, (slot_id, exit_ts, entry_ts))
+                if cursor.fetchone() is not None:
+                    raise BookingConflict("overlap")
+                cursor.execute(INSERT_BOOKING_SQL, (user_id, slot_id) + booking_columns(entry_ts, exit_ts))
+                booking_id = cursor.lastrowid
+            conn.commit()
+            return booking_id
+        except pymysql.err.IntegrityError:
+            conn.rollback()
+            raise BookingConflict("constraint")
+        except Exception:
+            conn.rollback()
+            raise
@@ -0,0 +1,46 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BookingChange:
+    """
+    A committed change to the set of active bookings.
+
+    kind is one of "created", "cancelled", "deleted" (owner removed),
+    "completed" (exit time passed) or "started" (the booking reached its
+    pre-entry boundary, so its slot now shows as occupied).
+    Window fields are None when the change is not tied to one booking.
+    """
+
+    kind: str
+    booking_id: Optional[int] = None
+    slot_id: Optional[int] = None
+    entry_ts: Optional[datetime] = None
+    exit_ts: Optional[datetime] = None
+
+
+_listeners: List[Callable[[BookingChange], None]] = []
+_lock = threading.Lock()
+
+
+def subscribe(listener: Callable[[BookingChange], None]):
+    """Register a callback invoked (in the writer's thread) after every published change."""
+    with _lock:
+        _listeners.append(listener)
+    return listener
+
+
+def publish(change: BookingChange):
+    """Notify all listeners. Call only after the change has been committed."""
+    for listener in list(_listeners):
+        try:
+            listener(change)
+        except Exception:
+            # A broken listener must never fail the write that already committed
+            logger.exception("booking change listener %r failed", listener)
@@ -0,0 +1,267 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from booking_events import BookingChange
+from bookings_version import fetch_bookings_version
+
+# this is used to load every active booking interval when (re)building the index
+ACTIVE_INTERVALS_SQL = """
+    SELECT
+        booking_id,
+        slot_id,
+        entry_ts,
+        exit_ts
+    FROM bookings
+    WHERE status = 'active'
+"""
+
+
+def to_datetime(date_value, time_value) -> datetime:
+    """Combine a booking date ('YYYY-MM-DD') and time ('HH:MM' or 'HH:MM:SS') into a datetime."""
+    time_str = str(time_value)
+    fmt = "%Y-%m-%d %H:%M:%S" if time_str.count(":") == 2 else "%Y-%m-%d %H:%M"
+    return datetime.strptime(f"{date_value} {time_str}", fmt)
+
+
+def _valid(entry: Optional[datetime], exit_: Optional[datetime]) -> bool:
+    """
+    Whether an interval belongs in the index. Empty or inverted ones overlap nothing in
+    the database conflict check either, and would break the sorted-ends assumption.
+    """
+    return entry is not None and exit_ is not None and exit_ > entry
+
+
+class _SlotIntervals:
+    """Active intervals of one slot, kept sorted by entry time in parallel lists."""
+
+    __slots__ = ("starts", "ends", "ids", "overlapping")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.ids: List[int] = []
+        # Normally bookings on a slot never overlap, so ends are sorted too and a single
+        # bisect answers a query. Legacy/racy data can break that; we then scan linearly.
+        self.overlapping = False
+
+    def add(self, booking_id: int, entry: datetime, exit_: datetime):
+        pos = bisect_right(self.starts, entry)
+        if (pos > 0 and self.ends[pos - 1] > entry) or (
+            pos < len(self.starts) and self.starts[pos] < exit_
+        ):
+            self.overlapping = True
+        self.starts.insert(pos, entry)
+        self.ends.insert(pos, exit_)
+        self.ids.insert(pos, booking_id)
+
+    def remove(self, booking_id: int, entry: datetime) -> bool:
+        pos = bisect_left(self.starts, entry)
+        while pos < len(self.starts) and self.starts[pos] == entry:
+            if self.ids[pos] == booking_id:
+                del self.starts[pos], self.ends[pos], self.ids[pos]
+                if self.overlapping:
+                    self.overlapping = any(
+                        self.ends[i] > self.starts[i + 1] for i in range(len(self.starts) - 1)
+                    )
+                return True
+            pos += 1
+        return False
+
+    def is_free(self, entry: datetime, exit_: datetime) -> bool:
+        # Only intervals starting before the requested exit can overlap it
+        count = bisect_left(self.starts, exit_)
+        if count == 0:
+            return True
+        if not self.overlapping:
+            return self.ends[count - 1] <= entry
+        return all(self.ends[i] <= entry for i in range(count))
+
+    def between(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """(entry, exit) of the intervals overlapping [start, end), sorted by entry."""
+        count = bisect_left(self.starts, end)
+        if not self.overlapping:
+            first = bisect_right(self.ends, start)
+            return list(zip(self.starts[first:count], self.ends[first:count]))
+        return [(self.starts[i], self.ends[i]) for i in range(count) if self.ends[i] > start]
+
+
+class SlotIntervalIndex:
+    """
+    In-process index of active booking intervals, one sorted structure per slot_id.
+
+    Answers "is slot X free for [entry, exit)" with a single bisect (O(log n)) and
+    "which slots are free" in O(slots * log n), without a database round trip.
+    The bookings table stays the source of truth: the index is warmed from it,
+    kept in sync via booking change events, rebuilt once it is older than `max_age`
+    seconds (so workers also pick up writes made by other processes) and can be
+    verified against it at any time.
+
+    `version` is the bookings version (bookings_version.py) the index was loaded at.
+    Callers that need an exact answer use the index only while it matches the current
+    version; ensure_fresh(version=...) reloads on a mismatch, at most every `min_reload`
+    seconds.
+    """
+
+    def __init__(self, max_age: float = 30.0, min_reload: float = 1.0):
+        self.max_age = max_age
+        self.min_reload = min_reload
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._slots: Dict[int, _SlotIntervals] = {}
+        self._bookings: Dict[int, Tuple[int, datetime, datetime]] = {}
+        self._built_at: Optional[float] = None
+        self._version: Optional[int] = None
+        # Changes applied while a reload query is in flight; replayed onto the new contents
+        self._pending: Optional[List[BookingChange]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def is_stale(self, version: Optional[int] = None) -> bool:
+        if self._built_at is None:
+            return True
+        age = time.monotonic() - self._built_at
+        if age > self.max_age:
+            return True
+        return version is not None and version != self._version and age >= self.min_reload
+
+    def rebuild(self, rows: Iterable[Dict], version: Optional[int] = None):
+        """Replace the index contents with the given active booking rows."""
+        slots: Dict[int, _SlotIntervals] = {}
+        bookings: Dict[int, Tuple[int, datetime, datetime]] = {}
+        for row in sorted(rows, key=lambda r: (r["slot_id"], r["entry_ts"])):
+            if not _valid(row["entry_ts"], row["exit_ts"]):
+                continue
+            slots.setdefault(row["slot_id"], _SlotIntervals()).add(
+                row["booking_id"], row["entry_ts"], row["exit_ts"]
+            )
+            bookings[row["booking_id"]] = (row["slot_id"], row["entry_ts"], row["exit_ts"])
+        with self._lock:
+            self._slots = slots
+            self._bookings = bookings
+            self._built_at = time.monotonic()
+            self._version = version
+            pending, self._pending = self._pending, None
+            for change in pending or ():
+                self.apply(change)
+
+    def load(self, conn):
+        """Rebuild the index from the bookings table using an open connection."""
+        with self._lock:
+            self._pending = []
+        with conn.cursor() as cursor:
+            # Version first: the rows are then at least as new as the version recorded
+            version = fetch_bookings_version(cursor)
+            cursor.execute(ACTIVE_INTERVALS_SQL)
+            rows = cursor.fetchall()
+        self.rebuild(rows, version)
+
+    def ensure_fresh(self, get_connection, version: Optional[int] = None):
+        """
+        Reload from the database if the index is missing, older than max_age or (when
+        `version` is given) loaded at another bookings version.
+        While one thread reloads, others keep answering from the current contents.
+        """
+        if not self.is_stale(version):
+            return
+        if not self._reload_lock.acquire(blocking=not self.ready):
+            return
+        try:
+            if self.is_stale(version):
+                conn = get_connection()
+                try:
+                    self.load(conn)
+                finally:
+                    conn.close()
+        finally:
+            self._reload_lock.release()
+
+    def add(self, booking_id: int, slot_id: int, entry: datetime, exit_: datetime):
+        if not _valid(entry, exit_):
+            return
+        with self._lock:
+            if booking_id in self._bookings:
+                return
+            self._slots.setdefault(slot_id, _SlotIntervals()).add(booking_id, entry, exit_)
+            self._bookings[booking_id] = (slot_id, entry, exit_)
+
+    def remove(self, booking_id: int) -> bool:
+        with self._lock:
+            entry = self._bookings.pop(booking_id, None)
+            if entry is None:
+                return False
+            slot_id, start, _ = entry
+            return self._slots[slot_id].remove(booking_id, start)
+
+    def is_free(self, slot_id: int, entry: datetime, exit_: datetime) -> bool:
+        with self._lock:
+            intervals = self._slots.get(slot_id)
+            return intervals is None or intervals.is_free(entry, exit_)
+
+    def conflicting_slots(self, entry: datetime, exit_: datetime) -> Set[int]:
+        """slot_ids that have at least one active booking overlapping [entry, exit)."""
+        with self._lock:
+            return {
+                slot_id
+                for slot_id, intervals in self._slots.items()
+                if not intervals.is_free(entry, exit_)
+            }
+
+    def free_slots(self, slot_ids: Iterable[int], entry: datetime, exit_: datetime) -> List[int]:
+        """Subset of slot_ids that are free for the whole of [entry, exit)."""
+        busy = self.conflicting_slots(entry, exit_)
+        return [slot_id for slot_id in slot_ids if slot_id not in busy]
+
+    def busy_intervals(self, start: datetime, end: datetime) -> Dict[int, List[Tuple[datetime, datetime]]]:
+        """Per slot_id, the intervals overlapping [start, end) (availability.free_windows input)."""
+        with self._lock:
+            busy = {slot_id: intervals.between(start, end) for slot_id, intervals in self._slots.items()}
+        return {slot_id: intervals for slot_id, intervals in busy.items() if intervals}
+
+    def verify(self, rows: Iterable[Dict]) -> Dict:
+        """
+        Compare the index with freshly queried active booking rows.
+        Returns the booking_ids missing from / extra in / mismatched in the index.
+        """
+        expected = {
+            row["booking_id"]: (row["slot_id"], row["entry_ts"], row["exit_ts"])
+            for row in rows
+            if _valid(row["entry_ts"], row["exit_ts"])
+        }
+        with self._lock:
+            actual = dict(self._bookings)
+        missing = sorted(set(expected) - set(actual))
+        extra = sorted(set(actual) - set(expected))
+        mismatched = sorted(
+            booking_id
+            for booking_id in set(expected) & set(actual)
+            if expected[booking_id] != actual[booking_id]
+        )
+        return {
+            "ok": not (missing or extra or mismatched),
+            "indexed": len(actual),
+            "expected": len(expected),
+            "missing": missing,
+            "extra": extra,
+            "mismatched": mismatched,
+        }
+
+    def apply(self, change: BookingChange):
+        """booking_events listener keeping the index in sync with committed writes."""
+        if change.booking_id is None:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(change)
+        if change.kind == "created":
+            self.add(change.booking_id, change.slot_id, change.entry_ts, change.exit_ts)
+        elif change.kind in ("cancelled", "deleted", "completed"):
+            self.remove(change.booking_id)
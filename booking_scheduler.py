@@ -0,0 +1,223 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import booking_events
+from booking_events import BookingChange
+from slot_state import OCCUPIED_LEAD_MINUTES
+
+logger = logging.getLogger(__name__)
+
+# this is used to (re)load the boundaries falling inside the scheduling horizon
+UPCOMING_BOUNDARIES_SQL = f"""
+    SELECT booking_id, slot_id, entry_ts, exit_ts
+    FROM bookings
+    WHERE status = 'active'
+      AND exit_ts >= NOW()
+      AND (
+        exit_ts <= DATE_ADD(NOW(), INTERVAL %s SECOND)
+        OR entry_ts <= DATE_ADD(NOW(), INTERVAL %s + {OCCUPIED_LEAD_MINUTES * 60} SECOND)
+      )
+"""
+
+# this is used to pick one batch of bookings whose exit time has passed
+EXPIRED_BATCH_SQL = """
+    SELECT booking_id, slot_id, entry_ts, exit_ts
+    FROM bookings
+    WHERE status = 'active'
+      AND exit_ts < NOW()
+    ORDER BY exit_ts
+    LIMIT %s
+"""
+
+
+class BookingScheduler:
+    """
+    Background thread driving time-based booking transitions.
+
+    A min-heap holds the next exit times and pre-entry boundaries (entry - 15 min)
+    of active bookings within `horizon` seconds. The thread sleeps until the earliest
+    one, then:
+      - marks every active booking whose exit_ts has passed as 'completed', in
+        batched UPDATEs of up to `batch_size` rows, publishing "completed" changes
+        (the slot became free);
+      - publishes "started" changes for bookings crossing the pre-entry boundary
+        (the slot became occupied).
+    The heap is reloaded every `horizon` seconds so bookings made by other worker
+    processes are picked up; new bookings made here are pushed on as they commit.
+    """
+
+    def __init__(
+        self,
+        get_connection: Callable,
+        batch_size: int = 500,
+        horizon: float = 300.0,
+    ):
+        self._get_connection = get_connection
+        self.batch_size = max(1, int(batch_size))
+        self.horizon = horizon
+        self._lead = timedelta(minutes=OCCUPIED_LEAD_MINUTES)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._heap: List[tuple] = []
+        # booking_ids cancelled since the last reload; their boundaries are skipped lazily
+        self._dropped = set()
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stopping = False
+        self._completed = 0
+        self._started = 0
+        self._runs = 0
+
+    def start(self):
+        """Start the scheduler thread (again, in a forked worker where it did not survive)."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._heap = []
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="booking-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+
+    def schedule(self, change: BookingChange):
+        """booking_events listener: track boundaries of created and dropped bookings."""
+        if change.booking_id is None:
+            return
+        if change.kind in ("cancelled", "deleted"):
+            with self._lock:
+                self._dropped.add(change.booking_id)
+            return
+        if change.kind != "created":
+            return
+        horizon_end = datetime.now() + timedelta(seconds=self.horizon)
+        with self._lock:
+            self._push(change, horizon_end)
+        # Re-evaluate the sleep in case the new boundary is the earliest
+        self._wake.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "pending_boundaries": len(self._heap),
+                "next_boundary": self._heap[0][0].isoformat() if self._heap else None,
+                "completed": self._completed,
+                "started": self._started,
+                "runs": self._runs,
+            }
+
+    def run_once(self) -> int:
+        """Complete every expired booking now (batched); returns how many were completed."""
+        total = 0
+        while True:
+            done = self._complete_batch()
+            total += done
+            if done < self.batch_size:
+                return total
+
+    def _push(self, change: BookingChange, horizon_end: datetime):
+        booking = (change.booking_id, change.slot_id, change.entry_ts, change.exit_ts)
+        boundary = change.entry_ts - self._lead
+        if boundary > datetime.now() and boundary <= horizon_end:
+            heapq.heappush(self._heap, (boundary, next(self._seq), "started", booking))
+        if change.exit_ts <= horizon_end:
+            # Active while exit_ts >= NOW(); complete once it has strictly passed
+            heapq.heappush(
+                self._heap, (change.exit_ts + timedelta(seconds=1), next(self._seq), "exit", booking)
+            )
+
+    def _reload(self):
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(UPCOMING_BOUNDARIES_SQL, (int(self.horizon), int(self.horizon)))
+                rows = cursor.fetchall()
+        finally:
+            conn.close()
+        horizon_end = datetime.now() + timedelta(seconds=self.horizon)
+        with self._lock:
+            self._heap = []
+            self._dropped = set()
+            for row in rows:
+                self._push(
+                    BookingChange("created", row["booking_id"], row["slot_id"], row["entry_ts"], row["exit_ts"]),
+                    horizon_end,
+                )
+
+    def _complete_batch(self) -> int:
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(EXPIRED_BATCH_SQL, (self.batch_size,))
+                rows = cursor.fetchall()
+                if not rows:
+                    return 0
+                ids = [row["booking_id"] for row in rows]
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(
+                    f"UPDATE bookings SET status = 'completed' "
+                    f"WHERE status = 'active' AND booking_id IN ({placeholders})",
+                    ids,
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._completed += len(rows)
+        # Publish even if another worker won the UPDATE: this process' listeners
+        # (index, caches, streams) still have to drop the booking.
+        for row in rows:
+            booking_events.publish(
+                BookingChange("completed", row["booking_id"], row["slot_id"], row["entry_ts"], row["exit_ts"])
+            )
+        return len(rows)
+
+    def _run(self):
+        next_reload = datetime.min
+        while not self._stopping:
+            try:
+                now = datetime.now()
+                if now >= next_reload:
+                    self.run_once()
+                    self._reload()
+                    next_reload = now + timedelta(seconds=self.horizon)
+
+                due_started, exit_due = [], False
+                with self._lock:
+                    while self._heap and self._heap[0][0] <= now:
+                        _, _, kind, booking = heapq.heappop(self._heap)
+                        if booking[0] in self._dropped:
+                            continue
+                        if kind == "started":
+                            due_started.append(booking)
+                        else:
+                            exit_due = True
+                    self._runs += 1
+
+                if exit_due:
+                    self.run_once()
+                for booking_id, slot_id, entry_ts, exit_ts in due_started:
+                    with self._lock:
+                        self._started += 1
+                    booking_events.publish(BookingChange("started", booking_id, slot_id, entry_ts, exit_ts))
+
+                with self._lock:
+                    wake_at = min(self._heap[0][0], next_reload) if self._heap else next_reload
+                timeout = max(0.0, (wake_at - datetime.now()).total_seconds())
+            except Exception:
+                logger.exception("booking scheduler run failed")
+                timeout = 30.0
+            self._wake.wait(timeout)
+            self._wake.clear()
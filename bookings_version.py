@@ -0,0 +1,151 @@
+"""
+Global bookings version counter and the ETag helpers built on it.
+
+`bookings_version` holds VERSION_SHARDS counter rows; database triggers bump the row
+of the changed slot (slot_id % VERSION_SHARDS) on every change to active bookings
+(insert, cancel/complete, delete) and to parking_slots, in the same transaction as
+the change. The version is the sum of the rows: every change adds exactly one, so it
+only ever grows. Sharding keeps booking commits for different slots from queueing on
+one counter row lock until commit, which would serialize them despite the per-slot
+locking in booking_commit.py.
+
+Every gunicorn worker, the async API and the maintenance scripts therefore agree on
+the version without talking to each other. Reading it is one small primary-key range
+scan, so an endpoint can tell whether an ETag it handed out earlier is still current
+without running its slot queries.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+# this is the number of counter rows; fixed by the triggers, so changing it needs a migration
+VERSION_SHARDS = 64
+
+# this is used to read the current version (a sum over VERSION_SHARDS primary-key rows)
+BOOKINGS_VERSION_SQL = "SELECT CAST(COALESCE(SUM(version), 0) AS UNSIGNED) AS version FROM bookings_version"
+
+CREATE_BOOKINGS_VERSION_MYSQL = """
+    CREATE TABLE IF NOT EXISTS bookings_version (
+        id TINYINT UNSIGNED NOT NULL,
+        version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (id)
+    ) ENGINE=InnoDB
+"""
+
+CREATE_BOOKINGS_VERSION_SQLITE = """
+    CREATE TABLE IF NOT EXISTS bookings_version (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+# (trigger name, event, table, row holding slot_id, extra WHERE condition for the bump)
+# Only active bookings show up in the availability and slot payloads, so changes to
+# completed/cancelled rows (e.g. archiving) leave the version alone
+VERSION_TRIGGERS = [
+    ("trg_bookings_insert_version", "INSERT", "bookings", "NEW", ""),
+    (
+        "trg_bookings_update_version", "UPDATE", "bookings", "NEW",
+        "(OLD.status = 'active' OR NEW.status = 'active')",
+    ),
+    ("trg_bookings_delete_version", "DELETE", "bookings", "OLD", "OLD.status = 'active'"),
+    ("trg_slots_insert_version", "INSERT", "parking_slots", "NEW", ""),
+    ("trg_slots_update_version", "UPDATE", "parking_slots", "NEW", ""),
+    ("trg_slots_delete_version", "DELETE", "parking_slots", "OLD", ""),
+]
+
+
+def _bump_statement(row: str, condition: str) -> str:
+    bump = f"UPDATE bookings_version SET version = version + 1 WHERE id = {row}.slot_id % {VERSION_SHARDS}"
+    return f"{bump} AND {condition}" if condition else bump
+
+
+def _shard_rows() -> str:
+    # Row 1 is the single counter of databases created before sharding; it keeps its count
+    return ", ".join(f"({shard}, 0)" for shard in range(VERSION_SHARDS))
+
+
+def create_mysql_version_table(cursor):
+    """Create the counter rows and their triggers (MySQL); safe to re-run."""
+    cursor.execute(CREATE_BOOKINGS_VERSION_MYSQL)
+    cursor.execute(f"INSERT IGNORE INTO bookings_version (id, version) VALUES {_shard_rows()}")
+    for name, event, table, row, condition in VERSION_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW {_bump_statement(row, condition)}"
+        )
+
+
+def create_sqlite_version_table(conn):
+    """Create the counter rows and their triggers (SQLite); safe to re-run."""
+    script = CREATE_BOOKINGS_VERSION_SQLITE + (
+        f"INSERT OR IGNORE INTO bookings_version (id, version) VALUES {_shard_rows()};\n"
+    ) + "".join(
+        f"DROP TRIGGER IF EXISTS {name};\n"
+        f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+        f"BEGIN {_bump_statement(row, condition)}; END;\n"
+        for name, event, table, row, condition in VERSION_TRIGGERS
+    )
+    conn.executescript(script)
+
+
+def fetch_bookings_version(cursor) -> int:
+    cursor.execute(BOOKINGS_VERSION_SQL)
+    row = cursor.fetchone()
+    return row["version"] if row else 0
+
+
+def encode_json(payload) -> bytes:
+    """The compact, key-sorted JSON encoding jsonify() uses; encoded once, hashed and sent as is."""
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str).encode()
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag (unquoted) of an encoded response body."""
+    return hashlib.sha1(body).hexdigest()[:24]
+
+
+class SlotsValidator:
+    """
+    Remembers the ETag of the last /api/dashboard/slots payload (one per format), the
+    bookings version it was built at and the moment a slot next changes state on its
+    own (reserved -> occupied -> available). While both still hold, a request
+    presenting that ETag can be answered 304 from the version lookup alone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._etags: Dict[str, str] = {}
+        self._valid_until: Optional[datetime] = None
+
+    def current(self, version: int, now: datetime, fmt: str = "full") -> Optional[str]:
+        """The remembered ETag if it still describes the slots at `version` and `now`."""
+        with self._lock:
+            if self._version != version:
+                return None
+            if self._valid_until is not None and now >= self._valid_until:
+                return None
+            return self._etags.get(fmt)
+
+    def store(self, version: int, body: bytes, valid_until: Optional[datetime], fmt: str = "full") -> str:
+        """Remember the ETag of an encoded payload built at `version`; returns it."""
+        etag = body_etag(body)
+        with self._lock:
+            if (version, valid_until) != (self._version, self._valid_until):
+                # Built from other data: the other formats' ETags no longer apply
+                self._etags = {}
+            self._version = version
+            self._etags[fmt] = etag
+            self._valid_until = valid_until
+        return etag
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "etags": dict(self._etags),
+                "valid_until": self._valid_until.isoformat() if self._valid_until else None,
+            }
@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+# Measure a plain boot: no migrations, query counting on
+os.environ["AUTO_MIGRATE"] = "0"
+os.environ["QUERY_STATS_ENABLED"] = "1"
+
+# Importing app may only check the schema version (migrations.current_version)
+MAX_IMPORT_QUERIES = 2
+# Generous for a cold interpreter; loading the booking index at import blows well past it
+MAX_IMPORT_MS = float(os.getenv("CHECK_BOOT_MAX_MS", 2000))
+
+
+def check_boot():
+    """Import app and check it did no background work: no threads, processes or index load."""
+    threads_before = set(threading.enumerate())
+    started = time.perf_counter()
+    import app
+    import_ms = (time.perf_counter() - started) * 1000
+
+    checks = {
+        f"import took {import_ms:.1f} ms (max {MAX_IMPORT_MS:.0f})": import_ms <= MAX_IMPORT_MS,
+        f"{app.query_stats.snapshot()['queries']} queries (max {MAX_IMPORT_QUERIES})":
+            app.query_stats.snapshot()["queries"] <= MAX_IMPORT_QUERIES,
+        "booking index not loaded": not app.booking_index.ready,
+        "booking scheduler not running": not app.booking_scheduler.stats()["running"],
+        "no new threads": set(threading.enumerate()) <= threads_before,
+        "no hashing processes": not multiprocessing.active_children(),
+    }
+    for name, passed in checks.items():
+        print(f"{name}: {'OK' if passed else 'FAILED'}")
+    return all(checks.values())
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_boot() else 1)
@@ -0,0 +1,63 @@
+import sys
+
+from app import app, dashboard_cache, get_db_connection
+from dashboard_summary import fetch_dashboard_data
+
+# The dashboard summary is one aggregate query; anything more is a regression
+EXPECTED_ROUND_TRIPS = 1
+
+# The dashboard.html element each summary field is rendered into
+KPI_ELEMENTS = {"total_slots": "kpiTotalSlots", "total_users": "kpiTotalUsers"}
+
+
+class CountingCursor:
+    """Cursor wrapper counting the statements sent to the database."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.statements = []
+
+    def execute(self, sql, args=None):
+        self.statements.append(" ".join(sql.split()))
+        return self._cursor.execute(sql, args)
+
+    def executemany(self, sql, args):
+        self.statements.append(" ".join(sql.split()))
+        return self._cursor.executemany(sql, args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def check_dashboard_queries():
+    """Count fetch_dashboard_data's round trips and check the page renders its KPIs."""
+    ok = True
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            counting = CountingCursor(cursor)
+            data = fetch_dashboard_data(counting)
+    finally:
+        conn.close()
+
+    round_trips = len(counting.statements)
+    print(f"fetch_dashboard_data: {round_trips} round trip(s), expected {EXPECTED_ROUND_TRIPS}")
+    for sql in counting.statements:
+        print(f"  {sql}")
+    ok = ok and round_trips == EXPECTED_ROUND_TRIPS
+
+    # Every field the summary computes must end up in the rendered page
+    dashboard_cache.invalidate()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(user_id=0, username="check", full_name="Check", role="admin")
+    page = client.get("/dashboard").get_data(as_text=True)
+    for field, value in data.items():
+        rendered = field in KPI_ELEMENTS and f'id="{KPI_ELEMENTS[field]}">{value}<' in page
+        print(f"{field}={value}: {'rendered' if rendered else 'NOT RENDERED'}")
+        ok = ok and rendered
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_dashboard_queries() else 1)
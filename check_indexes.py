@@ -0,0 +1,47 @@
+import sys
+from datetime import datetime, timedelta
+
+from app import DB_BACKEND, get_db_connection
+from booking_commit import SLOT_CONFLICT_SQL
+from slot_state import SLOT_STATE_SQL
+
+# Hot booking queries and the index each must range-scan instead of scanning bookings:
+# (name, SQL, params, table alias in the plan, expected index). MySQL only: the SQLite
+# backend has its own planner and EXPLAIN output.
+CHECKS = [
+    # Conflict check on every booking commit: slot + active + entry/exit window
+    ("slot_conflict", SLOT_CONFLICT_SQL, "bookings", "idx_slot_status_window"),
+    # Per-slot "next active booking" subquery of the dashboard slot states
+    ("slot_state", SLOT_STATE_SQL, "nb", "idx_slot_status_exit"),
+]
+
+
+def check_indexes():
+    """Run EXPLAIN on the hot booking queries and report which index MySQL picks."""
+    entry = datetime.now().replace(minute=0, second=0, microsecond=0)
+    params = {
+        "slot_conflict": (1, entry + timedelta(hours=2), entry),
+        "slot_state": None,
+    }
+    ok = True
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            for name, sql, table, index in CHECKS:
+                cursor.execute("EXPLAIN " + sql, params[name])
+                plan = [row for row in cursor.fetchall() if row.get("table") == table]
+                keys = [row.get("key") for row in plan]
+                uses_index = index in keys
+                ok = ok and uses_index
+                print(f"{name}: key={keys} type={[row.get('type') for row in plan]} "
+                      f"{'OK' if uses_index else f'NOT USING {index}'}")
+    finally:
+        conn.close()
+    return ok
+
+
+if __name__ == "__main__":
+    if DB_BACKEND != "mysql":
+        print(f"check_indexes.py checks MySQL query plans; skipped for DB_BACKEND={DB_BACKEND}")
+        sys.exit(0)
+    sys.exit(0 if check_indexes() else 1)
@@ -0,0 +1,64 @@
+"""
+gzip / brotli compression of API and page responses.
+
+Used as an after_request hook by app.py and by async_api.py's send_json. Brotli is
+optional (pip install Brotli); without it clients that also accept gzip get gzip.
+Streams (the dashboard SSE endpoint), small bodies and non-text responses are left
+alone. A compressed response's ETag is made weak, since the bytes on the wire differ
+from the identity representation while the content is the same.
+"""
+import gzip
+from typing import Optional
+
+from werkzeug.datastructures import Accept
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript")
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    mimetype = mimetype or ""
+    return mimetype.startswith(COMPRESSIBLE_TYPES) or mimetype.endswith("+json")
+
+
+def choose_encoding(accept_encodings: Accept) -> Optional[str]:
+    """Best supported coding the client accepts: "br", "gzip" or None."""
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, level: int = 5) -> bytes:
+    """Compress with a fast setting: these responses are built per request, not cached."""
+    if encoding == "br":
+        return brotli.compress(body, quality=min(level, 11))
+    return gzip.compress(body, compresslevel=min(level, 9), mtime=0)
+
+
+def compress_response(response, accept_encodings: Accept, min_size: int = 1024, level: int = 5):
+    """Compress a werkzeug response in place when worthwhile; returns it."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or not is_compressible(response.mimetype)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None or len(body) < min_size:
+        return response
+    response.set_data(compress(body, encoding, level))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# this is used to fetch the dashboard KPIs rendered into the page: one aggregate row.
+# Slot states (occupied / reserved / available) come from /api/dashboard/slots instead.
+DASHBOARD_KPI_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM parking_slots) AS total_slots,
+        COALESCE(SUM(role = 'user'), 0) AS total_users
+    FROM users
+"""
+
+
+def fetch_dashboard_data(cursor) -> Dict:
+    """
+    Collect the KPIs the dashboard page renders on first paint in one round trip:
+    the slot count (same as /api/dashboard/slots' kpis.total) and the user count
+    (same as /api/dashboard/users' total).
+    """
+    cursor.execute(DASHBOARD_KPI_SQL)
+    kpis = cursor.fetchone()
+    return {
+        "total_slots": int(kpis["total_slots"]),
+        "total_users": int(kpis["total_users"]),
+    }
+
+
+class DashboardSummaryCache:
+    """
+    Holds the last dashboard summary for a few seconds so page loads in a burst
+    share one query. Any user or slot write in this process clears it; the TTL
+    bounds how stale writes from other workers can look.
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value: Optional[Dict] = None
+        self._expires = 0.0
+        # Bumped on every invalidation so a load racing a write is not cached
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, loader: Callable[[], Dict]) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            if self._value is not None and self._expires > now:
+                self._hits += 1
+                return self._value
+            self._misses += 1
+            generation = self._generation
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._value = value
+                self._expires = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "cached": self._value is not None and self._expires > time.monotonic(),
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
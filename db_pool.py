@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import pymysql
+
+
+class PoolTimeout(pymysql.err.OperationalError):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled DB-API connection.
+
+    Behaves like the raw connection (cursor/commit/rollback/...), except that
+    close() hands the connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw, created_at: float):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._last_used = time.monotonic()
+        self._leases = 0
+        self._released = True
+        # Bumped on every checkout so a stale holder can tell the connection moved on
+        self._checkout = 0
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        wrap = self._pool.cursor_wrapper
+        return wrap(cursor) if wrap is not None else cursor
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def close(self):
+        """Drop one lease; the connection returns to the pool when the last lease closes."""
+        if self._released:
+            return
+        self._leases -= 1
+        if self._leases <= 0:
+            self._pool.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of DB-API connections.
+
+    - at most `max_size` connections are open at any time
+    - idle connections are pinged on checkout once they have been idle for
+      `ping_interval` seconds (0 = ping on every checkout)
+    - connections older than `max_lifetime` seconds are recycled
+    - callers wait up to `timeout` seconds for a free connection, then get PoolTimeout
+    - `cursor_wrapper`, if given, wraps every cursor handed out (e.g. for query timing)
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], object],
+        max_size: int = 10,
+        timeout: float = 5.0,
+        max_lifetime: float = 1800.0,
+        ping_interval: float = 5.0,
+        cursor_wrapper: Optional[Callable[[object], object]] = None,
+    ):
+        self._connect = connect
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self.cursor_wrapper = cursor_wrapper
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: deque = deque()
+        self._open = 0
+
+        # Metrics (guarded by self._cond)
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._broken = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self) -> PooledConnection:
+        """Check out a healthy connection, opening a new one if the pool has room."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            conn = None
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout:.1f}s waiting for a database connection"
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    # Reserve a slot before connecting so we never exceed max_size
+                    self._open += 1
+
+            if conn is None:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            conn._released = False
+            conn._leases = 1
+            conn._checkout += 1
+            return conn
+
+    def release(self, conn: PooledConnection):
+        """Return a connection to the pool, rolling back any open transaction."""
+        if conn._released:
+            return
+        conn._released = True
+        conn._leases = 0
+        try:
+            # Reset transaction state so the next borrower never sees a stale snapshot
+            conn._raw.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        if time.monotonic() - conn._created_at > self.max_lifetime:
+            with self._cond:
+                self._recycled += 1
+            self._discard(conn)
+            return
+        conn._last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown; after a fork use reset_after_fork())."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn._raw.close()
+            except Exception:
+                pass
+
+    def reset_after_fork(self):
+        """
+        Forget every connection inherited from the parent process without closing it.
+        Closing would send a quit on the socket the parent (or a sibling) still uses.
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._open = 0
+
+    def stats(self) -> Dict:
+        """Snapshot of pool usage and checkout wait-time metrics."""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "max_size": self.max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "broken": self._broken,
+                "wait_ms_total": round(self._wait_total * 1000, 3),
+                "wait_ms_avg": round(self._wait_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
+
+    def _new_connection(self) -> PooledConnection:
+        raw = self._connect()
+        with self._cond:
+            self._created += 1
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        now = time.monotonic()
+        if now - conn._created_at > self.max_lifetime:
+            with self._cond:
+                self._recycled += 1
+            return False
+        if now - conn._last_used < self.ping_interval:
+            return True
+        try:
+            conn._raw.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._broken += 1
+            return False
+
+    def _discard(self, conn: PooledConnection):
+        try:
+            conn._raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+
+def request_connection(pool: ConnectionPool, g, has_request_context: Callable[[], bool]) -> PooledConnection:
+    """
+    Return the connection pinned to the current request (via Flask `g`), checking one
+    out on first use. Nested callers share it; it goes back to the pool when the
+    last caller closes it or at request teardown, whichever comes first.
+    Outside a request (startup, scripts) every call gets its own checkout.
+    """
+    if not has_request_context():
+        return pool.acquire()
+    conn: Optional[PooledConnection] = g.get("_db_conn")
+    # Once released, the connection may already be checked out by another request
+    if conn is None or conn._released or conn._checkout != g.get("_db_checkout"):
+        conn = pool.acquire()
+        g._db_conn = conn
+        g._db_checkout = conn._checkout
+    else:
+        conn._leases += 1
+    return conn
+
+
+def release_request_connection(pool: ConnectionPool, g):
+    """Teardown hook: return the request's connection even if a route forgot to close it."""
+    conn: Optional[PooledConnection] = g.pop("_db_conn", None)
+    checkout = g.pop("_db_checkout", None)
+    if conn is not None and conn._checkout == checkout:
+        pool.release(conn)
@@ -0,0 +1,54 @@
+"""
+Production server settings: gunicorn -c gunicorn.conf.py app:app
+
+Every knob can be set from the environment (GUNICORN_*); the defaults suit a small
+VM. Each worker process gets its own DB pool (MYSQL_POOL_SIZE should be at least
+GUNICORN_THREADS), booking index, caches and scheduler thread; start_worker() in
+app.py starts them once the worker has loaded the app.
+
+With preload (default) the app is imported once in the master and forked, so
+workers boot fast and share the imported code copy-on-write; before_fork()
+and init_worker() in app.py drop what must not cross the fork. Reload code with
+`kill -USR2 <master>` (new master + workers, then QUIT the old master); HUP only
+restarts workers from the already-loaded code when preloading.
+"""
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# Threads per worker: requests mostly wait on the database, and the SSE stream
+# holds one thread per open dashboard
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks cannot build up; jitter avoids all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+# Empty GUNICORN_ACCESS_LOG turns the access log off
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def pre_fork(server, worker):
+    # Master, before every fork: with preload the app is already imported here
+    if "app" in sys.modules:
+        sys.modules["app"].before_fork()
+
+
+def post_fork(server, worker):
+    # Without preload the worker has not imported the app yet: nothing was inherited
+    if "app" in sys.modules:
+        sys.modules["app"].init_worker()
+
+
+def post_worker_init(worker):
+    # Worker, app loaded (preloaded or just imported), before it serves requests
+    sys.modules["app"].start_worker()
@@ -0,0 +1,194 @@
+"""
+Prometheus-style metrics without a client library.
+
+Counters and histograms are sharded per thread: a thread only ever writes its own
+dict, so the hot path is a dict update with no lock. A scrape sums the shards (and
+folds shards of finished threads into a retired total so they do not pile up).
+Gauges are callbacks evaluated at scrape time.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets (seconds) for request histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Shards:
+    """Per-thread value dicts of one metric."""
+
+    def __init__(self, merge: Callable[[Dict, Dict], None]):
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict = {}
+
+    def local(self) -> Dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+            return values
+
+    def collect(self) -> Dict:
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    # A finished thread never writes again: fold it into the retired total
+                    self._merge(self._retired, values)
+            self._shards = live
+            total: Dict = {}
+            self._merge(total, self._retired)
+            for _, values in live:
+                # dict.copy() is atomic under the GIL, so a concurrent writer is safe
+                self._merge(total, values.copy())
+            return total
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards(self._merge)
+
+    @staticmethod
+    def _merge(into: Dict, values: Dict):
+        for key, value in values.items():
+            into[key] = into.get(key, 0) + value
+
+    def inc(self, *labelvalues, amount: float = 1):
+        values = self._shards.local()
+        values[labelvalues] = values.get(labelvalues, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self._shards.collect().items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _Shards(self._merge)
+
+    @staticmethod
+    def _merge(into: Dict, values: Dict):
+        for key, series in values.items():
+            current = into.get(key)
+            if current is None:
+                into[key] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    current[i] += value
+
+    def observe(self, value: float, *labelvalues):
+        values = self._shards.local()
+        series = values.get(labelvalues)
+        if series is None:
+            # one slot per bucket, then +Inf, sum and count
+            series = values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = [_number(float(b)) for b in self.buckets] + ["+Inf"]
+        for key, series in sorted(self._shards.collect().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}"
+
+
+class CallbackMetric:
+    """
+    Gauge (or externally maintained counter) read at scrape time.
+    `read` returns a number, or a list of (labelvalues, number) pairs.
+    """
+
+    def __init__(self, name: str, help_text: str, read: Callable, labelnames: Sequence[str] = (),
+                 kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self._read = read
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        value = self._read()
+        samples = value if isinstance(value, list) else [((), value)]
+        for key, sample in samples:
+            if sample is not None:
+                yield f"{self.name}{_labels(self.labelnames, key)} {_number(sample)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def gauge(self, name: str, help_text: str, read: Callable, labelnames: Sequence[str] = (),
+              kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, read, labelnames, kind))
+
+    def render(self) -> str:
+        """Text exposition format (version 0.0.4) of every registered metric."""
+        lines: List[str] = []
+        for metric in list(self._metrics):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One failing gauge must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {type(e).__name__}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,360 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once and is recorded in the `schema_version` table, so app
+startup only has to compare MAX(version) with LATEST_VERSION (one cheap query)
+instead of re-running DDL, INFORMATION_SCHEMA lookups and seed UPDATEs on every
+worker boot. Apply pending migrations explicitly:
+
+    flask --app app migrate
+    flask --app app schema-version
+
+Migration 1 is the old init_db() schema step and is safe on databases created
+before this table existed (CREATE TABLE IF NOT EXISTS + INFORMATION_SCHEMA checks).
+"""
+import logging
+from typing import Callable, List, Tuple
+
+import pymysql
+from werkzeug.security import generate_password_hash
+
+import sqlite_backend
+from booking_archive import CREATE_ARCHIVE_TABLE_SQL
+from bookings_version import create_mysql_version_table, create_sqlite_version_table
+
+logger = logging.getLogger(__name__)
+
+CREATE_SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT NOT NULL PRIMARY KEY,
+        description VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Serializes concurrent `migrate` runs against one MySQL database (release phase + workers)
+MIGRATION_LOCK_NAME = "parking_schema_migrations"
+
+# Default slot names and locations seeded by migration 2
+DEFAULT_SLOT_LOCATIONS = [
+    ("P01", "CCIS Building - Front Row, Left Side"),
+    ("P02", "CCIS Building - Front Row, Left Center"),
+    ("P03", "CCIS Building - Front Row, Center"),
+    ("P04", "CCIS Building - Front Row, Right Center"),
+    ("P05", "CCIS Building - Front Row, Right Side"),
+    ("P06", "CCIS Building - Back Row, Left Side"),
+    ("P07", "CCIS Building - Back Row, Left Center"),
+    ("P08", "CCIS Building - Back Row, Center"),
+    ("P09", "CCIS Building - Back Row, Right Center"),
+    ("P10", "CCIS Building - Back Row, Right Side"),
+]
+
+
+def _create_mysql_schema(cursor, database):
+    """Create or upgrade the MySQL tables and indexes (INFORMATION_SCHEMA checks for older installs)."""
+    # Create users table - stores student authentication information
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+            username VARCHAR(50) NOT NULL,
+            full_name VARCHAR(150) NOT NULL,
+            email VARCHAR(255) NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            role ENUM('user', 'admin') DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id),
+            UNIQUE KEY uniq_username (username),
+            KEY idx_role_created (role, created_at, user_id),
+            KEY idx_full_name (full_name)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """
+    )
+
+    # Check and add full_name column if missing
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS col_exists
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+          AND TABLE_NAME = 'users'
+          AND COLUMN_NAME = 'full_name';
+        """,
+        (database,),
+    )
+    if cursor.fetchone()["col_exists"] == 0:
+        cursor.execute(
+            "ALTER TABLE users ADD COLUMN full_name VARCHAR(150) NOT NULL DEFAULT 'Unnamed User';"
+        )
+
+    # Check and add role column if missing
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS col_exists
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+          AND TABLE_NAME = 'users'
+          AND COLUMN_NAME = 'role';
+        """,
+        (database,),
+    )
+    if cursor.fetchone()["col_exists"] == 0:
+        cursor.execute(
+            "ALTER TABLE users ADD COLUMN role ENUM('user', 'admin') DEFAULT 'user' AFTER password_hash;"
+        )
+
+    # Indexes for the admin user list (keyset paging + name prefix search)
+    for index_name, definition in (
+        ("idx_role_created", "(role, created_at, user_id)"),
+        ("idx_full_name", "(full_name)"),
+    ):
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS idx_exists
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s
+              AND TABLE_NAME = 'users'
+              AND INDEX_NAME = %s;
+            """,
+            (database, index_name),
+        )
+        if cursor.fetchone()["idx_exists"] == 0:
+            cursor.execute(f"ALTER TABLE users ADD KEY {index_name} {definition};")
+
+    # Create parking_slots table - stores available parking spaces
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS parking_slots (
+            slot_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+            slot_name VARCHAR(10) NOT NULL,
+            is_available TINYINT(1) DEFAULT 1,
+            location VARCHAR(150) DEFAULT 'Nwssu Calbayog City, Samar, Philippines',
+            PRIMARY KEY (slot_id),
+            UNIQUE KEY uniq_slot_name (slot_name)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """
+    )
+
+    # Create bookings table - links users to parking slots with time information
+    # Foreign keys ensure referential integrity (cascade on delete/update)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bookings (
+            booking_id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+            user_id INT UNSIGNED NOT NULL,
+            slot_id INT UNSIGNED NOT NULL,
+            entry_date DATE NOT NULL,
+            entry_time TIME NOT NULL,
+            exit_date DATE NOT NULL,
+            exit_time TIME NOT NULL,
+            status ENUM('active', 'completed', 'cancelled') DEFAULT 'active',
+            booked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            entry_ts DATETIME AS (TIMESTAMP(entry_date, entry_time)) STORED,
+            exit_ts DATETIME AS (TIMESTAMP(exit_date, exit_time)) STORED,
+            PRIMARY KEY (booking_id),
+            UNIQUE KEY uniq_slot_datetime (slot_id, entry_date, entry_time),
+            KEY idx_slot_status_window (slot_id, status, entry_ts, exit_ts),
+            KEY idx_slot_status_exit (slot_id, status, exit_ts),
+            KEY idx_status_exit_window (status, exit_ts, entry_ts, slot_id),
+            KEY idx_user_booked (user_id, booked_at),
+            CONSTRAINT fk_bookings_user FOREIGN KEY (user_id)
+                REFERENCES users (user_id) ON DELETE CASCADE ON UPDATE CASCADE,
+            CONSTRAINT fk_bookings_slot FOREIGN KEY (slot_id)
+                REFERENCES parking_slots (slot_id) ON DELETE CASCADE ON UPDATE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """
+    )
+
+    # Add stored entry/exit timestamps + composite index to older bookings tables
+    # so overlap queries can range-scan instead of computing TIMESTAMP() per row
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS col_exists
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+          AND TABLE_NAME = 'bookings'
+          AND COLUMN_NAME = 'entry_ts';
+        """,
+        (database,),
+    )
+    if cursor.fetchone()["col_exists"] == 0:
+        cursor.execute(
+            """
+            ALTER TABLE bookings
+                ADD COLUMN entry_ts DATETIME AS (TIMESTAMP(entry_date, entry_time)) STORED,
+                ADD COLUMN exit_ts DATETIME AS (TIMESTAMP(exit_date, exit_time)) STORED,
+                ADD KEY idx_slot_status_window (slot_id, status, entry_ts, exit_ts);
+            """
+        )
+
+    # Index used by the slot state query to seek each slot's next active booking
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS idx_exists
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = %s
+          AND TABLE_NAME = 'bookings'
+          AND INDEX_NAME = 'idx_slot_status_exit';
+        """,
+        (database,),
+    )
+    if cursor.fetchone()["idx_exists"] == 0:
+        cursor.execute(
+            "ALTER TABLE bookings ADD KEY idx_slot_status_exit (slot_id, status, exit_ts);"
+        )
+
+    # Covering index for the lot-wide availability range scan
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS idx_exists
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = %s
+          AND TABLE_NAME = 'bookings'
+          AND INDEX_NAME = 'idx_status_exit_window';
+        """,
+        (database,),
+    )
+    if cursor.fetchone()["idx_exists"] == 0:
+        cursor.execute(
+            "ALTER TABLE bookings ADD KEY idx_status_exit_window (status, exit_ts, entry_ts, slot_id);"
+        )
+
+    # Index backing the per-user history page (newest first)
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS idx_exists
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = %s
+          AND TABLE_NAME = 'bookings'
+          AND INDEX_NAME = 'idx_user_booked';
+        """,
+        (database,),
+    )
+    if cursor.fetchone()["idx_exists"] == 0:
+        cursor.execute("ALTER TABLE bookings ADD KEY idx_user_booked (user_id, booked_at);")
+
+    # Create bookings_archive table - old completed/cancelled bookings (see booking_archive.py)
+    cursor.execute(CREATE_ARCHIVE_TABLE_SQL)
+
+
+def _base_schema(conn, cursor, backend, database):
+    if backend == "sqlite":
+        sqlite_backend.create_schema(conn)
+    else:
+        _create_mysql_schema(cursor, database)
+
+
+def _seed_slots(conn, cursor, backend, database):
+    # Seed P01 through P10 on an empty table, otherwise bring older installs
+    # (P1-P10 names, no locations) in line
+    cursor.execute("SELECT COUNT(1) AS total FROM parking_slots;")
+    if cursor.fetchone()["total"] == 0:
+        cursor.executemany(
+            "INSERT INTO parking_slots (slot_name, location) VALUES (%s, %s);",
+            DEFAULT_SLOT_LOCATIONS,
+        )
+        return
+    for slot_name, location in DEFAULT_SLOT_LOCATIONS:
+        cursor.execute(
+            "UPDATE parking_slots SET location = %s WHERE slot_name = %s",
+            (location, slot_name)
+        )
+        # Also handle old format P1-P10
+        old_name = slot_name.lstrip("0").replace("P0", "P")
+        if old_name != slot_name:
+            cursor.execute(
+                "UPDATE parking_slots SET slot_name = %s, location = %s WHERE slot_name = %s",
+                (slot_name, location, old_name)
+            )
+
+
+def _default_admin(conn, cursor, backend, database):
+    # Default credentials: username=admin, password=admin123
+    cursor.execute("SELECT 1 FROM users WHERE username = %s;", ("admin",))
+    if cursor.fetchone() is None:
+        cursor.execute(
+            """
+            INSERT INTO users (username, full_name, password_hash, role)
+            VALUES (%s, %s, %s, %s);
+            """,
+            ("admin", "System Administrator", generate_password_hash("admin123"), "admin"),
+        )
+
+
+def _bookings_version(conn, cursor, backend, database):
+    # Counter row + triggers behind the ETags of the slot and availability endpoints
+    if backend == "sqlite":
+        create_sqlite_version_table(conn)
+    else:
+        create_mysql_version_table(cursor)
+
+
+def _shard_bookings_version(conn, cursor, backend, database):
+    # One counter row per slot shard: booking commits on different slots no longer
+    # serialize on a single row lock. Re-creating adds the rows and replaces the triggers.
+    _bookings_version(conn, cursor, backend, database)
+
+
+# this is the ordered list of migrations: (version, description, fn(conn, cursor, backend, database))
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "tables and indexes", _base_schema),
+    (2, "default parking slots P01-P10", _seed_slots),
+    (3, "default admin account", _default_admin),
+    (4, "bookings version counter and triggers", _bookings_version),
+    (5, "bookings version counter sharded by slot", _shard_bookings_version),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _missing_table(e: Exception) -> bool:
+    # MySQL ER_NO_SUCH_TABLE, or SQLite's message re-raised by sqlite_backend
+    return (e.args and e.args[0] == 1146) or "no such table" in str(e)
+
+
+def current_version(conn) -> int:
+    """Highest applied migration, 0 for a database that has never been migrated."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MAX(version) AS version FROM schema_version")
+            row = cursor.fetchone()
+    except (pymysql.err.ProgrammingError, pymysql.err.OperationalError) as e:
+        if not _missing_table(e):
+            raise
+        conn.rollback()
+        return 0
+    conn.commit()
+    return row["version"] or 0
+
+
+def migrate(conn, backend: str, database: str, target: int = LATEST_VERSION) -> List[int]:
+    """
+    Apply every migration above the current version up to `target`; returns the versions
+    applied. Each one is committed and recorded before the next starts.
+    """
+    with conn.cursor() as cursor:
+        if backend != "sqlite":
+            cursor.execute("SELECT GET_LOCK(%s, 60) AS locked", (MIGRATION_LOCK_NAME,))
+            if not cursor.fetchone()["locked"]:
+                raise RuntimeError("timed out waiting for another migration run to finish")
+        try:
+            cursor.execute(CREATE_SCHEMA_VERSION_SQL)
+            conn.commit()
+            # Read after taking the lock: another process may have just migrated
+            version = current_version(conn)
+            applied = []
+            for number, description, fn in MIGRATIONS:
+                if number <= version or number > target:
+                    continue
+                logger.info("applying migration %d: %s", number, description)
+                fn(conn, cursor, backend, database)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (number, description),
+                )
+                conn.commit()
+                applied.append(number)
+            return applied
+        finally:
+            if backend != "sqlite":
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+                cursor.fetchone()
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Too many password hashes are queued, or one timed out; the caller should answer 429."""
+
+
+def _hash(password: str, method: str) -> str:
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash: str, password: str) -> bool:
+    return check_password_hash(pwhash, password)
+
+
+def _watch_parent(parent_pid: int):
+    """Pool process initializer: exit once the server process that owns the pool is gone."""
+    def watch():
+        # A SIGKILLed/SIGTERMed parent never shuts the pool down, so poll instead
+        while os.getppid() == parent_pid:
+            time.sleep(1.0)
+        os._exit(0)
+
+    threading.Thread(target=watch, name="hasher-parent-watch", daemon=True).start()
+
+
+class PasswordHasher:
+    """
+    Runs werkzeug password hashing on a small process pool instead of the request thread.
+
+    At most `max_pending` hashes may be queued or running at once; past that,
+    hash()/verify() raise HashingBusy immediately instead of waiting, so a login
+    storm is turned away with 429s rather than tying up every request thread
+    (and the booking endpoints behind them).
+
+    workers=0 hashes inline on the calling thread (still bounded by max_pending), and
+    so does a process that has not called start(): the pool is only forked by an
+    explicit start() before other threads exist (each server worker at startup), never
+    lazily from a multithreaded server or a CLI script. A forked child (gunicorn
+    worker) must call start() again, since a pool cannot be shared across a fork.
+    A pool broken by a dead process (e.g. OOM-killed) is replaced once per hash; if
+    the new one breaks too, that hash runs inline. A hash that has not finished
+    after `timeout` seconds raises HashingBusy, like a full queue.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 method: str = "scrypt", timeout: float = 30.0):
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, int(workers))
+        self.max_pending = max(1, int(max_pending or 4 * max(1, self.workers)))
+        self.method = method
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started = False
+        self._current_prefix: Optional[str] = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._pool_restarts = 0
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # The parent's pool processes and management thread do not exist in the child
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._started = False
+        self._pending = 0
+
+    def start(self):
+        """Fork the worker processes now (call before starting other threads)."""
+        if self.workers:
+            self._started = True
+            reference = self._get_executor().submit(_hash, "", self.method).result()
+        else:
+            reference = _hash("", self.method)
+        self._current_prefix = reference.split("$", 1)[0]
+
+    def shutdown(self):
+        """Stop the worker processes; hashes run inline until start() is called again."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._started = False
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self, broken: Optional[ProcessPoolExecutor] = None) -> ProcessPoolExecutor:
+        with self._lock:
+            if broken is not None and self._executor is broken:
+                # Another thread may already have replaced it
+                self._executor = None
+                self._pool_restarts += 1
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_watch_parent,
+                    initargs=(os.getpid(),),
+                )
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingBusy()
+        with self._lock:
+            self._pending += 1
+        try:
+            if not (self.workers and self._started):
+                return fn(*args)
+            executor = self._get_executor()
+            try:
+                return self._submit(executor, fn, *args)
+            except BrokenProcessPool:
+                # A pool process died; the executor stays broken, so start a new one
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = self._get_executor(broken=executor)
+            try:
+                return self._submit(executor, fn, *args)
+            except BrokenProcessPool:
+                return fn(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def _submit(self, executor: ProcessPoolExecutor, fn, *args):
+        future = executor.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # The pool is stuck or far behind: shed load like a full queue (429)
+            future.cancel()
+            with self._lock:
+                self._rejected += 1
+            raise HashingBusy()
+
+    def hash(self, password: str) -> str:
+        """generate_password_hash() with the configured method, off the request thread."""
+        return self._run(_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        """check_password_hash(), off the request thread."""
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """True if `pwhash` was made with another method or older cost parameters."""
+        if self._current_prefix is None:
+            # e.g. "scrypt:32768:8:1", as werkzeug expands the configured method today
+            self._current_prefix = _hash("", self.method).split("$", 1)[0]
+        return pwhash.split("$", 1)[0] != self._current_prefix
+
+    def note_rehashed(self):
+        with self._lock:
+            self._rehashed += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._started,
+                "method": self.method,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "rehashed": self._rehashed,
+                "pool_restarts": self._pool_restarts,
+            }
@@ -0,0 +1,188 @@
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the per-statement latency histogram buckets; the last bucket is +Inf
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so executions differing only in literals share one key:
+    literals and placeholders become ?, IN lists collapse to IN (...), whitespace is squeezed.
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def redact_params(args) -> object:
+    """Replace parameter values with their type names so logs never carry user data."""
+    if args is None:
+        return None
+    if isinstance(args, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in args.items()}
+    if isinstance(args, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in args]
+    return f"<{type(args).__name__}>"
+
+
+class _StatementStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+
+class QueryStats:
+    """
+    In-process query timing, fed by InstrumentedCursor.
+
+    Aggregates count / total / max / latency histogram per SQL fingerprint for the
+    whole process, and keeps a per-request tally in the dict returned by
+    `request_store` (None outside a request). Statements slower than `slow_ms` are
+    logged with their parameters redacted.
+    """
+
+    def __init__(self, request_store: Callable[[], Optional[Dict]], slow_ms: float = 200.0,
+                 max_fingerprints: int = 500):
+        self._request_store = request_store
+        self.slow_ms = slow_ms
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._statements: Dict[str, _StatementStats] = {}
+        self._slow = 0
+        self._started = time.time()
+
+    def record(self, sql, args, elapsed: float):
+        key = fingerprint(sql if isinstance(sql, str) else str(sql))
+        ms = elapsed * 1000
+        bucket = len(HISTOGRAM_BOUNDS_MS)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                bucket = i
+                break
+
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= self.max_fingerprints:
+                    key = "<other>"
+                stats = self._statements.setdefault(key, _StatementStats())
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.buckets[bucket] += 1
+            slow = ms >= self.slow_ms
+            if slow:
+                self._slow += 1
+
+        store = self._request_store()
+        if store is not None:
+            store["count"] = store.get("count", 0) + 1
+            store["time"] = store.get("time", 0.0) + elapsed
+            per_statement = store.setdefault("statements", {})
+            count, total = per_statement.get(key, (0, 0.0))
+            per_statement[key] = (count + 1, total + elapsed)
+
+        if slow:
+            logger.warning("slow query (%.1f ms): %s params=%s", ms, key, redact_params(args))
+
+    def snapshot(self, top: int = 50) -> Dict:
+        """Process-wide totals plus the `top` fingerprints by total time."""
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": key,
+                    "count": s.count,
+                    "total_ms": round(s.total * 1000, 3),
+                    "avg_ms": round(s.total * 1000 / s.count, 3) if s.count else 0.0,
+                    "max_ms": round(s.max * 1000, 3),
+                    "histogram_ms": dict(
+                        zip([str(b) for b in HISTOGRAM_BOUNDS_MS] + ["+Inf"], s.buckets)
+                    ),
+                }
+                for key, s in self._statements.items()
+            ]
+            slow = self._slow
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return {
+            "since": self._started,
+            "slow_ms": self.slow_ms,
+            "slow_queries": slow,
+            "queries": sum(row["count"] for row in rows),
+            "fingerprints": len(rows),
+            "statements": rows[:top],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._slow = 0
+            self._started = time.time()
+
+
+def server_timing(store: Optional[Dict], top: int = 3) -> Optional[str]:
+    """
+    Build a Server-Timing header value from a request's tally (None if it ran no queries):
+    the total DB time, then the `top` statements by time (top=0: total only).
+    """
+    if not store or not store.get("count"):
+        return None
+    parts = [f'db;dur={store["time"] * 1000:.2f};desc="{store["count"]} queries"']
+    statements = sorted(store.get("statements", {}).items(), key=lambda item: item[1][1], reverse=True)
+    for i, (key, (count, total)) in enumerate(statements[:top], start=1):
+        desc = key[:80].replace('"', "'").replace("\\", "")
+        parts.append(f'sql{i};dur={total * 1000:.2f};desc="{count}x {desc}"')
+    return ", ".join(parts)
+
+
+class InstrumentedCursor:
+    """DB-API cursor proxy timing every execute()/executemany() into a QueryStats."""
+
+    def __init__(self, cursor, stats: QueryStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._stats.record(query, args, time.perf_counter() - started)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._stats.record(query, None, time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
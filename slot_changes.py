@@ -0,0 +1,117 @@
+"""
+Delta sync for /api/dashboard/slots?since=<version>.
+
+SlotChangeLog keeps the last slot snapshot a process built (by slot_id, at a bookings
+version) and a ring buffer of what changed between consecutive snapshots: one entry
+per version this process observed, listing the slot_ids whose state differed. A
+client that last synced at version `since` gets back only the slots named by the
+entries after it; the slot query runs once per version change per process, however
+many clients poll.
+
+Entries are derived by diffing snapshots rather than from booking_events, because
+the version is global (bookings_version.py) while events only cover this process'
+own writes. A version this process never observed, or one that has rolled out of the
+buffer, cannot be answered exactly (a slot booked and cancelled in between would be
+missed), so the caller falls back to a full snapshot.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, FrozenSet, Optional, Tuple
+
+from slot_stream import diff_slots
+
+
+class SlotChangeLog:
+    """Last slot snapshot plus a ring buffer of (from_version, to_version, changed slot_ids)."""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(1, int(capacity))
+        self._lock = threading.Lock()
+        self._entries: Deque[Tuple[int, int, FrozenSet[int]]] = deque()
+        # Oldest version the buffer can still answer from (None: only versions entries introduced)
+        self._base: Optional[int] = None
+        self._version: Optional[int] = None
+        self._valid_until: Optional[datetime] = None
+        self._kpis: Dict = {}
+        self._by_slot: Dict[int, Dict] = {}
+        self._deltas = 0
+        self._snapshots = 0
+
+    def fresh(self, version: int, now: datetime) -> bool:
+        """True while the stored snapshot still describes the slots at `version` and `now`."""
+        with self._lock:
+            if self._version != version:
+                return False
+            return self._valid_until is None or now < self._valid_until
+
+    def record(self, version: int, payload: Dict, valid_until: Optional[datetime]):
+        """Store a slot payload (build_slot_payload) built at `version`, logging what changed."""
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return  # a slower request built an older snapshot; keep the newer one
+            by_slot, changed, removed = diff_slots(self._by_slot, payload)
+            if self._version is None:
+                self._base = version
+            elif changed or removed or version != self._version:
+                # Same version with changes: a slot reached its reserved/occupied/free boundary
+                if len(self._entries) == self.capacity:
+                    dropped_from, dropped_to, _ = self._entries.popleft()
+                    self._base = dropped_to if dropped_from != dropped_to else None
+                ids = frozenset([slot["slot_id"] for slot in changed] + removed)
+                self._entries.append((self._version, version, ids))
+            self._version = version
+            self._valid_until = valid_until
+            self._kpis = payload["kpis"]
+            self._by_slot = by_slot
+
+    def _changed_since(self, since: int) -> Optional[set]:
+        ids = set()
+        for from_version, to_version, changed in reversed(self._entries):
+            if from_version == to_version == since:
+                # Time-driven changes at the client's version: it may predate them
+                ids |= changed
+            elif to_version == since:
+                return ids
+            elif from_version < since:
+                return None  # the client's version fell between two snapshots taken here
+            else:
+                ids |= changed
+        return ids if since == self._base else None
+
+    def delta(self, since: int) -> Dict:
+        """
+        The slots that changed since `since` ({"full": false, "changed", "removed"}), or
+        the whole snapshot ({"full": true, "slots"}) when that version cannot be answered.
+        """
+        with self._lock:
+            ids = self._changed_since(since) if since <= (self._version or 0) else None
+            if ids is None:
+                self._snapshots += 1
+                return {
+                    "version": self._version,
+                    "full": True,
+                    "kpis": self._kpis,
+                    "slots": list(self._by_slot.values()),
+                }
+            self._deltas += 1
+            return {
+                "version": self._version,
+                "full": False,
+                "kpis": self._kpis,
+                "changed": [self._by_slot[i] for i in sorted(ids) if i in self._by_slot],
+                "removed": sorted(i for i in ids if i not in self._by_slot),
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "oldest_version": self._base if self._base is not None else (
+                    self._entries[0][1] if self._entries else None
+                ),
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "deltas_served": self._deltas,
+                "full_snapshots_served": self._snapshots,
+            }
@@ -0,0 +1,165 @@
+from typing import Dict, List
+
+# Minutes before entry at which a reserved slot is shown as occupied
+OCCUPIED_LEAD_MINUTES = 15
+
+# this is the media type (or ?format=compact) selecting the columnar slot payload
+COMPACT_SLOTS_MEDIA_TYPE = "application/vnd.parking.slots.compact+json"
+# State codes used by the compact payload (index into this tuple)
+SLOT_STATES = ("available", "occupied", "reserved")
+
+# this is used to compute the current state of every slot in one round trip.
+# For each slot the correlated subquery seeks idx_slot_status_exit for the active
+# booking that ends first from now on: bookings on a slot never overlap, so that is
+# either the booking in progress (occupied) or the next one (reserved). Cost is one
+# index seek per slot, independent of how far ahead reservations are made.
+SLOT_STATE_SQL = f"""
+    SELECT
+        s.slot_id,
+        s.slot_name,
+        s.is_available,
+        u.username AS occupant,
+        u.full_name AS occupant_name,
+        b.booking_id,
+        b.entry_date,
+        b.entry_time,
+        b.exit_date,
+        b.exit_time,
+        b.status,
+        b.entry_ts,
+        b.exit_ts,
+        CASE
+            WHEN b.booking_id IS NULL THEN 'available'
+            WHEN b.entry_ts <= DATE_ADD(NOW(), INTERVAL {OCCUPIED_LEAD_MINUTES} MINUTE) THEN 'occupied'
+            ELSE 'reserved'
+        END AS state
+    FROM (
+        SELECT
+            ps.slot_id,
+            ps.slot_name,
+            ps.is_available,
+            (
+                SELECT nb.booking_id
+                FROM bookings nb
+                WHERE nb.slot_id = ps.slot_id
+                  AND nb.status = 'active'
+                  AND nb.exit_ts >= NOW()
+                ORDER BY nb.exit_ts
+                LIMIT 1
+            ) AS booking_id
+        FROM parking_slots ps
+    ) s
+    LEFT JOIN bookings b ON b.booking_id = s.booking_id
+    LEFT JOIN users u ON u.user_id = b.user_id
+    ORDER BY s.slot_name
+"""
+
+
+def _s(v):
+    return None if v is None else str(v)
+
+
+def fetch_slot_states(cursor) -> List[Dict]:
+    """Run the slot state query and return one row per slot."""
+    cursor.execute(SLOT_STATE_SQL)
+    return cursor.fetchall()
+
+
+def build_slot_payload(rows: List[Dict]) -> Dict:
+    """Shape slot state rows into the /api/dashboard/slots JSON payload."""
+    slots = []
+    for row in rows:
+        has_booking = row["state"] != "available"
+        slots.append(
+            {
+                "slot_name": row["slot_name"],
+                "slot_id": row["slot_id"],
+                "occupied": row["state"] == "occupied",
+                "state": row["state"],
+                "username": row["occupant"] if has_booking else "",
+                "occupant_name": row["occupant_name"],
+                "entry_date": _s(row["entry_date"]),
+                "entry_time": _s(row["entry_time"]),
+                "exit_date": _s(row["exit_date"]),
+                "exit_time": _s(row["exit_time"]),
+                "status": row["status"],
+                "booking_id": row["booking_id"],
+                "is_available": row.get("is_available", 1),
+            }
+        )
+
+    total = len(slots)
+    occupied = sum(1 for s in slots if s["state"] == "occupied")
+    reserved = sum(1 for s in slots if s["state"] == "reserved")
+    return {
+        "kpis": {
+            "total": total,
+            "occupied": occupied,
+            "reserved": reserved,
+            "available": total - occupied - reserved,
+        },
+        "slots": slots,
+    }
+
+
+def build_compact_slot_payload(rows: List[Dict]) -> Dict:
+    """
+    Columnar form of build_slot_payload(): one array per field instead of one dict
+    per slot, so field names are not repeated for every slot:
+
+        {"format": "compact", "kpis": {...}, "states": [...], "occupants": [[username, full_name], ...],
+         "slots": {"slot_id": [...], "slot_name": [...], "state": [...], "occupant": [...],
+                   "booking_id": [...], "entry": [...], "exit": [...], "is_available": [...]}}
+
+    `state` holds indexes into `states` and `occupant` indexes into `occupants` (each
+    occupant is listed once) or null. `entry`/`exit` are "<date> <time>" or null.
+    The default shape's `occupied` and `status` follow from `state` ("active"
+    whenever a slot has a booking).
+    """
+    codes = {state: code for code, state in enumerate(SLOT_STATES)}
+    counts = [0] * len(SLOT_STATES)
+    occupants: List[List] = []
+    occupant_codes: Dict = {}
+    slot_ids, names, states, occupant_col, booking_ids, entries, exits, available = ([] for _ in range(8))
+    for row in rows:
+        code = codes[row["state"]]
+        counts[code] += 1
+        occupant = None
+        if code:
+            key = (row["occupant"], row["occupant_name"])
+            occupant = occupant_codes.get(key)
+            if occupant is None:
+                occupant = occupant_codes[key] = len(occupants)
+                occupants.append(list(key))
+        slot_ids.append(row["slot_id"])
+        names.append(row["slot_name"])
+        states.append(code)
+        occupant_col.append(occupant)
+        booking_ids.append(row["booking_id"])
+        entries.append(None if row["entry_date"] is None else f"{row['entry_date']} {row['entry_time']}")
+        exits.append(None if row["exit_date"] is None else f"{row['exit_date']} {row['exit_time']}")
+        available.append(row.get("is_available", 1))
+
+    total = len(rows)
+    occupied, reserved = counts[codes["occupied"]], counts[codes["reserved"]]
+    return {
+        "format": "compact",
+        "kpis": {
+            "total": total,
+            "occupied": occupied,
+            "reserved": reserved,
+            "available": total - occupied - reserved,
+        },
+        "states": list(SLOT_STATES),
+        "occupants": occupants,
+        "slots": {
+            "slot_id": slot_ids,
+            "slot_name": names,
+            "state": states,
+            "occupant": occupant_col,
+            "booking_id": booking_ids,
+            "entry": entries,
+            "exit": exits,
+            "is_available": available,
+        },
+    }
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from slot_state import OCCUPIED_LEAD_MINUTES, build_slot_payload
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def next_transition(rows: List[Dict], now: datetime) -> Optional[datetime]:
+    """Earliest moment a slot changes state on its own (reserved -> occupied -> available)."""
+    lead = timedelta(minutes=OCCUPIED_LEAD_MINUTES)
+    candidates = []
+    for row in rows:
+        if row["state"] == "reserved" and row.get("entry_ts"):
+            candidates.append(row["entry_ts"] - lead)
+        elif row["state"] == "occupied" and row.get("exit_ts"):
+            # Occupied while exit_ts >= NOW(), so it frees up just after exit_ts
+            candidates.append(row["exit_ts"] + timedelta(seconds=1))
+    future = [c for c in candidates if c > now]
+    return min(future) if future else None
+
+
+def diff_slots(previous: Dict[int, Dict], payload: Dict) -> Tuple[Dict[int, Dict], List[Dict], List[int]]:
+    """Compare a fresh slot payload with the last one: (slots by id, changed slots, removed slot_ids)."""
+    by_slot = {slot["slot_id"]: slot for slot in payload["slots"]}
+    changed = [slot for slot_id, slot in by_slot.items() if previous.get(slot_id) != slot]
+    removed = [slot_id for slot_id in previous if slot_id not in by_slot]
+    return by_slot, changed, removed
+
+
+class SlotStateBroadcaster:
+    """
+    One shared producer pushing slot state changes to every connected dashboard.
+
+    A single background thread recomputes slot states when a booking change is
+    published, when the next reserved/occupied boundary is reached, or every
+    `refresh_interval` seconds (to pick up writes from other worker processes).
+    It diffs the result against the previous snapshot and fans only the changed
+    slots out to subscriber queues, so N open dashboards cost one query, not N polls.
+    """
+
+    def __init__(
+        self,
+        load_rows: Callable[[], List[Dict]],
+        refresh_interval: float = 30.0,
+        keepalive: float = 15.0,
+        debounce: float = 0.2,
+        max_queue: int = 100,
+    ):
+        self._load_rows = load_rows
+        self.refresh_interval = refresh_interval
+        self.keepalive = keepalive
+        self.debounce = debounce
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._subscribers: Set[queue.Queue] = set()
+        self._needs_snapshot: Set[queue.Queue] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[Dict] = None
+        self._by_slot: Dict[int, Dict] = {}
+        self._next_transition: Optional[datetime] = None
+        self._refreshes = 0
+
+    def subscribe(self) -> queue.Queue:
+        q: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+            if self._snapshot is not None and self._thread is not None:
+                q.put_nowait(("snapshot", self._snapshot))
+            else:
+                self._needs_snapshot.add(q)
+                self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="slot-state-broadcaster", daemon=True
+                )
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(q)
+            self._needs_snapshot.discard(q)
+
+    def notify(self, change=None):
+        """booking_events listener: schedule a recompute (bursts are coalesced)."""
+        if self._subscribers:
+            self._wake.set()
+
+    def stream(self, q: queue.Queue) -> Iterator[str]:
+        """Generator body of the SSE response for one subscriber."""
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = q.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(q)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "refreshes": self._refreshes,
+                "next_transition": self._next_transition.isoformat() if self._next_transition else None,
+            }
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._snapshot = None
+                    self._by_slot = {}
+                    return
+            timeout = self.refresh_interval
+            if self._next_transition is not None:
+                until = (self._next_transition - datetime.now()).total_seconds()
+                timeout = max(0.0, min(timeout, until))
+            woke = self._wake.wait(timeout)
+            if woke:
+                time.sleep(self.debounce)
+                self._wake.clear()
+            try:
+                self._refresh("booking" if woke else "schedule")
+            except Exception:
+                logger.exception("slot state refresh failed")
+                self._next_transition = None
+                time.sleep(min(self.refresh_interval, 5.0))
+
+    def _refresh(self, reason: str):
+        rows = self._load_rows()
+        self._next_transition = next_transition(rows, datetime.now())
+        payload = build_slot_payload(rows)
+        by_slot, changed, removed = diff_slots(self._by_slot, payload)
+        self._refreshes += 1
+
+        with self._lock:
+            first = self._snapshot is None
+            self._snapshot = payload
+            self._by_slot = by_slot
+            new_subscribers, self._needs_snapshot = self._needs_snapshot, set()
+            targets = list(self._subscribers)
+
+        delta = {"reason": reason, "kpis": payload["kpis"], "changed": changed, "removed": removed}
+        for q in targets:
+            if q in new_subscribers or first:
+                message = ("snapshot", payload)
+            elif changed or removed:
+                message = ("slots", delta)
+            else:
+                continue
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow consumer: close its stream; EventSource reconnects and gets a snapshot
+                self.unsubscribe(q)
+                try:
+                    q.get_nowait()
+                    q.put_nowait((None, None))
+                except (queue.Empty, queue.Full):
+                    pass
+
+
+class AsyncSlotBroadcaster:
+    """
+    asyncio counterpart of SlotStateBroadcaster for the async API (async_api.py).
+
+    One task per event loop recomputes slot states every `refresh_interval` seconds
+    or at the next reserved/occupied boundary and pushes the changed slots to every
+    subscriber queue; an open stream costs a queue, not a thread. It runs in its own
+    process, so booking changes made by the Flask workers arrive with the next refresh.
+    """
+
+    def __init__(
+        self,
+        load_rows: Callable[[], Awaitable[List[Dict]]],
+        refresh_interval: float = 5.0,
+        keepalive: float = 15.0,
+        max_queue: int = 100,
+    ):
+        self._load_rows = load_rows
+        self.refresh_interval = refresh_interval
+        self.keepalive = keepalive
+        self.max_queue = max_queue
+
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[Dict] = None
+        self._by_slot: Dict[int, Dict] = {}
+        self._next_transition: Optional[datetime] = None
+        self._refreshes = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(q)
+        if self._snapshot is not None:
+            q.put_nowait(("snapshot", self._snapshot))
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self._subscribers.discard(q)
+
+    async def stream(self, q: asyncio.Queue) -> AsyncIterator[str]:
+        """Body of the SSE response for one subscriber."""
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(q.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(q)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "refreshes": self._refreshes,
+            "next_transition": self._next_transition.isoformat() if self._next_transition else None,
+        }
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        try:
+            while self._subscribers:
+                try:
+                    await self._refresh()
+                except Exception:
+                    logger.exception("slot state refresh failed")
+                    self._next_transition = None
+                timeout = self.refresh_interval
+                if self._next_transition is not None:
+                    until = (self._next_transition - datetime.now()).total_seconds()
+                    timeout = max(0.0, min(timeout, until))
+                await asyncio.sleep(timeout)
+        finally:
+            self._task = None
+            self._snapshot = None
+            self._by_slot = {}
+
+    async def _refresh(self):
+        rows = await self._load_rows()
+        self._next_transition = next_transition(rows, datetime.now())
+        payload = build_slot_payload(rows)
+        first = self._snapshot is None
+        by_slot, changed, removed = diff_slots(self._by_slot, payload)
+        self._snapshot, self._by_slot = payload, by_slot
+        self._refreshes += 1
+
+        delta = {"reason": "schedule", "kpis": payload["kpis"], "changed": changed, "removed": removed}
+        for q in list(self._subscribers):
+            if first:
+                message = ("snapshot", payload)
+            elif changed or removed:
+                message = ("slots", delta)
+            else:
+                continue
+            try:
+                q.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: close its stream; EventSource reconnects and gets a snapshot
+                self.unsubscribe(q)
+                q.get_nowait()
+                q.put_nowait((None, None))
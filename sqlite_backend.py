@@ -0,0 +1,268 @@
+"""
+Embedded SQLite storage backend (DB_BACKEND=sqlite).
+
+Connections opened here behave like the pymysql DictCursor connections the rest of
+the app uses: %s placeholders, dict rows, DATE/TIME/DATETIME columns returned as
+date/timedelta/datetime, and sqlite3 errors re-raised as the matching pymysql.err
+exceptions. The few MySQL-only expressions the app's queries use (NOW(),
+DATE_ADD/DATE_SUB with INTERVAL, INSERT IGNORE, FOR UPDATE) are rewritten on the
+fly; the schema itself is created from SQLITE_SCHEMA_SQL instead of the MySQL DDL in
+migrations.py. The database runs in WAL mode with memory-mapped reads.
+
+This is for single-node deployments, tests and benchmarks; the legacy parking.db in
+the repo predates the current schema and is not used.
+"""
+import re
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pymysql
+
+SQLITE_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(50) NOT NULL UNIQUE,
+        full_name VARCHAR(150) NOT NULL,
+        email VARCHAR(255) NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        role VARCHAR(10) DEFAULT 'user' CHECK (role IN ('user', 'admin')),
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_role_created ON users (role, created_at, user_id);
+    CREATE INDEX IF NOT EXISTS idx_full_name ON users (full_name);
+
+    CREATE TABLE IF NOT EXISTS parking_slots (
+        slot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        slot_name VARCHAR(10) NOT NULL UNIQUE,
+        is_available INTEGER DEFAULT 1,
+        location VARCHAR(150) DEFAULT 'Nwssu Calbayog City, Samar, Philippines'
+    );
+
+    CREATE TABLE IF NOT EXISTS bookings (
+        booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE ON UPDATE CASCADE,
+        slot_id INTEGER NOT NULL REFERENCES parking_slots (slot_id) ON DELETE CASCADE ON UPDATE CASCADE,
+        entry_date DATE NOT NULL,
+        entry_time TIME NOT NULL,
+        exit_date DATE NOT NULL,
+        exit_time TIME NOT NULL,
+        status VARCHAR(10) DEFAULT 'active' CHECK (status IN ('active', 'completed', 'cancelled')),
+        booked_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+        entry_ts DATETIME GENERATED ALWAYS AS (datetime(entry_date || ' ' || entry_time)) STORED,
+        exit_ts DATETIME GENERATED ALWAYS AS (datetime(exit_date || ' ' || exit_time)) STORED,
+        UNIQUE (slot_id, entry_date, entry_time)
+    );
+    CREATE INDEX IF NOT EXISTS idx_slot_status_window ON bookings (slot_id, status, entry_ts, exit_ts);
+    CREATE INDEX IF NOT EXISTS idx_slot_status_exit ON bookings (slot_id, status, exit_ts);
+    CREATE INDEX IF NOT EXISTS idx_status_exit_window ON bookings (status, exit_ts, entry_ts, slot_id);
+    CREATE INDEX IF NOT EXISTS idx_user_booked ON bookings (user_id, booked_at);
+
+    CREATE TABLE IF NOT EXISTS bookings_archive (
+        booking_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        slot_id INTEGER NOT NULL,
+        entry_date DATE NOT NULL,
+        entry_time TIME NOT NULL,
+        exit_date DATE NOT NULL,
+        exit_time TIME NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        booked_at TIMESTAMP NULL,
+        archived_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_archive_user_booked ON bookings_archive (user_id, booked_at);
+"""
+
+_NOW_SQL = "datetime('now', 'localtime')"
+_UNIT_SECONDS = {"SECOND": 1, "MINUTE": 60, "HOUR": 3600, "DAY": 86400}
+_INTERVAL_RE = re.compile(
+    r"DATE_(ADD|SUB)\(\s*NOW\(\)\s*,\s*INTERVAL\s+(.+?)\s+(SECOND|MINUTE|HOUR|DAY)\s*\)",
+    re.IGNORECASE,
+)
+
+
+def _interval(match) -> str:
+    sign = "" if match.group(1).upper() == "ADD" else "-"
+    seconds = _UNIT_SECONDS[match.group(3).upper()]
+    return f"datetime('now', 'localtime', ({sign}({match.group(2)}) * {seconds}) || ' seconds')"
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str, with_params: bool = True) -> str:
+    """
+    Rewrite one MySQL-dialect statement (as used by this app) for SQLite.
+    Like pymysql, placeholders and %% escapes are only processed when parameters are passed.
+    """
+    sql = _INTERVAL_RE.sub(_interval, sql)
+    sql = re.sub(r"\bNOW\(\)", _NOW_SQL, sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\s+FOR\s+UPDATE\b", "", sql, flags=re.IGNORECASE)
+    if not with_params:
+        return sql
+    sql = re.sub(r"%\((\w+)\)s", r":\1", sql)
+    return sql.replace("%s", "?").replace("%%", "%")
+
+
+def _to_timedelta(value: bytes) -> timedelta:
+    parts = [int(p) for p in value.decode().split(":")]
+    hours, minutes, seconds = (parts + [0, 0])[:3]
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _format_timedelta(value: timedelta) -> str:
+    total = int(value.total_seconds())
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+# Store temporal values in the same fixed-width text form SQLite's datetime() produces,
+# so string comparison matches chronological order
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" ", "seconds"))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(time, lambda v: v.isoformat("seconds"))
+sqlite3.register_adapter(timedelta, _format_timedelta)
+sqlite3.register_converter("DATE", lambda v: date.fromisoformat(v.decode()))
+sqlite3.register_converter("TIME", _to_timedelta)
+sqlite3.register_converter("DATETIME", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda v: datetime.fromisoformat(v.decode()))
+
+_ERRORS = (
+    (sqlite3.IntegrityError, pymysql.err.IntegrityError),
+    (sqlite3.OperationalError, pymysql.err.OperationalError),
+    (sqlite3.ProgrammingError, pymysql.err.ProgrammingError),
+    (sqlite3.DatabaseError, pymysql.err.DatabaseError),
+)
+
+
+def _reraise(e: sqlite3.Error):
+    for sqlite_error, mysql_error in _ERRORS:
+        if isinstance(e, sqlite_error):
+            raise mysql_error(*e.args) from e
+    raise e
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """pymysql-style cursor over sqlite3: %s placeholders, dict rows, pymysql errors."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def execute(self, query, args=None):
+        try:
+            if args is None:
+                self._cursor.execute(translate(query, False))
+            else:
+                self._cursor.execute(translate(query), args)
+        except sqlite3.Error as e:
+            _reraise(e)
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        try:
+            self._cursor.executemany(translate(query), args)
+        except sqlite3.Error as e:
+            _reraise(e)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SQLiteConnection:
+    """pymysql-compatible connection wrapper (the subset ConnectionPool and the app use)."""
+
+    def __init__(self, raw: sqlite3.Connection):
+        self._raw = raw
+
+    def cursor(self):
+        return SQLiteCursor(self._raw.cursor())
+
+    def begin(self):
+        """
+        Start a write transaction now: takes SQLite's single writer lock up front.
+        Refuses to while uncommitted writes are pending, rather than committing them.
+        """
+        if self._raw.in_transaction:
+            raise pymysql.err.ProgrammingError(
+                "begin() called inside an open transaction; commit or roll back first"
+            )
+        try:
+            self._raw.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            _reraise(e)
+
+    def commit(self):
+        try:
+            self._raw.commit()
+        except sqlite3.Error as e:
+            _reraise(e)
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def executescript(self, script: str):
+        try:
+            self._raw.executescript(script)
+        except sqlite3.Error as e:
+            _reraise(e)
+
+    def ping(self, reconnect=False):
+        self._raw.execute("SELECT 1")
+
+    def close(self):
+        self._raw.close()
+
+
+def connect(path: str, mmap_size: int = 256 * 1024 * 1024, busy_timeout: float = 5.0) -> SQLiteConnection:
+    """Open `path` in WAL mode with memory-mapped I/O and foreign keys enforced."""
+    raw = sqlite3.connect(
+        path,
+        timeout=busy_timeout,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        # The pool hands a connection to one thread at a time, never to two at once
+        check_same_thread=False,
+    )
+    raw.row_factory = _dict_row
+    raw.execute("PRAGMA journal_mode = WAL")
+    raw.execute("PRAGMA synchronous = NORMAL")
+    raw.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    raw.execute("PRAGMA foreign_keys = ON")
+    return SQLiteConnection(raw)
+
+
+def create_schema(conn: SQLiteConnection):
+    """Create every table and index the app needs (idempotent)."""
+    conn.executescript(SQLITE_SCHEMA_SQL)
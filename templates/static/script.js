@@ -255,6 +255,10 @@ function convertTo12Hour(time24) {
     }
   }
 
+  // Last answer per requested window, revalidated with its ETag (304 = still current)
+  const availabilityCache = new Map();
+  const AVAILABILITY_CACHE_MAX = 20;
+
   async function checkAvailability() {
     const entryDateInput = document.getElementById("entry_date");
     const entryTimeInput = document.getElementById("entry_time");
@@ -278,26 +282,47 @@ function convertTo12Hour(time24) {
     showStatus("Checking real-time availability...", "info");
 
     try {
+      const body = JSON.stringify({
+        entry_date: entryDate,
+        entry_time: entryTime,
+        exit_date: exitDate,
+        exit_time: exitTime,
+      });
+      const cached = availabilityCache.get(body);
+      const headers = { 'Content-Type': 'application/json' };
+      if (cached) {
+        headers['If-None-Match'] = cached.etag;
+      }
       const response = await fetch('/api/check-availability', {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          entry_date: entryDate,
-          entry_time: entryTime,
-          exit_date: exitDate,
-          exit_time: exitTime,
-        }),
+        headers,
+        body,
       });
 
-      if (response.ok) {
-        const data = await response.json();
+      let data = null;
+      if (response.status === 304 && cached) {
+        data = cached.data;
+      } else if (response.ok) {
+        data = await response.json();
+        const etag = response.headers.get('ETag');
+        availabilityCache.delete(body);
+        if (etag) {
+          availabilityCache.set(body, { etag, data });
+          if (availabilityCache.size > AVAILABILITY_CACHE_MAX) {
+            availabilityCache.delete(availabilityCache.keys().next().value);
+          }
+        }
+      }
+
+      if (data) {
         updateSlotAvailability(data.slots);
         updateMapOverlay(data.slots);
         const kpis = data.kpis || {};
         showStatus(`Available: ${kpis.available || 0} • Reserved: ${kpis.reserved || 0} • Occupied: ${kpis.occupied || 0}`, "success");
         updateReserveButtonEnabled();
+        if (!kpis.available) {
+          suggestEarliestWindow(entryDate, entryTime, exitDate, exitTime);
+        }
       } else {
         showStatus("Error checking availability. Please try again.", "warning");
       }
@@ -307,6 +332,38 @@ function convertTo12Hour(time24) {
     }
   }
 
+  // Nothing free for the chosen window: ask the server for the earliest one of the
+  // same length instead of making the user try windows one by one
+  async function suggestEarliestWindow(entryDate, entryTime, exitDate, exitTime) {
+    const entry = new Date(`${entryDate}T${entryTime}`);
+    const exit = new Date(`${exitDate}T${exitTime}`);
+    const minutes = Math.round((exit - entry) / 60000);
+    if (!(minutes > 0)) return;
+    try {
+      const response = await fetch('/api/search-availability', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          duration_minutes: minutes,
+          from_date: entryDate,
+          from_time: entryTime,
+          limit: 1,
+        }),
+      });
+      if (!response.ok) return;
+      const data = await response.json();
+      const earliest = data.earliest;
+      if (earliest) {
+        const w = earliest.windows[0];
+        showStatus(`No slot is free for that time. Earliest: ${earliest.slot_name} on ${w.entry_date}, ${convertTo12Hour(w.entry_time)} - ${convertTo12Hour(w.exit_time)}`, "warning");
+      } else {
+        showStatus("No slot is free for that length of time within the next 24 hours", "warning");
+      }
+    } catch (error) {
+      console.error('Error searching availability:', error);
+    }
+  }
+
   function updateSlotAvailability(slots) {
     const slotButtons = document.querySelectorAll(".slot");
     
@@ -0,0 +1,89 @@
+import base64
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+USER_COLUMNS = "user_id, username, full_name, role, created_at"
+
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque keyset cursor pointing just past `row` in (created_at DESC, user_id DESC) order."""
+    raw = f"{row['created_at'].strftime('%Y-%m-%d %H:%M:%S')}|{row['user_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor(); raises ValueError on a malformed cursor."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, user_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    return datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S"), int(user_id)
+
+
+def _prefix_pattern(term: str) -> str:
+    # '!' rather than backslash: MySQL and SQLite agree on how to spell it in ESCAPE
+    escaped = term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return escaped + "%"
+
+
+def _search_clause(search: Optional[str]) -> Tuple[str, List]:
+    # Prefix LIKEs can range-scan uniq_username and idx_full_name (index merge union)
+    if not search:
+        return "", []
+    pattern = _prefix_pattern(search)
+    return " AND (username LIKE %s ESCAPE '!' OR full_name LIKE %s ESCAPE '!')", [pattern, pattern]
+
+
+def fetch_users_page(cursor, search: Optional[str] = None, after: Optional[str] = None,
+                     limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of regular users, newest first, using keyset pagination on
+    (created_at, user_id) backed by idx_role_created. Returns (users, next_cursor).
+    """
+    clause, params = _search_clause(search)
+    sql = f"SELECT {USER_COLUMNS} FROM users WHERE role = 'user'{clause}"
+    if after:
+        created_at, user_id = decode_cursor(after)
+        sql += " AND (created_at < %s OR (created_at = %s AND user_id < %s))"
+        params += [created_at, created_at, user_id]
+    sql += " ORDER BY created_at DESC, user_id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit and page else None
+    return page, next_cursor
+
+
+class UserCountCache:
+    """
+    Cached total of regular users per search term, so paging does not re-count.
+    Cleared on signup/delete in this process; the TTL covers other workers.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Tuple[float, int]] = {}
+
+    def get(self, cursor, search: Optional[str] = None) -> int:
+        key = search or ""
+        now = time.monotonic()
+        with self._lock:
+            item = self._counts.get(key)
+            if item is not None and item[0] > now:
+                return item[1]
+        clause, params = _search_clause(search)
+        cursor.execute(f"SELECT COUNT(*) AS total FROM users WHERE role = 'user'{clause}", params)
+        total = cursor.fetchone()["total"]
+        with self._lock:
+            if len(self._counts) >= self.max_entries:
+                self._counts.clear()
+            self._counts[key] = (now + self.ttl, total)
+        return total
+
+    def invalidate(self):
+        with self._lock:
+            self._counts.clear()